@@ -0,0 +1,77 @@
+"""Measures the per-call overhead of dispatching on AST node types.
+
+Usage: python -m benchmarks.dispatch [CALLS]
+
+The cost of cedar.dispatch is compared to that of a plain method call
+and, if it's installed, to that of multipledispatch, which Cedar used
+to depend on.
+"""
+import sys
+
+from cedar import ast
+from cedar.dispatch import dispatch
+
+from .parse import measure
+
+
+class Plain:
+    def visit(self, node):
+        return node
+
+
+class Dispatching:
+    @dispatch(ast.Type)
+    def visit(self, node):
+        return node
+
+    @dispatch(ast.List)
+    def visit(self, node):
+        return node
+
+
+def make_multipledispatch():
+    try:
+        from multipledispatch import dispatch
+    except ImportError:
+        return None
+
+    class MultipleDispatching:
+        @dispatch(ast.Type)
+        def visit(self, node):
+            return node
+
+        @dispatch(ast.List)
+        def visit(self, node):
+            return node
+
+    return MultipleDispatching
+
+
+def per_call(cls, nodes):
+    visit = cls().visit
+
+    def run():
+        for node in nodes:
+            visit(node)
+
+    return measure(run, repeat=5) / len(nodes)
+
+
+def main(calls=200000):
+    nodes = [ast.Type("Int"), ast.List(ast.Type("Int"))] * (calls // 2)
+    baseline = per_call(Plain, nodes)
+    print("plain method:     {:8.0f}ns/call".format(baseline * 1e9))
+
+    cedar = per_call(Dispatching, nodes)
+    print("cedar.dispatch:   {:8.0f}ns/call ({:.0f}ns overhead)".format(cedar * 1e9, (cedar - baseline) * 1e9))
+
+    multiple = make_multipledispatch()
+    if multiple is not None:
+        multiple = per_call(multiple, nodes)
+        print("multipledispatch: {:8.0f}ns/call ({:.0f}ns overhead, {:.1f}x cedar.dispatch's)".format(
+            multiple * 1e9, (multiple - baseline) * 1e9, (multiple - baseline) / (cedar - baseline)
+        ))
+
+
+if __name__ == "__main__":
+    sys.exit(main(*(int(arg) for arg in sys.argv[1:])))
@@ -0,0 +1,59 @@
+"""Measures parser throughput on a large generated spec.
+
+Usage: python -m benchmarks.parse [DECLARATIONS]
+"""
+import gc
+import sys
+import time
+
+from cedar import parse
+from cedar.tokenizer import tokenize, tokenize_bulk
+
+from .specgen import generate_spec
+
+
+def measure(fn, *args, repeat=3, min_time=0.1):
+    """Time the fastest of several runs of fn, in seconds per call.
+    Like timeit, fast functions are called as many times in a row as
+    it takes for a run to last at least min_time, garbage is collected
+    before every run and the collector is disabled during it, so that
+    neither timer resolution nor collections owed to earlier work end
+    up in the timings.
+    """
+    number = 1
+    while _run(fn, args, number) < min_time:
+        number *= 2
+
+    return min(_run(fn, args, number) for _ in range(repeat)) / number
+
+
+def _run(fn, args, number):
+    enabled = gc.isenabled()
+    gc.collect()
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn(*args)
+
+        return time.perf_counter() - start
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def main(declarations=10000):
+    source = generate_spec(declarations)
+    print("{} declarations, {} bytes".format(declarations, len(source)))
+
+    generator = measure(lambda: list(tokenize("[BENCH]", source)))
+    bulk = measure(tokenize_bulk, "[BENCH]", source)
+    print("tokenize (generator): {:8.3f}s".format(generator))
+    print("tokenize (bulk):      {:8.3f}s ({:.2f}x)".format(bulk, generator / bulk))
+
+    parsing = measure(parse, source)
+    print("parse:                {:8.3f}s ({:.0f} declarations/s)".format(parsing, declarations / parsing))
+
+
+if __name__ == "__main__":
+    sys.exit(main(*(int(arg) for arg in sys.argv[1:])))
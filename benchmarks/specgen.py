@@ -0,0 +1,88 @@
+"""Generates valid Cedar modules of arbitrary size.
+
+Usage: python -m benchmarks.specgen [DECLARATIONS]
+"""
+import sys
+
+#: The scalar types attributes and parameters cycle through.
+_scalars = ["Int", "String", "Float", "Bool", "Timestamp"]
+
+#: The wrappers applied to types once per level of nesting.
+_wrappers = ["[{}]", "{{String: {}}}", "{}?"]
+
+
+def generate_spec(declarations=0, *, enums=None, unions=None, records=None, functions=None, width=6, depth=1):
+    """Generate a valid Cedar module.
+
+    Parameters:
+      declarations(int): The approximate number of toplevel
+        declarations to generate.  These are split evenly between
+        enums, unions, records and functions unless their counts are
+        given explicitly.
+      enums(int): The number of enums to generate.
+      unions(int): The number of unions to generate.
+      records(int): The number of records to generate.
+      functions(int): The number of functions to generate.
+      width(int): The number of attributes per record, tags per enum
+        and parameters per function.
+      depth(int): How deeply list, dict and nullable types are
+        nested inside one another.
+
+    Returns:
+      str: The source code of the module.
+    """
+    share = declarations // 4
+    enums = share if enums is None else enums
+    unions = share if unions is None else unions
+    records = max(1, share) if records is None else records
+    functions = share if functions is None else functions
+    width = max(1, width)
+
+    def tipe(i, j):
+        # Records may refer to themselves, to earlier records and to
+        # any enum, so every reference is declared by the time it's used.
+        choices = len(_scalars) + (1 if enums else 0) + (1 if i > 0 else 0)
+        choice = (i + j) % choices
+        if choice < len(_scalars):
+            name = _scalars[choice]
+        elif choice == len(_scalars) and enums:
+            name = "Status{}".format((i + j) % enums)
+        else:
+            name = "Item{}".format((i + j) % i)
+
+        for level in range(depth if j % 2 else 0):
+            name = _wrappers[(i + j + level) % len(_wrappers)].format(name)
+
+        return name
+
+    chunks = []
+    for i in range(enums):
+        tags = ", ".join("Tag{}".format(j) for j in range(width))
+        chunks.append("enum Status{} {{ {} }}\n".format(i, tags))
+
+    for i in range(records):
+        attributes = "".join("  field{} {}\n".format(j, tipe(i, j)) for j in range(width))
+        chunks.append("record Item{} {{\n{}}}\n".format(i, attributes))
+
+    for i in range(unions):
+        types = ["Item{}".format((i + j) % records) for j in range(min(width, records))]
+        chunks.append("union Resource{} {{ {} }}\n".format(i, ", ".join(types)))
+
+    for i in range(functions):
+        parameters = ", ".join("arg{} {}".format(j, tipe(i % records, j)) for j in range(width))
+        if unions:
+            return_type = "[Resource{}]".format(i % unions)
+        else:
+            return_type = "Item{}?".format(i % records)
+
+        chunks.append("fn getItem{}({}) {}\n".format(i, parameters, return_type))
+
+    return "\n".join(chunks)
+
+
+def main(declarations=1000):
+    sys.stdout.write(generate_spec(declarations))
+
+
+if __name__ == "__main__":
+    sys.exit(main(*(int(arg) for arg in sys.argv[1:])))
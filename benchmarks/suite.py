@@ -0,0 +1,193 @@
+"""Measures the throughput and peak memory use of every compiler
+phase at several spec sizes and compares how they scale against a
+stored baseline.
+
+Usage: python -m benchmarks.suite [--sizes 250,1000,4000] [--update-baseline]
+
+The baseline stores, for every phase, the ratio between the cost per
+declaration at the largest and at the smallest size.  Absolute
+timings depend on the machine the suite runs on, but these ratios
+don't, so a phase whose ratio grows past the baseline's by more than
+the tolerance has started scaling worse than it used to and the suite
+exits with a non-zero status.
+"""
+import argparse
+import json
+import os
+import sys
+import tracemalloc
+
+from cedar.languages import cedar, elm, go
+from cedar.parser import _Parser
+from cedar.semantics import Model
+from cedar.tokenizer import tokenize_bulk
+
+from .parse import measure
+from .specgen import generate_spec
+
+#: The default location of the stored baseline.
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+
+def parse_unchecked(source):
+    return _Parser("[BENCH]", source, False).parse()
+
+
+def parse_checked(source):
+    return _Parser("[BENCH]", source, True).parse()
+
+
+def prepare_checks(source):
+    parser = _Parser("[BENCH]", source, True)
+    return parser, parser.parse_module()
+
+
+def run_checks(parser, module):
+    # Start from a clean slate so every run does the same work.
+    parser.known_types = set(parser.builtin_types)
+    parser.known_fns = set()
+    parser.type_errors = []
+    parser.run_checks(Model(module))
+    return parser.type_errors
+
+
+def phases(source, module):
+    """Returns:
+      list: (name, function) pairs for every phase to measure.
+    """
+    parser, parsed = prepare_checks(source)
+    return [
+        ("tokenize", lambda: tokenize_bulk("[BENCH]", source)),
+        ("parse", lambda: parse_unchecked(source)),
+        ("typecheck", lambda: run_checks(parser, parsed)),
+        ("go.generate", lambda: go.generate(module)),
+        ("elm.generate", lambda: elm.generate(module)),
+        ("cedar.format_module", lambda: cedar.format_module(module)),
+    ]
+
+
+def peak_memory(fn):
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run(sizes, *, width=6, depth=1, repeat=5, min_time=0.1, stream=sys.stdout):
+    """Measure every phase at every size.  See measure for repeat and
+    min_time.
+
+    Returns:
+      dict: Maps phase names to lists of (declarations, seconds,
+      peak bytes) tuples, one per size.
+    """
+    results = {}
+    for size in sizes:
+        source = generate_spec(size, width=width, depth=depth)
+        module = parse_checked(source)
+        declarations = len(module.declarations)
+        stream.write("{} declarations, {} bytes\n".format(declarations, len(source)))
+
+        for name, fn in phases(source, module):
+            elapsed, memory = measure(fn, repeat=repeat, min_time=min_time), peak_memory(fn)
+            stream.write("  {:<20} {:10.4f}s {:12.0f} declarations/s {:10.1f}KiB peak\n".format(
+                name, elapsed, declarations / elapsed, memory / 1024
+            ))
+            results.setdefault(name, []).append((declarations, elapsed, memory))
+
+    return results
+
+
+def scaling(results):
+    """Compute how the cost per declaration of every phase grows
+    between the smallest and the largest size.  A phase that scales
+    linearly has a ratio of about 1.
+
+    Returns:
+      dict: Maps phase names to dicts with "time" and "memory" ratios.
+    """
+    ratios = {}
+    for name, samples in results.items():
+        (small, small_time, small_memory), (large, large_time, large_memory) = samples[0], samples[-1]
+        ratios[name] = {
+            "time": round((large_time / large) / (small_time / small), 3),
+            "memory": round((large_memory / large) / (small_memory / small), 3),
+        }
+
+    return ratios
+
+
+def compare(ratios, baseline, *, tolerance=2.5, stream=sys.stdout):
+    """Compare scaling ratios against a baseline.
+
+    Returns:
+      list: A list of messages describing every regression.
+    """
+    regressions = []
+    for name, ratio in sorted(ratios.items()):
+        for metric in ("time", "memory"):
+            expected = baseline.get(name, {}).get(metric)
+            if expected is None:
+                continue
+
+            status = "ok"
+            if ratio[metric] > max(expected, 1) * tolerance:
+                status = "REGRESSION"
+                regressions.append("{} {} scaling went from {:.2f} to {:.2f}".format(
+                    name, metric, expected, ratio[metric]
+                ))
+
+            stream.write("  {:<20} {:<6} {:8.2f} (baseline {:.2f}) {}\n".format(
+                name, metric, ratio[metric], expected, status
+            ))
+
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.suite")
+    parser.add_argument("--sizes", default="250,1000,4000", help="comma-separated declaration counts")
+    parser.add_argument("--width", type=int, default=6, help="attributes per record and parameters per function")
+    parser.add_argument("--depth", type=int, default=1, help="how deeply composite types are nested")
+    parser.add_argument("--repeat", type=int, default=5, help="how many times to run each phase")
+    parser.add_argument("--baseline", default=BASELINE, help="the baseline file to compare against")
+    parser.add_argument("--update-baseline", action="store_true", help="overwrite the baseline with this run")
+    parser.add_argument("--tolerance", type=float, default=2.5, help="how much worse scaling may get")
+    arguments = parser.parse_args(argv)
+
+    sizes = sorted(int(size) for size in arguments.sizes.split(","))
+    if len(sizes) < 2:
+        parser.error("at least two sizes are required")
+
+    results = run(sizes, width=arguments.width, depth=arguments.depth, repeat=arguments.repeat)
+    ratios = scaling(results)
+    if arguments.update_baseline:
+        with open(arguments.baseline, "w") as f:
+            json.dump(ratios, f, indent=2, sort_keys=True)
+            f.write("\n")
+
+        print("Baseline written to {}.".format(arguments.baseline))
+        return 0
+
+    try:
+        with open(arguments.baseline) as f:
+            baseline = json.load(f)
+    except OSError:
+        print("No baseline found at {}, run with --update-baseline to create one.".format(arguments.baseline))
+        return 0
+
+    print("Scaling from {} to {} declarations:".format(sizes[0], sizes[-1]))
+    regressions = compare(ratios, baseline, tolerance=arguments.tolerance)
+    if regressions:
+        sys.stderr.write("Scaling regressions:\n")
+        for regression in regressions:
+            sys.stderr.write("  " + regression + "\n")
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,13 @@
 # flake8: noqa
-from .errors import CedarError, ParseError, TypeError, TypeErrors
-from .parser import parse
+from .errors import CedarError, ParseError, ParseErrors, TypeError, TypeErrors
 
 __version__ = "0.3.3"
+
+
+def parse(source, *, filename="[STRING]", typecheck=True):
+    """Parse the source into a Cedar Module.  The parser is imported
+    on first use so that importing cedar stays cheap.  See
+    cedar.parser.parse.
+    """
+    from .parser import parse
+    return parse(source, filename=filename, typecheck=typecheck)
@@ -1,15 +1,192 @@
-from collections import namedtuple
-
-
-Module = namedtuple("Module", "file_name declarations")
-Enum = namedtuple("Enum", "name tags")
-Tag = namedtuple("Tag", "name")
-Record = namedtuple("Record", "name attributes")
-Attribute = namedtuple("Attribute", "name type")
-Function = namedtuple("Function", "name parameters return_type")
-Parameter = namedtuple("Parameter", "name type")
-Type = namedtuple("Type", "name")
-List = namedtuple("List", "type")
-Dict = namedtuple("Dict", "keys_type values_type")
-Union = namedtuple("Union", "name types")
-Nullable = namedtuple("Nullable", "type")
+from operator import attrgetter
+from weakref import WeakValueDictionary
+
+
+class Node:
+    """Base class for AST nodes.  Nodes are immutable and, like the
+    namedtuples they replace, they compare equal whenever they are of
+    the same type and their fields are equal.  Their hashes are
+    computed once, on first use.  Lists passed in as fields are
+    converted to tuples.
+    """
+
+    __slots__ = ["_hash"]
+
+    #: The names of the node's fields, in positional order.
+    _fields = ()
+
+    def __new__(cls, *args, **kwargs):
+        node = object.__new__(cls)
+        node._init(args, kwargs)
+        return node
+
+    def _init(self, args, kwargs):
+        if kwargs:
+            try:
+                args += tuple(kwargs.pop(name) for name in self._fields[len(args):])
+            except KeyError as e:
+                raise TypeError("{}() missing argument {}".format(type(self).__name__, e))
+
+        if kwargs or len(args) != len(self._fields):
+            raise TypeError("{}() takes {} arguments".format(type(self).__name__, len(self._fields)))
+
+        for setter, value in zip(self._setters, args):
+            setter(self, tuple(value) if type(value) is list else value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("{} nodes are immutable".format(type(self).__name__))
+
+    def __delattr__(self, name):
+        raise AttributeError("{} nodes are immutable".format(type(self).__name__))
+
+    def __iter__(self):
+        return iter(self._values(self))
+
+    def __eq__(self, other):
+        if self is other:
+            return True
+
+        if type(self) is not type(other):
+            return NotImplemented
+
+        return hash(self) == hash(other) and self._values(self) == other._values(other)
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    def __hash__(self):
+        try:
+            return self._hash
+        except AttributeError:
+            value = hash((type(self).__name__, self._values(self)))
+            _set_hash(self, value)
+            return value
+
+    def __repr__(self):
+        return "{}({})".format(type(self).__name__, ", ".join(
+            "{}={!r}".format(name, value) for name, value in zip(self._fields, self._values(self))
+        ))
+
+    def __reduce__(self):
+        return type(self), self._values(self)
+
+    def _asdict(self):
+        return dict(zip(self._fields, self._values(self)))
+
+    def _replace(self, **kwargs):
+        values = self._asdict()
+        values.update(kwargs)
+        return type(self)(**values)
+
+
+class Spanned(Node):
+    """Base class for nodes that know where they are in the source.
+    A declaration's span is relative to the end of the declaration
+    before it (or to the start of the source) and the spans of the
+    nodes nested inside it are relative to the start of the
+    declaration, so editing the source only ever changes the spans of
+    the declarations around the edit.  See offsets.
+
+    Attributes:
+      start(int): The offset of the node's first character.
+      length(int): The number of characters the node spans.
+    """
+
+    __slots__ = ["start", "length"]
+
+    def __new__(cls, *args, start=0, length=0, **kwargs):
+        node = object.__new__(cls)
+        node._init(args, kwargs)
+        _set_start(node, start)
+        _set_length(node, length)
+        return node
+
+    def __reduce__(self):
+        return _restore, (type(self), self.start, self.length, self._values(self))
+
+    @property
+    def span(self):
+        return self.start, self.length
+
+    def _replace(self, **kwargs):
+        start, length = kwargs.pop("start", self.start), kwargs.pop("length", self.length)
+        values = self._asdict()
+        values.update(kwargs)
+        return type(self)(start=start, length=length, **values)
+
+
+class Expression(Node):
+    """Base class for type expressions.  Type expressions are
+    hash-consed: constructing one that's equal to one that's still
+    alive returns the existing instance.  Since the same instance can
+    appear in many places, type expressions have no span.
+    """
+
+    __slots__ = ["__weakref__"]
+
+    def __new__(cls, *args, **kwargs):
+        node = object.__new__(cls)
+        node._init(args, kwargs)
+        key = node._values(node) + (cls,)
+        existing = _expressions.get(key)
+        if existing is not None:
+            return existing
+
+        _expressions[key] = node
+        return node
+
+
+def node(name, fields, base=Spanned):
+    """Define a Node subclass, in the spirit of namedtuple.
+    """
+    fields = tuple(fields.split())
+    cls = type(name, (base,), {"__slots__": fields, "_fields": fields})
+    cls._setters = [getattr(cls, field).__set__ for field in fields]
+    cls._values = staticmethod(attrgetter(*fields) if len(fields) > 1 else lambda node: (getattr(node, fields[0]),))
+    return cls
+
+
+def offsets(declarations):
+    """Compute the absolute offset at which each declaration starts.
+
+    Parameters:
+      declarations(Node list): The declarations of a Module.
+
+    Returns:
+      int list: -
+    """
+    offsets, end = [], 0
+    for declaration in declarations:
+        start = end + declaration.start
+        offsets.append(start)
+        end = start + declaration.length
+
+    return offsets
+
+
+def _restore(cls, start, length, values):
+    return cls(*values, start=start, length=length)
+
+
+_set_hash = Node._hash.__set__
+_set_start = Spanned.start.__set__
+_set_length = Spanned.length.__set__
+_expressions = WeakValueDictionary()
+
+
+Module = node("Module", "file_name declarations")
+Enum = node("Enum", "name tags")
+Tag = node("Tag", "name")
+Record = node("Record", "name attributes")
+Attribute = node("Attribute", "name type")
+Function = node("Function", "name parameters return_type")
+Parameter = node("Parameter", "name type")
+Type = node("Type", "name", Expression)
+List = node("List", "type", Expression)
+Dict = node("Dict", "keys_type values_type", Expression)
+Union = node("Union", "name types")
+Nullable = node("Nullable", "type", Expression)
+
+#: The builtin types are kept alive for as long as the module is.
+builtins = [Type(name) for name in ("Bool", "Int", "Float", "String", "Timestamp")]
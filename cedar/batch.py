@@ -0,0 +1,289 @@
+import argparse
+import os
+import shlex
+import sys
+import tempfile
+
+from collections import namedtuple
+from contextlib import contextmanager, redirect_stdout
+
+from . import CedarError, parse, timings
+from .languages import load, registry
+
+Target = namedtuple("Target", "filename language output options")
+
+
+class BatchError(Exception):
+    """Raised when a target or a manifest is invalid.
+    """
+
+
+def parse_target(spec):
+    """Parse a target from a FILENAME:LANGUAGE:OUTPUT[:OPTIONS] string.
+    OPTIONS are the language's command line options, eg. "--package-name
+    todos".
+
+    Raises:
+      BatchError: If the string is not a valid target.
+
+    Returns:
+      Target: -
+    """
+    parts = spec.split(":", 3)
+    if len(parts) < 3 or not all(parts[:3]):
+        raise BatchError("invalid target {!r} (expected FILENAME:LANGUAGE:OUTPUT[:OPTIONS])".format(spec))
+
+    filename, language, output = parts[:3]
+    options = shlex.split(parts[3]) if len(parts) == 4 else []
+    return Target(filename, language, output, tuple(options))
+
+
+def load_manifest(filename):
+    """Load a list of targets from a TOML or a JSON manifest file.
+    Manifests contain a list of "targets" tables, each of which has an
+    "input", a "language" and an "output" field, as well as an
+    optional "options" table:
+
+      [[targets]]
+      input = "todos.cedar"
+      language = "go"
+      output = "backend/src/todos/todos.go"
+      options = { package-name = "todos", server-name = "Todos" }
+
+    Relative paths are resolved against the manifest's directory.
+
+    Raises:
+      BatchError: If the manifest cannot be read or is invalid.
+
+    Returns:
+      list: A list of Targets.
+    """
+    try:
+        if filename.endswith(".json"):
+            import json
+
+            with open(filename) as f:
+                manifest = json.load(f)
+
+        else:
+            try:
+                import tomllib
+            except ImportError:  # pragma: no cover
+                raise BatchError("TOML manifests require Python 3.11 or newer, use a JSON manifest instead")
+
+            with open(filename, "rb") as f:
+                manifest = tomllib.load(f)
+
+    except (OSError, ValueError) as e:
+        raise BatchError("failed to load manifest {!r}: {}".format(filename, e))
+
+    root = os.path.dirname(filename)
+    targets = []
+    for i, target in enumerate(manifest.get("targets", [])):
+        try:
+            options = []
+            for name, value in target.get("options", {}).items():
+                # Flags take booleans and options that can be repeated
+                # take lists of values.
+                if isinstance(value, bool):
+                    options.extend(["--" + name] if value else [])
+                    continue
+
+                for value in value if isinstance(value, list) else [value]:
+                    options.extend(["--" + name, str(value)])
+
+            targets.append(Target(
+                os.path.join(root, target["input"]),
+                target["language"],
+                os.path.join(root, target["output"]),
+                tuple(options),
+            ))
+        except (AttributeError, KeyError, TypeError):
+            raise BatchError("target number {} in manifest {!r} is invalid".format(i + 1, filename))
+
+    return targets
+
+
+def run(targets, *, jobs=None, cache=None):
+    """Generate source code for many targets.  Every input file is
+    parsed once and generation is fanned out over a pool of jobs
+    processes.  Failures are reported on stderr once every target has
+    been processed.
+
+    Parameters:
+      targets(list): The Targets to generate.
+      jobs(int): The number of worker processes to use.  Defaults to
+        the number of CPUs on the machine.
+      cache(Cache): An optional parse cache.
+
+    Returns:
+      int: The exit code.
+    """
+    errors = {}
+    for i, target in enumerate(targets):
+        try:
+            parse_options(target)
+        except BatchError as e:
+            errors[i] = e
+
+    modules = _parse_inputs(targets, errors, cache)
+    pending = [i for i in range(len(targets)) if i not in errors]
+    if len(pending) == 1 or jobs == 1:
+        for i in pending:
+            try:
+                _generate(targets[i], modules[targets[i].filename])
+            except Exception as e:
+                errors[i] = e
+
+    elif pending:
+        errors.update(_generate_in_parallel(targets, pending, modules, jobs))
+
+    _report(targets, errors)
+    return 1 if errors else 0
+
+
+def _parse_inputs(targets, errors, cache):
+    """Parse the input file of every target that hasn't failed yet,
+    recording the targets whose input fails to parse in errors.
+
+    Returns:
+      dict: Maps filenames to Modules.
+    """
+    modules = {}
+    for i, target in enumerate(targets):
+        if i in errors:
+            continue
+
+        if target.filename not in modules:
+            try:
+                with timings.phase("read"), open(target.filename) as f:
+                    source = f.read()
+
+                if cache is not None:
+                    modules[target.filename] = cache.parse(source, filename=target.filename)
+                else:
+                    modules[target.filename] = parse(source, filename=target.filename)
+
+            except (CedarError, OSError) as e:
+                modules[target.filename] = e
+
+        module = modules[target.filename]
+        if isinstance(module, Exception):
+            errors[i] = module
+
+    return modules
+
+
+def _generate_in_parallel(targets, pending, modules, jobs):
+    """Generate the pending targets in a pool of worker processes.
+
+    Returns:
+      dict: Maps the indices of the targets that failed to errors.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    errors = {}
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = [
+            (i, executor.submit(_generate, targets[i], modules[targets[i].filename]))
+            for i in pending
+        ]
+
+        for i, future in futures:
+            error = future.exception()
+            if error is not None:
+                errors[i] = error
+
+    return errors
+
+
+def _report(targets, errors):
+    for i, target in enumerate(targets):
+        error = errors.get(i)
+        if error is None:
+            continue
+
+        sys.stderr.write("Failed to generate {} ({}) from {}:\n".format(
+            target.output, target.language, target.filename
+        ))
+        if isinstance(error, CedarError):
+            error.print_error()
+        else:
+            sys.stderr.write("{}\n".format(error))
+        sys.stderr.write("\n")
+
+    sys.stderr.write("{} of {} targets generated successfully.\n".format(
+        len(targets) - len(errors), len(targets)
+    ))
+
+
+class _ArgumentParser(argparse.ArgumentParser):
+    def error(self, message):
+        raise BatchError(message)
+
+
+def parse_options(target):
+    """Parse a target's command line options.
+
+    Raises:
+      BatchError: If the target's language is unknown or if its
+        options are invalid.
+
+    Returns:
+      tuple: A tuple comprised of the parsed arguments and the
+      language's handler function.
+    """
+    if target.language not in registry:
+        raise BatchError("unknown language {!r} (choose from {})".format(
+            target.language,
+            ", ".join(repr(language) for language in sorted(registry))
+        ))
+
+    parser = _ArgumentParser(prog="cedar generate")
+    subparser, handler = load(target.language).register(parser.add_subparsers())
+    return subparser.parse_args(list(target.options)), handler
+
+
+@contextmanager
+def replace_on_success(filename):
+    """Redirect stdout into a temporary file next to filename and
+    move it into place once the block completes.  If the block raises
+    an exception, the temporary file is removed and any previous
+    contents of filename are left untouched.
+
+    Parameters:
+      filename(str): The path of the file to write.
+    """
+    directory, name = os.path.split(os.path.abspath(filename))
+    try:
+        fd, temporary = tempfile.mkstemp(prefix="." + name + ".", suffix=".tmp", dir=directory)
+    except OSError as e:
+        # Report the output rather than the randomly-named temporary file.
+        raise OSError(e.errno, e.strerror, filename) from None
+
+    try:
+        with os.fdopen(fd, "w") as f, redirect_stdout(f):
+            yield f
+
+        os.chmod(temporary, _file_mode(filename))
+        os.replace(temporary, filename)
+    except BaseException:
+        os.remove(temporary)
+        raise
+
+
+def _file_mode(filename):
+    try:
+        return os.stat(filename).st_mode & 0o7777
+    except FileNotFoundError:
+        # mkstemp creates files that only their owner can read so
+        # new outputs get the mode open() would have given them.
+        umask = os.umask(0)
+        os.umask(umask)
+        return 0o666 & ~umask
+
+
+def _generate(target, module):
+    arguments, handler = parse_options(target)
+    with replace_on_success(target.output):
+        handler(arguments, module)
@@ -0,0 +1,191 @@
+import hashlib
+import marshal
+import os
+import tempfile
+import zlib
+
+from . import __version__, ast
+from . import parse
+
+#: Bumped whenever the on-disk representation of Modules changes.
+FORMAT_VERSION = 3
+
+_magic = b"CDRC"
+_header = _magic + bytes([FORMAT_VERSION, marshal.version])
+_suffix = ".cedarc"
+
+
+class Cache:
+    """An on-disk cache of typechecked Modules.
+
+    Entries are keyed by a hash of the source code they were parsed
+    from, the Cedar version and the serialization format.  Whenever
+    the total size of the cache exceeds max_size bytes, the least
+    recently used entries are evicted.
+
+    Parameters:
+      directory(str): The directory in which entries are stored.  It
+        is created on demand.
+      max_size(int): The maximum size of the cache in bytes.
+    """
+
+    def __init__(self, directory, *, max_size=64 * 1024 * 1024):
+        self.directory = directory
+        self.max_size = max_size
+
+    def parse(self, source, *, filename="[STRING]"):
+        """Parse and typecheck the source into a Cedar Module, reusing
+        a previously cached Module if there is one.
+
+        Raises:
+          ParseError: If a syntax error has been encountered.
+          TypeError: If one or more type errors have been encountered.
+
+        Returns:
+          Module: an AST representing the parsed source.
+        """
+        key = self.key(source)
+        module = self.load(key)
+        if module is None:
+            module = parse(source, filename=filename)
+            self.store(key, module)
+
+        return module._replace(file_name=filename)
+
+    def key(self, source):
+        digest = hashlib.sha256(_header + __version__.encode("utf-8") + b"\0")
+        digest.update(source.encode("utf-8"))
+        return digest.hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, key + _suffix)
+
+    def load(self, key):
+        """Load the Module stored under key.
+
+        Returns:
+          Module: The cached Module or None if there is no valid entry
+          for the given key.
+        """
+        path = self.path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+
+            # Bump the entry's mtime so that it is evicted last.
+            os.utime(path)
+        except OSError:
+            return None
+
+        return _decode(data)
+
+    def store(self, key, module):
+        """Store a Module under key and evict stale entries.
+        """
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(_encode(module))
+
+            os.replace(temp_path, self.path(key))
+        except OSError:
+            return
+
+        self.evict()
+
+    def evict(self):
+        """Remove the least recently used entries until the cache fits
+        in max_size bytes.
+        """
+        try:
+            filenames = os.listdir(self.directory)
+        except OSError:
+            # The directory may have been removed by someone else.
+            return
+
+        entries, total_size = [], 0
+        for filename in filenames:
+            if not filename.endswith(_suffix):
+                continue
+
+            path = os.path.join(self.directory, filename)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total_size += stat.st_size
+
+        entries.sort()
+        for _, size, path in entries:
+            if total_size <= self.max_size:
+                break
+
+            try:
+                os.remove(path)
+                total_size -= size
+            except OSError:
+                pass
+
+
+_nodes = [
+    ast.Module, ast.Enum, ast.Tag, ast.Record, ast.Attribute, ast.Function,
+    ast.Parameter, ast.Type, ast.List, ast.Dict, ast.Union, ast.Nullable,
+]
+_codes = {node: code for code, node in enumerate(_nodes)}
+
+
+def _encode(module):
+    return _header + zlib.compress(marshal.dumps(_encode_value(module, {})), 1)
+
+
+def _encode_value(value, memo):
+    # Nodes are encoded as (code, [start, length,] *fields) tuples and
+    # sequences of nodes as lists.  Equal values are encoded as the
+    # same object so that marshal writes every distinct name and type
+    # expression only once.
+    if isinstance(value, tuple):
+        return [_encode_value(item, memo) for item in value]
+
+    elif isinstance(value, ast.Node):
+        fields = tuple(_encode_value(item, memo) for item in value._values(value))
+        if isinstance(value, ast.Spanned):
+            return (_codes[type(value)], value.start, value.length) + fields
+
+        value = (_codes[type(value)],) + fields
+
+    return memo.setdefault(value, value)
+
+
+def _decode(data):
+    if not data.startswith(_header):
+        return None
+
+    try:
+        module = _decode_value(marshal.loads(zlib.decompress(data[len(_header):])), {})
+    except (EOFError, IndexError, TypeError, ValueError, zlib.error):
+        return None
+
+    # Well-formed payloads that don't hold a Module are misses too.
+    return module if isinstance(module, ast.Module) else None
+
+
+def _decode_value(value, memo):
+    if isinstance(value, list):
+        return [_decode_value(item, memo) for item in value]
+
+    elif isinstance(value, tuple):
+        node = memo.get(id(value))
+        if node is None:
+            cls = _nodes[value[0]]
+            if issubclass(cls, ast.Spanned):
+                fields = (_decode_value(item, memo) for item in value[3:])
+                node = cls(*fields, start=value[1], length=value[2])
+            else:
+                node = memo[id(value)] = cls(*(_decode_value(item, memo) for item in value[1:]))
+
+        return node
+
+    return value
@@ -1,16 +1,10 @@
 import argparse
 import functools
+import os
 import sys
 
-from . import CedarError, parse, __version__
-from .languages import cedar, elm, go
-
-
-_languages = {
-    "cedar": cedar.register,
-    "elm": elm.register,
-    "go": go.register,
-}
+from . import CedarError, batch, parse, timings, __version__
+from .languages import load, registry
 
 
 def main():
@@ -21,44 +15,253 @@ def main():
         title="commands",
         description="available Cedar commands")
 
+    argv = sys.argv[1:]
+    add_generate_command(commands, argv)
+    add_watch_command(commands)
+    add_serve_command(commands)
+
+    arguments = parser.parse_args(argv)
+    if "handle" in arguments:
+        return run_handler(arguments)
+
+    parser.print_usage()
+    return 0
+
+
+def add_generate_command(commands, argv):
+    """Register the "generate" command and its language subcommands.
+
+    Parameters:
+      commands(argparse._SubParsersAction): -
+      argv(list): The command line arguments, used to find the one
+        language whose module needs to be imported.
+    """
     generate = commands.add_parser(
         "generate",
         help="generate source code from a Cedar input file")
+    generate.add_argument(
+        "--manifest",
+        help="generate every target listed in a TOML or JSON manifest file"
+    )
+    generate.add_argument(
+        "--target",
+        dest="targets", action="append", default=[], metavar="FILENAME:LANGUAGE:OUTPUT[:OPTIONS]",
+        help="generate OUTPUT from FILENAME, can be passed multiple times"
+    )
+    generate.add_argument(
+        "--jobs", type=int,
+        help="the number of processes to generate targets with (default: the number of CPUs)"
+    )
+    add_cache_arguments(generate)
+    add_instrumentation_arguments(generate)
     languages = generate.add_subparsers(
         title="languages",
         description="languages Cedar can generate source code for")
 
-    def handle_generate(_):
-        return generate.error("choose a language (choose from {})".format(
-            ", ".join(repr(language) for language in sorted_languages)
-        ))
-
-    def decorate_language(handler):
-        @functools.wraps(handler)
-        def wrapper(arguments):
-            with open(arguments.filename) as f:
-                try:
-                    module = parse(f.read(), filename=arguments.filename)
-                    return handler(arguments, module)
-                except CedarError as e:
-                    return e.print_and_halt()
-        return wrapper
+    def handle_generate(arguments):
+        if arguments.manifest is None and not arguments.targets:
+            return generate.error("choose a language (choose from {})".format(
+                ", ".join(repr(language) for language in sorted_languages)
+            ))
+
+        try:
+            targets = [batch.parse_target(target) for target in arguments.targets]
+            if arguments.manifest is not None:
+                targets.extend(batch.load_manifest(arguments.manifest))
+        except batch.BatchError as e:
+            return generate.error(str(e))
+
+        # Timings are only collected in this process so workers are
+        # not used when they're requested.
+        jobs = 1 if arguments.timings else arguments.jobs
+        return batch.run(targets, jobs=jobs, cache=make_cache(arguments))
 
     generate.set_defaults(handle=handle_generate)
 
-    sorted_languages = sorted(_languages.keys())
+    # Only the module of the language that's being generated is
+    # imported.  Every other language gets a placeholder parser so that
+    # it still shows up in the usage string.
+    selected = find_language(argv)
+    sorted_languages = sorted(registry.keys())
     for language in sorted_languages:
-        register = _languages[language]
-        subparser, handler = register(languages)
+        if language != selected:
+            languages.add_parser(language)
+            continue
+
+        subparser, handler = load(language).register(languages)
         subparser.add_argument("filename", help="the Cedar file to generate source code from")
+        add_cache_arguments(subparser, default=argparse.SUPPRESS)
+        add_instrumentation_arguments(subparser, default=argparse.SUPPRESS)
         subparser.set_defaults(handle=decorate_language(handler))
 
-    arguments = parser.parse_args()
-    if "handle" in arguments:
-        return arguments.handle(arguments)
 
-    parser.print_usage()
-    return 0
+def add_watch_command(commands):
+    """Register the "watch" command.
+    """
+    watch = commands.add_parser(
+        "watch",
+        help="regenerate targets whenever their Cedar input files change")
+    watch.add_argument(
+        "--manifest",
+        help="watch every target listed in a TOML or JSON manifest file"
+    )
+    watch.add_argument(
+        "--target",
+        dest="targets", action="append", default=[], metavar="FILENAME:LANGUAGE:OUTPUT[:OPTIONS]",
+        help="keep OUTPUT up to date with FILENAME, can be passed multiple times"
+    )
+    watch.add_argument(
+        "--interval",
+        default=0.5, type=float,
+        help="the number of seconds to wait between checks for changes (default: 0.5)"
+    )
+    add_cache_arguments(watch)
+
+    def handle_watch(arguments):
+        if arguments.manifest is None and not arguments.targets:
+            return watch.error("at least one of --manifest or --target is required")
+
+        try:
+            targets = [batch.parse_target(target) for target in arguments.targets]
+            if arguments.manifest is not None:
+                targets.extend(batch.load_manifest(arguments.manifest))
+
+            from .watch import Watcher
+
+            watcher = Watcher(targets, cache=make_cache(arguments))
+        except batch.BatchError as e:
+            return watch.error(str(e))
+
+        return watcher.run(interval=arguments.interval)
+
+    watch.set_defaults(handle=handle_watch)
+
+
+def add_serve_command(commands):
+    """Register the "serve" command.
+    """
+    serve = commands.add_parser(
+        "serve",
+        help="run a compile server that speaks line-delimited JSON-RPC")
+    serve.add_argument(
+        "--stdio",
+        action="store_true",
+        help="read requests from stdin and write responses to stdout"
+    )
+
+    def handle_serve(arguments):
+        if not arguments.stdio:
+            return serve.error("--stdio is currently the only supported transport")
+
+        from .server import serve_stdio
+
+        return serve_stdio()
+
+    serve.set_defaults(handle=handle_serve)
+
+
+def decorate_language(handler):
+    """Wrap a language's handler so that it's called with the Module
+    parsed from the file named on the command line.
+    """
+    @functools.wraps(handler)
+    def wrapper(arguments):
+        with timings.phase("read"), open(arguments.filename) as f:
+            source = f.read()
+
+        try:
+            cache = make_cache(arguments)
+            if cache is not None:
+                module = cache.parse(source, filename=arguments.filename)
+            else:
+                module = parse(source, filename=arguments.filename)
+
+            return handler(arguments, module)
+        except CedarError as e:
+            return e.print_and_halt()
+        except ValueError as e:
+            # Raised by generators whose options don't fit the module.
+            sys.stderr.write("error: {}\n".format(e))
+            return 1
+    return wrapper
+
+
+def run_handler(arguments):
+    """Run the handler of the command that was invoked, collecting
+    timings and a profile of the run if they were requested.
+    """
+    profiler = None
+    if getattr(arguments, "profile", None):
+        import cProfile
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+    try:
+        if not getattr(arguments, "timings", False):
+            return arguments.handle(arguments)
+
+        with timings.collect() as collected:
+            try:
+                return arguments.handle(arguments)
+            finally:
+                collected.report(sys.stderr)
+
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(arguments.profile)
+
+
+def find_language(argv):
+    """Find the language a "generate" command was invoked with.
+
+    Returns:
+      str: The name of the language or None.
+    """
+    if "generate" not in argv:
+        return None
+
+    for argument in argv[argv.index("generate") + 1:]:
+        if argument in registry:
+            return argument
+
+    return None
+
+
+def add_cache_arguments(parser, default=None):
+    parser.add_argument(
+        "--cache-dir",
+        default=default or os.environ.get("CEDAR_CACHE_DIR"),
+        help="a directory in which to cache parsed Cedar files (default: $CEDAR_CACHE_DIR)"
+    )
+    parser.add_argument(
+        "--cache-size",
+        default=default or 64, type=int,
+        help="the maximum size of the cache directory in megabytes (default: 64)"
+    )
+
+
+def add_instrumentation_arguments(parser, default=None):
+    parser.add_argument(
+        "--timings",
+        action="store_true", default=default or False,
+        help="print the time and peak memory spent in every phase to stderr"
+    )
+    parser.add_argument(
+        "--profile",
+        default=default, metavar="FILENAME",
+        help="write a cProfile profile of the whole run to FILENAME"
+    )
+
+
+def make_cache(arguments):
+    if not arguments.cache_dir:
+        return None
+
+    from .cache import Cache
+
+    return Cache(arguments.cache_dir, max_size=arguments.cache_size * 1024 * 1024)
 
 
 if __name__ == "__main__":  # pragma: no cover
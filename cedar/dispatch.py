@@ -0,0 +1,102 @@
+import sys
+
+
+def dispatch(*types):
+    """Define one implementation of a function that dispatches on the
+    type of its first argument (the first one after self, for
+    methods).  Implementations are collected under their name, in the
+    namespace they are defined in, so they can be spread across a
+    module or a class body just like with multipledispatch.
+
+    Parameters:
+      types(type or tuple): The types this implementation handles.
+        Subclasses of these types are handled too, unless they have
+        an implementation of their own.
+
+    Returns:
+      function: A decorator.
+    """
+    def register(function):
+        namespace = sys._getframe(1).f_locals
+        dispatcher = getattr(namespace.get(function.__name__), "dispatcher", None)
+        if dispatcher is None:
+            # Class bodies always define __qualname__, modules don't.
+            dispatcher = Dispatcher(function.__name__, method="__qualname__" in namespace)
+
+        for tipe in types:
+            dispatcher.register(tipe, function)
+
+        return dispatcher.function
+
+    return register
+
+
+class Dispatcher:
+    """The registry behind a function that picks an implementation
+    based on the type of its first argument.  Implementations are
+    looked up along the type's MRO once, after which they're cached.
+
+    The function itself is a plain Python function so that it binds
+    to instances as cheaply as any other method.
+
+    Parameters:
+      name(str): -
+      method(bool): Whether the function is a method, in which case
+        it dispatches on the argument that follows self.
+
+    Attributes:
+      function(function): The dispatching function.
+    """
+
+    def __init__(self, name, *, method=False):
+        self.name = name
+        self.registry = {}
+        self.cache = cache = {}
+        resolve = self.resolve
+
+        if method:
+            def function(self, value, *args):
+                try:
+                    implementation = cache[type(value)]
+                except KeyError:
+                    implementation = resolve(type(value))
+
+                return implementation(self, value, *args)
+        else:
+            def function(value, *args):
+                try:
+                    implementation = cache[type(value)]
+                except KeyError:
+                    implementation = resolve(type(value))
+
+                return implementation(value, *args)
+
+        function.__name__ = function.__qualname__ = name
+        function.dispatcher = self
+        self.function = function
+
+    def register(self, types, implementation):
+        if not isinstance(types, tuple):
+            types = (types,)
+
+        for tipe in types:
+            self.registry[tipe] = implementation
+
+        self.cache.clear()
+
+    def resolve(self, tipe):
+        """Find the implementation for a type.
+
+        Raises:
+          NotImplementedError: If there isn't one.
+
+        Returns:
+          function: -
+        """
+        for cls in tipe.__mro__:
+            implementation = self.registry.get(cls)
+            if implementation is not None:
+                self.cache[tipe] = implementation
+                return implementation
+
+        raise NotImplementedError("{}() has no implementation for {}".format(self.name, tipe.__name__))
@@ -1,14 +1,78 @@
 import math
 import sys
 
+from bisect import bisect_right
+
+
+class LineIndex:
+    """The offsets at which every line of a source string starts.  The
+    offsets are computed the first time they're needed and a single
+    index can be shared by every error found in that source.
+
+    Parameters:
+      source(str): -
+    """
+
+    __slots__ = ["source", "_starts"]
+
+    def __init__(self, source):
+        self.source = source
+        self._starts = None
+
+    def __reduce__(self):
+        return LineIndex, (self.source,)
+
+    @property
+    def starts(self):
+        if self._starts is None:
+            starts, find = [0], self.source.find
+            index = find("\n")
+            while index != -1:
+                starts.append(index + 1)
+                index = find("\n", index + 1)
+
+            self._starts = starts
+
+        return self._starts
+
+    def position(self, offset):
+        """Find the line and column of an offset into the source.
+
+        Returns:
+          tuple: A (line, column) pair.  Lines start at 1 and columns
+          start at 0, like those of tokens.
+        """
+        line = bisect_right(self.starts, offset)
+        return line, offset - self.starts[line - 1]
+
+    def lines(self, start, end):
+        """Slice lines out of the source.  Equivalent to, but cheaper
+        than, source.split("\n")[start:end].
+
+        Returns:
+          str list: -
+        """
+        starts, source = self.starts, self.source
+        lines = []
+        for i in range(max(0, start), min(end, len(starts))):
+            if i + 1 < len(starts):
+                lines.append(source[starts[i]:starts[i + 1] - 1])
+            else:
+                lines.append(source[starts[i]:])
+
+        return lines
+
 
 class CedarError(Exception):
-    """Base class for Cedar exceptions.
+    """Base class for Cedar exceptions.  Errors may be constructed
+    with a LineIndex in place of file_contents so that every error
+    found in a source shares the same index.
 
     Attributes:
       message(str): A description of the error that occurred.
       file_name(str): The name of the file in which the error occurred.
       file_contents(str): The input string that failed to parse.
+      line_index(LineIndex): The index of the lines in file_contents.
       line(int): The line at which the error occurred.
       column(int): The column at which the error occurred.
     """
@@ -18,14 +82,22 @@ class CedarError(Exception):
     def __init__(self, message, file_name, file_contents, line, column):
         self.message = message
         self.file_name = file_name
-        self.file_contents = file_contents
+        if isinstance(file_contents, LineIndex):
+            self.line_index = file_contents
+        else:
+            self.line_index = LineIndex(file_contents)
+
         self.line = line
         self.column = column
 
+    @property
+    def file_contents(self):
+        return self.line_index.source
+
     def print_error(self):
         return _print_error(
             self.error_type, self.message,
-            self.file_name, self.file_contents,
+            self.file_name, self.line_index,
             self.line, self.column
         )
 
@@ -43,6 +115,29 @@ class ParseError(CedarError):
     error_type = "Parse error"
 
 
+class ParseErrors(ParseError):
+    """A collection of ParseErrors.  Raised when one or more syntax
+    errors are found in a Module.  Its message and position are those
+    of the first error so that it can be handled like any other
+    ParseError.
+
+    Parameters:
+      errors(ParseError list): -
+    """
+
+    def __init__(self, errors):
+        first = errors[0]
+        super().__init__(first.message, first.file_name, first.line_index, first.line, first.column)
+        self.errors = errors
+
+    def print_error(self):
+        for i, error in enumerate(self.errors):
+            if i != 0:
+                sys.stderr.write("\n\n")
+
+            error.print_error()
+
+
 class TypeError(CedarError):
     """Instantiated for individual type errors.  Never raised.
     """
@@ -61,23 +156,25 @@ class TypeErrors(CedarError):
     def __init__(self, errors):
         self.errors = errors
 
-    def print_and_halt(self):
-        """Pretty-print all the type errors in the current instance
-        and halt program execution.
-        """
+    def print_error(self):
         for i, error in enumerate(self.errors):
             if i != 0:
                 sys.stderr.write("\n\n")
 
             error.print_error()
 
+    def print_and_halt(self):
+        """Pretty-print all the type errors in the current instance
+        and halt program execution.
+        """
+        self.print_error()
         sys.exit(1)
 
 
-def _print_error(tipe, message, file_name, file_contents, line, column):
+def _print_error(tipe, message, file_name, line_index, line, column):
     padding = int(math.log(line, 10) + 1)
     start = max(0, line - 5)
-    lines = file_contents.split("\n")[start:line]
+    lines = line_index.lines(start, line)
 
     def format_line(index, content):
         return "{index:>{padding}}| {content}".format(
@@ -0,0 +1,86 @@
+import copy
+
+from collections import defaultdict
+
+
+class Fragments:
+    """A cache of the state that individual declarations contribute to
+    a code generator.  Generators that are handed a Fragments instance
+    only generate code for the declarations that have changed since
+    the instance was last used.
+
+    Attributes:
+      hits(int): The number of declarations that were reused.
+      misses(int): The number of declarations that were generated.
+    """
+
+    def __init__(self):
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, decl, context=None):
+        entry = self.entries.get(_key(decl))
+        if entry is not None and entry[0] == decl and entry[1] == context:
+            self.hits += 1
+            return entry[2]
+
+        self.misses += 1
+        return None
+
+    def put(self, decl, state, context=None):
+        self.entries[_key(decl)] = (decl, context, state)
+
+    def retain(self, declarations):
+        """Drop the fragments of every declaration that isn't in the
+        given list.
+        """
+        keys = set(_key(decl) for decl in declarations)
+        for key in list(self.entries):
+            if key not in keys:
+                del self.entries[key]
+
+
+def generate_fragment(generator, decl):
+    """Run generator.generate_decl(decl), reusing the state generated
+    for an equal declaration if generator.fragments holds any.
+
+    Generators must list every attribute that generate_decl updates
+    in their fragment_state attribute.  Lists are extended, while
+    sets and dicts are updated when fragments are merged back into
+    the generator.  Generators whose output for a declaration depends
+    on more than the declaration itself can define a fragment_context
+    method that returns that extra information for a declaration.
+    Fragments are only reused if their contexts are equal.
+    """
+    fragments = generator.fragments
+    if fragments is None:
+        return generator.generate_decl(decl)
+
+    fragment_context = getattr(generator, "fragment_context", None)
+    context = fragment_context(decl) if fragment_context is not None else None
+    state = fragments.get(decl, context)
+    if state is None:
+        scratch = copy.copy(generator)
+        for name in generator.fragment_state:
+            setattr(scratch, name, _empty(getattr(generator, name)))
+
+        scratch.generate_decl(decl)
+        state = [(name, getattr(scratch, name)) for name in generator.fragment_state]
+        fragments.put(decl, state, context)
+
+    for name, value in state:
+        if isinstance(value, list):
+            getattr(generator, name).extend(value)
+        else:
+            getattr(generator, name).update(value)
+
+
+def _empty(value):
+    if isinstance(value, defaultdict):
+        return defaultdict(value.default_factory)
+    return type(value)()
+
+
+def _key(decl):
+    return type(decl).__name__, decl.name
@@ -0,0 +1,339 @@
+from bisect import bisect_left, bisect_right
+
+from . import ast, timings
+from .errors import LineIndex, ParseErrors, TypeError, TypeErrors
+from .parser import _Parser, _declare_type, _check_node
+from .typechecker import Typechecker
+
+
+class IncrementalParser:
+    """Keeps a Module in sync with a source string as it is edited.
+
+    Every edit only reparses the declarations whose spans overlap it,
+    along with one declaration on either side of them for context.
+    The other declarations are reused as-is.  Type checks are redone
+    for the reparsed declarations and for the declarations that
+    declare or refer to any of the names those declarations declared
+    before or after the edit, which are looked up in an index.
+
+    Both parse and edit raise the same errors parsing the whole
+    source would.  After a syntax error the next edit reparses the
+    whole source.  After type errors, the Module is still available
+    as the module attribute.
+
+    Parameters:
+      filename(str): The name of the file being edited.
+
+    Attributes:
+      source(str): The current source.
+      module(Module): The Module parsed from the current source or
+        None if the source has syntax errors.
+    """
+
+    def __init__(self, *, filename="[STRING]"):
+        self.filename = filename
+        self.source = ""
+        self.module = None
+        self._reset()
+
+    def parse(self, source):
+        """Parse a new source from scratch.
+
+        Raises:
+          ParseErrors: If the source has syntax errors.
+          TypeErrors: If the source has type errors.
+
+        Returns:
+          Module: -
+        """
+        self.source = source
+        self.module = None
+        self._reset()
+
+        parser = _Parser(self.filename, source, False)
+        with timings.phase("parse"):
+            declarations = parser.parse_module().declarations
+
+        return self._splice(0, 0, declarations, parser, 0, 0)
+
+    def edit(self, offset, removed, inserted):
+        """Apply an edit to the source and update the Module.
+
+        Parameters:
+          offset(int): The offset at which the edit starts.
+          removed(int): The number of characters the edit removes.
+          inserted(str): The text the edit inserts in their place.
+
+        Raises:
+          ParseErrors: If the edited source has syntax errors.
+          TypeErrors: If the edited source has type errors.
+
+        Returns:
+          Module: -
+        """
+        old_source = self.source
+        if not 0 <= offset <= offset + removed <= len(old_source):
+            raise ValueError("edit out of range")
+
+        source = self.source = old_source[:offset] + inserted + old_source[offset + removed:]
+        if self.module is None:
+            return self.parse(source)
+
+        # Reparse the declarations that overlap (or touch) the edit,
+        # and one more on each side of them so that they are parsed
+        # in the same context they'd be parsed in by a full reparse.
+        delta = len(inserted) - removed
+        starts, ends = self.starts, self.ends
+        lo = max(bisect_left(ends, offset) - 1, 0)
+        hi = min(bisect_right(starts, offset + removed) + 1, len(starts))
+        region_start = ends[lo - 1] if lo > 0 else 0
+        region_end = (starts[hi] if hi < len(starts) else len(old_source)) + delta
+
+        parser = _Parser(self.filename, source[region_start:region_end], False)
+        try:
+            with timings.phase("parse"):
+                declarations = parser.parse_module().declarations
+        except ParseErrors:
+            # Reparse the whole thing so the errors point to the right
+            # places and every one of them is reported.
+            return self.parse(source)
+
+        return self._splice(lo, hi, declarations, parser, region_start, delta)
+
+    def _reset(self):
+        self.declarations = []
+        self.starts = []
+        self.ends = []
+
+        #: Maps the id of each declaration to the checks it requires,
+        #: as (check, value, offset) triples where offset is relative
+        #: to the start of the declaration.
+        self.checks = {}
+
+        #: Maps the id of each declaration that has type errors to
+        #: (message, offset) pairs.
+        self.problems = {}
+
+        #: Map names to the declarations that declare or refer to
+        #: them, keyed by their ids.
+        self.types = {}
+        self.functions = {}
+        self.references = {}
+
+    def _splice(self, lo, hi, declarations, parser, region_start, delta):
+        old_declarations = self.declarations
+        removed = old_declarations[lo:hi]
+        names = set()
+        for declaration in removed:
+            names.update(self._unindex(declaration))
+
+        starts, ends = _spans(declarations, region_start)
+        checks = _split_checks(parser, region_start, starts)
+        for declaration, declaration_checks in zip(declarations, checks):
+            names.update(self._index(declaration, declaration_checks))
+
+        recheck = {id(declaration): declaration for declaration in declarations}
+        following = old_declarations[hi:]
+        if following:
+            end = ends[-1] if ends else region_start
+            first = self._reanchor(following[0], self.starts[hi] + delta - end)
+            if first is not following[0]:
+                following[0] = recheck[id(first)] = first
+
+        self.declarations = old_declarations[:lo] + list(declarations) + following
+        self.starts = self.starts[:lo] + starts + [start + delta for start in self.starts[hi:]]
+        self.ends = self.ends[:lo] + ends + [end + delta for end in self.ends[hi:]]
+
+        # Recheck the new declarations as well as any declaration that
+        # declares or refers to a name that was declared before or
+        # after the edit.
+        for name in names:
+            for index in (self.types, self.functions, self.references):
+                recheck.update(index.get(name, ()))
+
+        positions = _Positions(self.declarations)
+        checker = _Checker(self.types, self.functions, positions)
+        with timings.phase("typecheck"):
+            for key in recheck:
+                problems = checker.check(key, self.checks[key])
+                if problems:
+                    self.problems[key] = problems
+                else:
+                    self.problems.pop(key, None)
+
+        self.module = ast.Module(self.filename, self.declarations)
+        if self.problems:
+            raise TypeErrors(self._type_errors(positions))
+
+        return self.module
+
+    def _reanchor(self, declaration, gap):
+        """Move the start of the declaration that follows the edited
+        region.  It keeps its absolute position, but the region may now
+        end somewhere else so the gap before it may have changed.
+
+        Returns:
+          Node: The declaration, replaced if its gap changed.
+        """
+        if gap == declaration.start:
+            return declaration
+
+        checks = self.checks[id(declaration)]
+        self._unindex(declaration)
+        declaration = declaration._replace(start=gap)
+        self._index(declaration, checks)
+        return declaration
+
+    def _index(self, declaration, checks):
+        key = id(declaration)
+        self.checks[key] = checks
+        names = []
+        for check, value, _ in checks:
+            if check is _check_node:
+                if isinstance(value, ast.Type):
+                    self.references.setdefault(value.name, {})[key] = declaration
+
+            else:
+                index = self.types if check is _declare_type else self.functions
+                index.setdefault(value, {})[key] = declaration
+                names.append(value)
+
+        return names
+
+    def _unindex(self, declaration):
+        key = id(declaration)
+        self.problems.pop(key, None)
+        names = []
+        for check, value, _ in self.checks.pop(key):
+            if check is _check_node:
+                if isinstance(value, ast.Type):
+                    _discard(self.references, value.name, key)
+
+            else:
+                _discard(self.types if check is _declare_type else self.functions, value, key)
+                names.append(value)
+
+        return names
+
+    def _type_errors(self, positions):
+        line_index = LineIndex(self.source)
+        errors = []
+        for key in sorted(self.problems, key=positions.__getitem__):
+            start = self.starts[positions[key]]
+            for message, offset in self.problems[key]:
+                line, column = line_index.position(start + offset)
+                errors.append(TypeError(message, self.filename, line_index, line, column))
+
+        return errors
+
+
+def _spans(declarations, region_start):
+    """Find where freshly parsed declarations start and end in the
+    source.  Their starts are relative to the end of the declaration
+    before them.
+
+    Returns:
+      tuple: A pair of lists of offsets.
+    """
+    starts, ends, end = [], [], region_start
+    for declaration in declarations:
+        start = end + declaration.start
+        end = start + declaration.length
+        starts.append(start)
+        ends.append(end)
+
+    return starts, ends
+
+
+def _split_checks(parser, region_start, starts):
+    """Assign the checks a parser collected to the declarations they
+    were collected in, with offsets relative to those declarations'
+    starts.
+
+    Returns:
+      list: A list of checks per declaration.
+    """
+    checks = [[] for _ in starts]
+    current = 0
+    for check, value, index in parser.checks:
+        offset = region_start + parser.starts[index]
+        while current + 1 < len(starts) and offset >= starts[current + 1]:
+            current += 1
+
+        checks[current].append((check, value, offset - starts[current]))
+
+    return checks
+
+
+def _discard(index, name, key):
+    declarations = index.get(name)
+    if declarations is None:
+        return
+
+    declarations.pop(key, None)
+    if not declarations:
+        del index[name]
+
+
+class _Positions(dict):
+    """Maps the ids of declarations to their positions in the Module.
+    Built the first time it's needed.
+    """
+
+    def __init__(self, declarations):
+        self.declarations = declarations
+
+    def __missing__(self, key):
+        self.update((id(declaration), i) for i, declaration in enumerate(self.declarations))
+        return self[key]
+
+
+class _Scope:
+    """The names a declaration can't redeclare: the builtins, the
+    names declared before it and, once it has declared it, its own
+    name.
+    """
+
+    __slots__ = ["names", "declarations", "position", "positions"]
+
+    def __init__(self, names, declarations, position, positions):
+        self.names = set(names)
+        self.declarations = declarations
+        self.position = position
+        self.positions = positions
+
+    def __contains__(self, name):
+        if name in self.names:
+            return True
+
+        return any(self.positions[key] < self.position for key in self.declarations.get(name, ()))
+
+    def add(self, name):
+        self.names.add(name)
+
+
+class _Checker(Typechecker):
+    """Runs the checks of one declaration at a time against the index
+    of an IncrementalParser.  Errors are recorded as (message, offset)
+    pairs.
+    """
+
+    def __init__(self, types, functions, positions):
+        super().__init__()
+        self.types = types
+        self.functions = functions
+        self.positions = positions
+        self.declared_types = types
+
+    def check(self, key, checks):
+        position = self.positions[key]
+        self.known_types = _Scope(self.builtin_types, self.types, position, self.positions)
+        self.known_fns = _Scope((), self.functions, position, self.positions)
+        self.type_errors = []
+        for check, value, offset in checks:
+            check(self, value, offset)
+
+        return self.type_errors
+
+    def signal_type_error(self, message, offset):
+        self.type_errors.append((message, offset))
@@ -0,0 +1,25 @@
+import importlib
+
+#: Maps the name of every language Cedar can generate source code for
+#: to the module that implements its "generate" subcommand.  Modules
+#: are only imported once they're needed, see load.
+registry = {
+    "cedar": "cedar.languages.cedar",
+    "elm": "cedar.languages.elm",
+    "go": "cedar.languages.go",
+}
+
+
+def load(language):
+    """Import the module that implements a language.
+
+    Parameters:
+      language(str): The name of a language in the registry.
+
+    Raises:
+      KeyError: If the language is not in the registry.
+
+    Returns:
+      module: A module with a register function.
+    """
+    return importlib.import_module(registry[language])
@@ -1,21 +1,22 @@
-from multipledispatch import dispatch
-
-from .. import ast
+from .. import ast, timings
+from ..dispatch import dispatch
 from ..pretty import IndentConfig, pretty_print, blank, block, concat, line, text
 
 
-def handle(arguments, module):
+def handle(arguments, module, *, fragments=None):
     """Handle a CLI call to the "generate cedar" command.
 
     Parameters:
       arguments(argparse.Namespace): Arguments to this subcommand as
         specified by the register function.
       module(Module): The Cedar Module to generate source code from.
+      fragments(Fragments): An optional cache of the code generated
+        for each declaration.
 
     Returns:
       int: The command's exit code.
     """
-    print(format_module(module).strip())
+    print(format_module(module, fragments=fragments).strip())
     return 0
 
 
@@ -35,9 +36,25 @@ def register(parent):
     return parser, handle
 
 
-def format_module(module):
+def format_module(module, *, fragments=None):
     assert isinstance(module, ast.Module)
-    return pretty_print(_format(module), IndentConfig(0, 2, " "))
+    with timings.phase("generate"):
+        if fragments is None:
+            doc = _format(module)
+        else:
+            doc = concat(*(_format_fragment(decl, fragments) for decl in module.declarations))
+
+    with timings.phase("render"):
+        return pretty_print(doc, IndentConfig(0, 2, " "))
+
+
+def _format_fragment(decl, fragments):
+    doc = fragments.get(decl)
+    if doc is None:
+        doc = _format(decl)
+        fragments.put(decl, doc)
+
+    return doc
 
 
 @dispatch(ast.Module)
@@ -110,4 +127,4 @@ def _format(node):
 
 @dispatch(ast.Dict)
 def _format(node):
-    return text("{String: ") + _format(node.type) + text("}")
+    return text("{String: ") + _format(node.values_type) + text("}")
@@ -1,26 +1,37 @@
+import sys
+
 from collections import defaultdict
 from itertools import chain
-from multipledispatch import dispatch
 
-from .. import ast, pretty
-from ..pretty import IndentConfig, blank, concat, text, line, pretty_print
+from .. import ast, pretty, semantics, timings
+from ..dispatch import dispatch
+from ..fragments import generate_fragment
+from ..pretty import IndentConfig, blank, concat, group, line, nest, pretty_print, pretty_print_to, softline, text
 
 
-def handle(arguments, module):
+def handle(arguments, module, *, fragments=None):
     """Handle a CLI call to the "generate elm" command.
 
     Parameters:
       arguments(argparse.Namespace): Arguments to this subcommand as
         specified by the register function.
       module(Module): The Cedar Module to generate source code from.
+      fragments(Fragments): An optional cache of the code generated
+        for each declaration.
 
     Returns:
       int: The command's exit code.
     """
-    print(generate(
+    generate(
         module,
         module_name=arguments.module_name,
-    ))
+        prune=arguments.prune,
+        share=arguments.share,
+        streaming=arguments.streaming,
+        fragments=fragments,
+        stream=sys.stdout
+    )
+    sys.stdout.write("\n")
     return 0
 
 
@@ -42,10 +53,31 @@ def register(parent):
         default="Api.Client",
         help="the generated source file's fully-qualified module"
     )
+    parser.add_argument(
+        "--no-prune",
+        dest="prune",
+        action="store_false",
+        help="generate encoders and decoders for every type, even those no function uses"
+    )
+    parser.add_argument(
+        "--inline-codecs",
+        dest="share",
+        action="store_false",
+        help="expand the codecs of list, dict and nullable types at every use site"
+    )
+    parser.add_argument(
+        "--stream",
+        dest="streaming",
+        action="append",
+        default=[],
+        metavar="FN",
+        help="read a function's result as newline-delimited JSON, to match a Go server generated with --stream"
+    )
     return parser, handle
 
 
-def generate(module, *, module_name="Api.Client"):
+def generate(module, *, module_name="Api.Client", prune=True, share=True, streaming=(), fragments=None,
+             stream=None):
     """Generate an Elm source file containing the Client for a given
     Cedar Module.
 
@@ -53,43 +85,156 @@ def generate(module, *, module_name="Api.Client"):
       module(ast.Module): The module to generate source code from.
       module_name(str): The generated source file's fully-qualified
         module name.
+      prune(bool): When true, encoders are only generated for the
+        types functions take as parameters and decoders for the types
+        they return, along with the types those refer to.  Helpers
+        and imports nothing uses are left out as well.
+      share(bool): When true, list, dict and nullable types that
+        appear more than once in the module get a single named
+        encoder and decoder instead of being expanded at every use.
+      streaming(iterable): The names of list-returning functions
+        whose results the server streams as newline-delimited JSON.
+      fragments(Fragments): If provided, code is only generated for
+        the declarations that changed since the last time these
+        fragments were used.
+      stream(file): If provided, the generated source code is written
+        to this file-like object instead of being returned.
+
+    Raises:
+      ValueError: If one of the streaming functions doesn't exist or
+        doesn't return a list.
 
     Returns:
-      str: A string representing the generated Go source code.
+      str: A string representing the generated Elm source code or
+      None if a stream was provided.
     """
     assert isinstance(module, ast.Module)
 
     config = IndentConfig(0, 4, " ")
-    source = _Generator(
-        module_name,
-        module
-    ).generate()
+    with timings.phase("generate"):
+        source = _Generator(
+            module_name,
+            module,
+            fragments,
+            prune,
+            share,
+            streaming
+        ).generate()
 
-    return pretty_print(source, config)
+    with timings.phase("render"):
+        if stream is None:
+            return pretty_print(source, config)
+
+        pretty_print_to(source, config, stream)
 
 
 def block(children):
     return pretty.block(children, tokens=None)
 
 
+_date = ("Date", None, ("Date",))
+_dict = ("Dict", None, ("Dict",))
+_http_builder = ("HttpBuilder", "HB", None)
+_json_decode = ("Json.Decode", "JD", ("Decoder", "(:=)"))
+_json_decode_extra = ("Json.Decode.Extra", None, ("(|:)", "date"))
+_json_encode = ("Json.Encode", "JE", None)
+_task = ("Task", None, ("Task",))
+_time = ("Time", None, ("Time",))
+
+#: The imports each helper function depends on.
+_helpers = {
+    "decodeDate___": [_date, _json_decode],
+    "encodeDate___": [_date, _json_encode],
+    "encodeDict___": [_dict, _json_encode],
+    "encodeMaybe___": [_json_encode],
+    "batch___": [_json_decode, _json_encode, _task],
+    "ndjsonReader___": [_http_builder, _json_decode],
+}
+
+
+def _codecs(module):
+    """Find the types that need encoders (those functions take as
+    parameters) and the types that need decoders (those functions
+    return), including every type they refer to.
+
+    Returns:
+      tuple: A pair of sets of type names.
+    """
+    model = semantics.analyze(module)
+    encoded, decoded = set(), set()
+    for function in model.functions.values():
+        for parameter in function.parameters:
+            encoded.update(semantics.type_names(parameter.type))
+
+        decoded.update(semantics.type_names(function.return_type))
+
+    encoded = set(name for name in encoded if name in model.types)
+    decoded = set(name for name in decoded if name in model.types)
+    return encoded | model.reachable(encoded), decoded | model.reachable(decoded)
+
+
+def _shape(tipe):
+    if isinstance(tipe, ast.List):
+        return "List" + _shape(tipe.type)
+
+    elif isinstance(tipe, ast.Dict):
+        return "Dict" + _shape(tipe.values_type)
+
+    elif isinstance(tipe, ast.Nullable):
+        return "Maybe" + _shape(tipe.type)
+
+    return tipe.name
+
+
+def _shared_codecs(module):
+    """Name the codecs of the composite types that appear more than
+    once in a module.  Shared codecs are named like helpers
+    (encodeListTodo___), so the names of the types whose codecs
+    would end up with the same name are taken.
+
+    Returns:
+      dict: Maps type expressions to names.
+    """
+    model = semantics.analyze(module)
+    taken = set(["Date", "Dict", "Maybe"])
+    taken.update(name[:-1] for name in model.types if name.endswith("_"))
+    return model.shared_names(_shape, taken=taken)
+
+
 class _Generator:
-    def __init__(self, module_name, module):
+    fragment_state = (
+        "imports", "helpers", "shared_codecs",
+        "enum_exports", "enum_docs", "enum_tags",
+        "union_exports", "union_docs", "union_tags",
+        "record_exports", "record_docs",
+        "function_exports", "function_docs",
+    )
+
+    def __init__(self, module_name, module, fragments=None, prune=False, share=False, streaming=()):
         self.module_name = module_name
         self.module = module
-
-        self.decoders = {}
-        self.encoders = {}
-
-        self.imports = set([
-            ("Date", None, ("Date",)),
-            ("Dict", None, ("Dict",)),
-            ("HttpBuilder", "HB", None),
-            ("Json.Decode", "JD", ("Decoder", "(:=)")),
-            ("Json.Decode.Extra", None, ("(|:)", "date")),
-            ("Json.Encode", "JE", None),
-            ("Task", None, ("Task",)),
-            ("Time", None, ("Time",)),
-        ])
+        self.fragments = fragments
+        self.streaming = semantics.analyze(module).streamed(streaming)
+
+        #: Maps type expressions to the names of their shared codecs.
+        self.shared = _shared_codecs(module) if share else {}
+        #: The (kind, expression) pairs of the shared codecs in use.
+        self.shared_codecs = set()
+        self.expanding = None
+
+        if prune:
+            # Imports and helpers are added as code that uses them is
+            # generated.
+            self.encoded, self.decoded = _codecs(module)
+            self.imports = set([_http_builder, _time])
+            self.helpers = set()
+        else:
+            self.encoded = self.decoded = None
+            self.imports = set([
+                _date, _dict, _http_builder, _json_decode,
+                _json_decode_extra, _json_encode, _task, _time,
+            ])
+            self.helpers = set(_helpers)
 
         self.enum_exports = set([])
         self.enum_docs = []
@@ -105,9 +250,73 @@ class _Generator:
         self.function_exports = set(["defaultConfig"])
         self.function_docs = []
 
+    def fragment_context(self, decl):
+        shared = ()
+        if self.shared:
+            shared = tuple(self.shared.get(tipe) for tipe in semantics.expressions(decl))
+
+        return self.has_encoder(decl), self.has_decoder(decl), shared, decl.name in self.streaming
+
+    def has_encoder(self, decl):
+        return self.encoded is None or decl.name in self.encoded
+
+    def has_decoder(self, decl):
+        return self.decoded is None or decl.name in self.decoded
+
+    def use_helper(self, name):
+        self.helpers.add(name)
+        self.imports.update(_helpers[name])
+        return name
+
+    def use_shared_codec(self, kind, tipe):
+        """Get the name of the shared encoder or decoder of a type, if
+        it has one.
+        """
+        name = self.shared.get(tipe)
+        if name is None or tipe is self.expanding:
+            return None
+
+        self.shared_codecs.add((kind, tipe))
+        return text("{}{}___".format(kind, name))
+
+    @property
+    def shared_codec_docs(self):
+        # Generating a codec may start using more shared codecs, so
+        # keep going until every one that's in use has been generated.
+        docs, generated = [], set()
+        while len(generated) < len(self.shared_codecs):
+            pending = sorted(self.shared_codecs - generated, key=lambda pair: (self.shared[pair[1]], pair[0]))
+            for kind, tipe in pending:
+                generated.add((kind, tipe))
+                name = "{}{}___".format(kind, self.shared[tipe])
+                self.expanding = tipe
+                annotation = self.generate_node(tipe)
+                if isinstance(tipe, ast.Dict):
+                    annotation = text("(") + annotation + text(")")
+
+                if kind == "encode":
+                    signature = text(name + " : ") + annotation + text(" -> JE.Value")
+                    body = self.generate_encoder(tipe)
+                else:
+                    signature = text(name + " : Decoder ") + annotation
+                    body = self.generate_decoder(tipe)
+
+                self.expanding = None
+                docs.extend([
+                    blank, blank,
+                    line(signature),
+                    line(name + " =") + block([body]),
+                ])
+
+        return docs
+
     def generate(self):
         for decl in self.module.declarations:
-            self.generate_decl(decl)
+            generate_fragment(self, decl)
+
+        # Shared codecs have to be generated before the imports and
+        # helpers they use are.
+        shared_codec_docs = self.shared_codec_docs
 
         exports = []
         sum_types = sorted(chain(self.enum_exports, self.union_exports))
@@ -117,6 +326,10 @@ class _Generator:
                 doc = line(", ") + doc
             exports.append(doc)
 
+        if "batch___" in self.helpers:
+            self.record_exports.add("BatchCall___")
+            self.function_exports.update(["batch___", "mapCall___"])
+
         functions = sorted(chain(self.record_exports, self.function_exports))
         for i, export in enumerate(functions, len(sum_types)):
             doc = text(export)
@@ -136,6 +349,7 @@ class _Generator:
             *self.union_docs,
             *self.record_docs,
             *self.function_docs,
+            *shared_codec_docs,
         )
 
     @property
@@ -156,7 +370,7 @@ class _Generator:
 
     @property
     def client_docs(self):
-        return [
+        docs = [
             blank, blank,
             line("type alias ClientConfig =") + block([
                 text("{ endpoint : String"),
@@ -170,32 +384,130 @@ class _Generator:
             line("defaultConfig endpoint =") + block([
                 text("ClientConfig endpoint (Time.second * 5) identity")
             ]),
+        ]
 
-            blank, blank,
-            line("decodeDate___ : Decoder Date"),
-            line("decodeDate___ = ") + block([
-                text("JD.map (Date.fromTime << (*) 1000) JD.float")
-            ]),
+        if "decodeDate___" in self.helpers:
+            docs.extend([
+                blank, blank,
+                line("decodeDate___ : Decoder Date"),
+                line("decodeDate___ = ") + block([
+                    text("JD.map (Date.fromTime << (*) 1000) JD.float")
+                ]),
+            ])
+
+        if "encodeDate___" in self.helpers:
+            docs.extend([
+                blank, blank,
+                line("encodeDate___ : Date -> JE.Value"),
+                line("encodeDate___ = ") + block([
+                    text("Date.toTime >> flip (/) 1000 >> JE.float")
+                ]),
+            ])
+
+        if "encodeDict___" in self.helpers:
+            docs.extend([
+                blank, blank,
+                line("encodeDict___ : (a -> JE.Value) -> Dict String a -> JE.Value"),
+                line("encodeDict___ f = ") + block([
+                    text(r"Dict.toList >> List.map (\(k, v) -> (k, f v)) >> JE.object")
+                ]),
+            ])
+
+        if "encodeMaybe___" in self.helpers:
+            docs.extend([
+                blank, blank,
+                line("encodeMaybe___ : (a -> JE.Value) -> Maybe a -> JE.Value"),
+                line("encodeMaybe___ f = ") + block([
+                    text("Maybe.map f >> Maybe.withDefault JE.null")
+                ]),
+            ])
+
+        if "batch___" in self.helpers:
+            docs.extend(self.batch_docs)
+
+        if "ndjsonReader___" in self.helpers:
+            docs.extend([
+                blank, blank,
+                line("ndjsonReader___ : Decoder a -> HB.BodyReader (List a)"),
+                line("ndjsonReader___ decoder value = ") + block([
+                    text("let") + block([
+                        text("decodeLines body = ") + block([
+                            text("String.lines body") + block([
+                                text("|> List.filter (not << String.isEmpty)"),
+                                text("|> List.map (JD.decodeString decoder)"),
+                                text("|> List.foldr (Result.map2 (::)) (Ok [])"),
+                            ])
+                        ])
+                    ]),
+                    text("in") + block([
+                        text("HB.stringReader value `Result.andThen` decodeLines")
+                    ])
+                ]),
+            ])
+
+        return docs
 
+    @property
+    def batch_docs(self):
+        return [
             blank, blank,
-            line("encodeDate___ : Date -> JE.Value"),
-            line("encodeDate___ = ") + block([
-                text("Date.toTime >> flip (/) 1000 >> JE.float")
+            line("type alias BatchCall___ a =") + block([
+                text("{ fn : String"),
+                text(", args : JE.Value"),
+                text(", decoder : Decoder a"),
+                text("}")
             ]),
 
             blank, blank,
-            line("encodeDict___ : (a -> JE.Value) -> Dict String a -> JE.Value"),
-            line("encodeDict___ f = ") + block([
-                text(r"Dict.toList >> List.map (\(k, v) -> (k, f v)) >> JE.object")
+            line("mapCall___ : (a -> b) -> BatchCall___ a -> BatchCall___ b"),
+            line("mapCall___ f call =") + block([
+                text("BatchCall___ call.fn call.args (JD.map f call.decoder)")
             ]),
 
             blank, blank,
-            line("encodeMaybe___ : (a -> JE.Value) -> Maybe a -> JE.Value"),
-            line("encodeMaybe___ f = ") + block([
-                text("Maybe.map f >> Maybe.withDefault JE.null")
+            line("batch___ : ClientConfig") + group(nest(concat(
+                softline(" "),
+                text("-> List (BatchCall___ a)"),
+                softline(" "),
+                text("-> Task (HB.Error String) (HB.Response (List (Result String a)))"),
+            ))),
+            line("batch___ config__ calls = ") + block([
+                text("let") + block([
+                    text("call__ call = ") + block([
+                        text('JE.object [("fn", JE.string call.fn), ("args", call.args)]')
+                    ]),
+
+                    line("req__ = ") + block([
+                        text("JE.list (List.map call__ calls)")
+                    ]),
+
+                    line("result__ call value = ") + block([
+                        text('case JD.decodeValue ("error" := JD.string) value of') + block([
+                            text("Ok error ->") + block([text("Err error")]),
+                            line("Err _ ->") + block([text('JD.decodeValue ("result" := call.decoder) value')]),
+                        ])
+                    ]),
+
+                    line("res__ = ") + block([
+                        text("JD.map (List.map2 result__ calls) (JD.list JD.value)")
+                    ])
+                ]),
+                text("in") + block([
+                    self.send_doc("__batch")
+                ])
             ]),
         ]
 
+    def send_doc(self, fn, reader="HB.jsonReader res__"):
+        return text('HB.url config__.endpoint [("fn", "{}")]'.format(fn)) + block([
+            text("|> HB.post"),
+            text("|> config__.withAuth"),
+            text('|> HB.withHeader "Content-type" "application/json"'),
+            text("|> HB.withJsonBody req__"),
+            text("|> HB.withTimeout config__.timeout"),
+            text("|> HB.send ({}) HB.stringReader".format(reader))
+        ])
+
     @dispatch(ast.Enum)
     def generate_decl(self, enum):
         def tag(i, tag):
@@ -211,8 +523,7 @@ class _Generator:
             line("type {}".format(enum.name)),
             block(tag(*pair) for pair in enumerate(enum.tags)),
 
-            *self.generate_encoder(enum),
-            *self.generate_decoder(enum),
+            *self.generate_codecs(enum),
         ))
 
     @dispatch(ast.Union)
@@ -230,8 +541,7 @@ class _Generator:
             line("type {}".format(union.name)),
             block(tipe(*pair) for pair in enumerate(union.types)),
 
-            *self.generate_encoder(union),
-            *self.generate_decoder(union),
+            *self.generate_codecs(union),
         ))
 
     @dispatch(ast.Record)
@@ -253,57 +563,95 @@ class _Generator:
                 text("}")
             ]),
 
-            *self.generate_encoder(record),
-            *self.generate_decoder(record),
+            *self.generate_codecs(record),
         ))
 
+    def generate_codecs(self, decl):
+        docs = []
+        if self.has_encoder(decl):
+            self.imports.add(_json_encode)
+            docs.extend(self.generate_encoder(decl))
+
+        if self.has_decoder(decl):
+            self.imports.add(_json_decode)
+            docs.extend(self.generate_decoder(decl))
+
+        return docs
+
     @dispatch(ast.Function)
     def generate_decl(self, function):
         param_names = ("config__ " + " ".join(p.name for p in function.parameters)).strip()
         param_types = concat(
-            *(text(" -> ") + self.generate_node(p.type) for p in function.parameters)
+            *(softline(" ") + text("-> ") + self.generate_node(p.type) for p in function.parameters)
         )
         return_type = concat(
-            text(" -> Task (HB.Error String) (HB.Response "),
+            softline(" "),
+            text("-> Task (HB.Error String) (HB.Response "),
             self.generate_node(function.return_type),
             text(")")
         )
 
+        streamed = function.name in self.streaming
+        bindings = text("let") + block([
+            text("req__ = ") + block([
+                text("JE.object") + block([
+                    text("[ ") + concat(*(
+                        self.generate_field_encoder("", *pair) for pair in enumerate(function.parameters))
+                    ),
+                    text("]")
+                ])
+            ]),
+
+            line("res__ = ") + block([
+                self.generate_decoder(function.return_type.type if streamed else function.return_type)
+            ])
+        ])
+
+        self.imports.update([_json_decode, _json_encode, _task])
         self.function_exports.add(function.name)
         self.function_docs.append(concat(
             blank, blank,
-            line("{name} : ClientConfig".format(name=function.name)) + param_types + return_type,
+            line("{name} : ClientConfig".format(name=function.name)) + group(nest(param_types + return_type)),
             line("{name} {params} = ".format(name=function.name, params=param_names)),
             block([
-                text("let") + block([
-                    text("req__ = ") + block([
-                        text("JE.object") + block([
-                            text("[ ") + concat(*(
-                                self.generate_encoder("", *pair) for pair in enumerate(function.parameters))
-                            ),
-                            text("]")
-                        ])
-                    ]),
+                bindings,
+                text("in") + block([
+                    self.send_doc(function.name, "ndjsonReader___ res__" if streamed else "HB.jsonReader res__")
+                ])
+            ]),
+        ))
 
-                    line("res__ = ") + block([
-                        self.generate_decoder(function.return_type)
-                    ])
-                ]),
+        if streamed:
+            # The batch endpoint can't stream, so there's no call to batch.
+            self.use_helper("ndjsonReader___")
+            return
+
+        result_type = self.generate_node(function.return_type)
+        if isinstance(function.return_type, ast.Dict):
+            result_type = text("(") + result_type + text(")")
+
+        call_types = [self.generate_node(p.type) + softline(" ") + text("-> ") for p in function.parameters]
+        call_name = function.name + "Call___"
+
+        self.use_helper("batch___")
+        self.function_exports.add(call_name)
+        self.function_docs.append(concat(
+            blank, blank,
+            line("{} : ".format(call_name)) + group(nest(concat(*call_types) + text("BatchCall___ ") + result_type)),
+            line("{} = ".format(" ".join([call_name] + [p.name for p in function.parameters]))),
+            block([
+                bindings,
                 text("in") + block([
-                    text('HB.url config__.endpoint [("fn", "{}")]'.format(function.name)) + block([
-                        text("|> HB.post"),
-                        text("|> config__.withAuth"),
-                        text('|> HB.withHeader "Content-type" "application/json"'),
-                        text("|> HB.withJsonBody req__"),
-                        text("|> HB.withTimeout config__.timeout"),
-                        text("|> HB.send (HB.jsonReader res__) HB.stringReader")
-                    ])
+                    text('BatchCall___ "{}" req__ res__'.format(function.name))
                 ])
             ])
         ))
 
     @dispatch(ast.Type)
     def generate_node(self, tipe):
+        if tipe.name == "Timestamp":
+            self.imports.add(_date)
+
         try:
             return text({
                 "Timestamp": "Date",
@@ -321,19 +669,17 @@ class _Generator:
 
     @dispatch(ast.Dict)
     def generate_node(self, tipe):
-        self.imports.add(("Dict", None, ("Dict",)))
+        self.imports.add(_dict)
         return concat(
             text("Dict String "),
             self.generate_node(tipe.values_type)
         )
 
     def generate_encoder_name(self, node):
-        self.encoders[node.name] = name = "encode" + node.name + "__"
-        return name
+        return "encode" + node.name + "__"
 
     def generate_decoder_name(self, node):
-        self.decoders[node.name] = name = "decode" + node.name + "__"
-        return name
+        return "decode" + node.name + "__"
 
     @dispatch(ast.Enum)
     def generate_encoder(self, enum):
@@ -381,15 +727,14 @@ class _Generator:
             block([
                 text("JE.object") + block([
                     text("[ ") + concat(*(
-                        self.generate_encoder("record.", *pair) for pair in enumerate(record.attributes)
+                        self.generate_field_encoder("record.", *pair) for pair in enumerate(record.attributes)
                     )),
                     text("]")
                 ])
             ])
         ]
 
-    @dispatch(str, int, (ast.Attribute, ast.Parameter))
-    def generate_encoder(self, prefix, i, node):
+    def generate_field_encoder(self, prefix, i, node):
         doc = text('("{}", '.format(node.name)) + self.generate_encoder(node.type)
         if i != 0:
             doc = line(", ") + doc
@@ -407,22 +752,37 @@ class _Generator:
                 "Int": "JE.int",
                 "Float": "JE.float",
                 "String": "JE.string",
-                "Timestamp": "encodeDate___",
             }[tipe.name])
         except KeyError:
-            return text(self.encoders[tipe.name])
+            if tipe.name == "Timestamp":
+                return text(self.use_helper("encodeDate___"))
+
+            return text(self.generate_encoder_name(tipe))
 
     @dispatch(ast.Nullable)
     def generate_encoder(self, tipe):
-        return text("(encodeMaybe___ ") + self.generate_encoder(tipe.type) + text(")")
+        shared = self.use_shared_codec("encode", tipe)
+        if shared is not None:
+            return shared
+
+        return text("({} ".format(self.use_helper("encodeMaybe___"))) + self.generate_encoder(tipe.type) + text(")")
 
     @dispatch(ast.List)
     def generate_encoder(self, tipe):
+        shared = self.use_shared_codec("encode", tipe)
+        if shared is not None:
+            return shared
+
         return text("(JE.list << List.map ") + self.generate_encoder(tipe.type) + text(")")
 
     @dispatch(ast.Dict)
     def generate_encoder(self, tipe):
-        return text("(encodeDict___ ") + self.generate_encoder(tipe.values_type) + text(")")
+        shared = self.use_shared_codec("encode", tipe)
+        if shared is not None:
+            return shared
+
+        encoder = self.generate_encoder(tipe.values_type)
+        return text("({} ".format(self.use_helper("encodeDict___"))) + encoder + text(")")
 
     @dispatch(ast.Enum)
     def generate_decoder(self, enum):
@@ -478,6 +838,7 @@ class _Generator:
             decoder = self.generate_decoder(attr.type)
             return text('|: ("{}" := '.format(attr.name)) + decoder + text(")")
 
+        self.imports.add(_json_decode_extra)
         decoder_name = self.generate_decoder_name(record)
         return [
             blank, blank,
@@ -498,19 +859,33 @@ class _Generator:
                 "Int": "JD.int",
                 "Float": "JD.float",
                 "String": "JD.string",
-                "Timestamp": "decodeDate___",
             }[tipe.name])
         except KeyError:
-            return text(self.decoders[tipe.name])
+            if tipe.name == "Timestamp":
+                return text(self.use_helper("decodeDate___"))
+
+            return text(self.generate_decoder_name(tipe))
 
     @dispatch(ast.Nullable)
     def generate_decoder(self, tipe):
+        shared = self.use_shared_codec("decode", tipe)
+        if shared is not None:
+            return shared
+
         return text("(JD.maybe ") + self.generate_decoder(tipe.type) + text(")")
 
     @dispatch(ast.List)
     def generate_decoder(self, tipe):
+        shared = self.use_shared_codec("decode", tipe)
+        if shared is not None:
+            return shared
+
         return text("JD.oneOf [(JD.list ") + self.generate_decoder(tipe.type) + text("), JD.succeed []]")
 
     @dispatch(ast.Dict)
     def generate_decoder(self, tipe):
+        shared = self.use_shared_codec("decode", tipe)
+        if shared is not None:
+            return shared
+
         return text("(JD.dict ") + self.generate_decoder(tipe.values_type) + text(")")
@@ -1,26 +1,44 @@
+import os
+import sys
+
 from collections import OrderedDict
-from multipledispatch import dispatch
+from itertools import chain
+from string import Template
 
-from .. import ast
-from ..pretty import IndentConfig, blank, concat, text, line, block, pretty_print
+from .. import ast, semantics, timings
+from ..dispatch import dispatch
+from ..fragments import generate_fragment
+from ..pretty import IndentConfig, blank, concat, text, line, block, nest, pretty_print, pretty_print_to
 
 
-def handle(arguments, module):
+def handle(arguments, module, *, fragments=None):
     """Handle a CLI call to the "generate go" command.
 
     Parameters:
       arguments(argparse.Namespace): Arguments to this subcommand as
         specified by the register function.
       module(Module): The Cedar Module to generate source code from.
+      fragments(Fragments): An optional cache of the code generated
+        for each declaration.
 
     Returns:
       int: The command's exit code.
     """
-    print(generate(
-        module,
-        package_name=arguments.package_name,
-        server_name=arguments.server_name
-    ))
+    if arguments.json_benchmarks:
+        generate_json_benchmarks(module, package_name=arguments.package_name, stream=sys.stdout)
+    else:
+        generate(
+            module,
+            package_name=arguments.package_name,
+            server_name=arguments.server_name,
+            shared_types=arguments.shared_types,
+            json_methods=arguments.json_methods,
+            streaming=arguments.streaming,
+            fragments=fragments,
+            stream=sys.stdout
+        )
+
+    sys.stdout.write("\n")
     return 0
 
 
@@ -47,10 +65,34 @@ def register(parent):
         default="Server",
         help="the name of the generated Server type"
     )
+    parser.add_argument(
+        "--shared-types",
+        action="store_true",
+        help="declare type aliases for slice, map and pointer types that appear more than once (requires Go 1.9)"
+    )
+    parser.add_argument(
+        "--json-methods",
+        action="store_true",
+        help="generate reflection-free AppendJSON, MarshalJSON and UnmarshalJSON methods for every type"
+    )
+    parser.add_argument(
+        "--json-benchmarks",
+        action="store_true",
+        help="generate a test file that checks the --json-methods methods against encoding/json and benchmarks both"
+    )
+    parser.add_argument(
+        "--stream",
+        dest="streaming",
+        action="append",
+        default=[],
+        metavar="FN",
+        help="stream the items a function returns to clients as newline-delimited JSON (can be repeated)"
+    )
     return parser, handle
 
 
-def generate(module, *, package_name="server", server_name="Server"):
+def generate(module, *, package_name="server", server_name="Server", shared_types=False, json_methods=False,
+             streaming=(), fragments=None, stream=None):
     """Generate a Go source file containing the Server for a given
     Cedar Module.
 
@@ -58,48 +100,348 @@ def generate(module, *, package_name="server", server_name="Server"):
       module(ast.Module): The module to generate source code from.
       package_name(str): The generated source file's package.
       server_name(str): The name of the generated Server type.
+      shared_types(bool): When true, slice, map and pointer types
+        that appear more than once in the module are declared once,
+        as type aliases, and referred to by name.
+      json_methods(bool): When true, every record, request type and
+        enum gets AppendJSON, MarshalJSON and UnmarshalJSON methods
+        specialized to its fields and the server uses them instead of
+        encoding/json's reflection.  Unions are interface types so
+        their values are still handled by encoding/json.
+      streaming(iterable): The names of list-returning functions
+        whose handlers emit items one at a time, instead of returning
+        a slice, and whose items are streamed to clients as
+        newline-delimited JSON.
+      fragments(Fragments): If provided, code is only generated for
+        the declarations that changed since the last time these
+        fragments were used.
+      stream(file): If provided, the generated source code is written
+        to this file-like object instead of being returned.
+
+    Raises:
+      ValueError: If one of the streaming functions doesn't exist or
+        doesn't return a list.
+
+    Returns:
+      str: A string representing the generated Go source code or
+      None if a stream was provided.
+    """
+    assert isinstance(module, ast.Module)
+
+    config = IndentConfig(0, 1, "\t")
+    with timings.phase("generate"):
+        source = _Generator(
+            package_name,
+            server_name,
+            module,
+            fragments,
+            shared_types,
+            json_methods,
+            streaming
+        ).generate()
+
+    with timings.phase("render"):
+        if stream is None:
+            return pretty_print(source, config)
+
+        pretty_print_to(source, config, stream)
+
+
+def generate_json_benchmarks(module, *, package_name="server", stream=None):
+    """Generate a Go test file that checks that the methods generated
+    with json_methods encode and decode sample values of every record
+    and request type just like encoding/json does, along with
+    benchmarks that compare the two.
+
+    Parameters:
+      module(ast.Module): The module the server was generated from.
+      package_name(str): The server's package.
+      stream(file): If provided, the generated source code is written
+        to this file-like object instead of being returned.
 
     Returns:
-      str: A string representing the generated Go source code.
+      str: A string representing the generated Go source code or
+      None if a stream was provided.
     """
     assert isinstance(module, ast.Module)
 
+    model = semantics.analyze(module)
+    docs = [
+        text("package {}".format(package_name)),
+
+        blank,
+        line("import") + block((
+            text('"{}"'.format(imp)) for imp in ("bytes", "encoding/json", "testing")
+        ), tokens="()"),
+    ]
+
+    for decl in module.declarations:
+        if isinstance(decl, ast.Record):
+            docs.extend(_json_benchmark_docs(model, decl.name, decl.attributes))
+
+        elif isinstance(decl, ast.Function):
+            docs.extend(_json_benchmark_docs(model, capitalize(decl.name) + "Request", decl.parameters))
+
     config = IndentConfig(0, 1, "\t")
-    source = _Generator(
-        package_name,
-        server_name,
-        module
-    ).generate()
+    source = concat(*docs)
+    if stream is None:
+        return pretty_print(source, config)
 
-    return pretty_print(source, config)
+    pretty_print_to(source, config, stream)
+
+
+def _json_benchmark_docs(model, name, fields):
+    plain = "jsonPlain" + name
+    sample = "{}{{{}}}".format(name, ", ".join(
+        "{}: {}".format(_field_name(field), _sample(model, field.type, 1)) for field in fields
+    ))
+
+    def benchmark(kind, setup, statement):
+        return [
+            blank,
+            line("func Benchmark{}{}(b *testing.B)".format(name, kind)),
+            block([
+                text(setup),
+                text("b.ReportAllocs()"),
+                text("for i := 0; i < b.N; i++") + block([statement]),
+            ]),
+        ]
+
+    return [
+        blank,
+        line("// {} has the same fields as {} but none of its methods so".format(plain, name)),
+        line("// encoding/json falls back to reflection for it."),
+        line("type {} {}".format(plain, name)),
+
+        blank,
+        line("func jsonSample{}() {}".format(name, name)),
+        block([text("return " + sample)]),
+
+        blank,
+        line("func Test{}JSON(t *testing.T)".format(name)),
+        block([
+            text("v := jsonSample{}()".format(name)),
+            text("want, err := json.Marshal({}(v))".format(plain)),
+            text("if err != nil") + block([text("t.Fatal(err)")]),
+            text("got := v.AppendJSON(nil)"),
+            text("if !bytes.Equal(got, want)") + block([
+                text('t.Fatalf("AppendJSON() = %s, want %s", got, want)')
+            ]),
+            text("var decoded {}".format(name)),
+            text("if err := decoded.UnmarshalJSON(got); err != nil") + block([text("t.Fatal(err)")]),
+            text("if again := decoded.AppendJSON(nil); !bytes.Equal(again, got)") + block([
+                text('t.Fatalf("UnmarshalJSON(%s) decoded to %s", got, again)')
+            ]),
+        ]),
+
+        *benchmark(
+            "AppendJSON",
+            "v, buf := jsonSample{}(), []byte(nil)".format(name),
+            text("buf = v.AppendJSON(buf[:0])"),
+        ),
+        *benchmark(
+            "EncodingJSONMarshal",
+            "v := {}(jsonSample{}())".format(plain, name),
+            text("if _, err := json.Marshal(v); err != nil") + block([text("b.Fatal(err)")]),
+        ),
+        *benchmark(
+            "UnmarshalJSON",
+            "data := jsonSample{}().AppendJSON(nil)".format(name),
+            text("var v {}".format(name)) + line(
+                text("if err := v.UnmarshalJSON(data); err != nil") + block([text("b.Fatal(err)")])
+            ),
+        ),
+        *benchmark(
+            "EncodingJSONUnmarshal",
+            "data := jsonSample{}().AppendJSON(nil)".format(name),
+            text("var v {}".format(plain)) + line(
+                text("if err := json.Unmarshal(data, &v); err != nil") + block([text("b.Fatal(err)")])
+            ),
+        ),
+    ]
+
+
+def _sample(model, tipe, depth):
+    """Build a Go expression for a value of a type that exercises as
+    much of its JSON encoding as possible.  Records nested more than
+    a couple of levels deep, which recursive records always end up
+    being, are left empty.
+    """
+    if isinstance(tipe, ast.List):
+        item = _sample(model, tipe.type, depth)
+        return "{}{{{}, {}}}".format(_type_name(tipe), item, item)
+
+    elif isinstance(tipe, ast.Dict):
+        value = _sample(model, tipe.values_type, depth)
+        return '{}{{"b": {}, "a": {}}}'.format(_type_name(tipe), value, value)
+
+    elif isinstance(tipe, ast.Nullable):
+        value = _sample(model, tipe.type, depth)
+        if isinstance(model.types.get(getattr(tipe.type, "name", None)), ast.Record):
+            return "&" + value
+
+        return "func() {} {{ var v {} = {}; return &v }}()".format(_type_name(tipe), _type_name(tipe.type), value)
+
+    elif tipe.name in _samples:
+        return _samples[tipe.name]
+
+    decl = model.types.get(tipe.name)
+    if isinstance(decl, ast.Enum):
+        return decl.name + decl.tags[0].name if decl.tags else '{}("")'.format(decl.name)
+
+    elif isinstance(decl, ast.Record):
+        if depth >= _sample_depth:
+            return decl.name + "{}"
+
+        return "{}{{{}}}".format(decl.name, ", ".join(
+            "{}: {}".format(_field_name(attribute), _sample(model, attribute.type, depth + 1))
+            for attribute in decl.attributes
+        ))
+
+    # Unions decode to generic maps, which don't encode back to the
+    # same JSON, so they are left empty.
+    return "nil"
 
 
 def capitalize(s):
     return s[0].upper() + s[1:]
 
 
+def _field_name(node):
+    if node.name.lower() == "id":
+        return "ID"
+
+    return capitalize(node.name)
+
+
+def _type_name(tipe):
+    if isinstance(tipe, ast.List):
+        return "[]" + _type_name(tipe.type)
+
+    elif isinstance(tipe, ast.Dict):
+        return "map[string]" + _type_name(tipe.values_type)
+
+    elif isinstance(tipe, ast.Nullable):
+        return "*" + _type_name(tipe.type)
+
+    return _builtin_types.get(tipe.name, tipe.name)
+
+
+def _switch(header, cases):
+    """Lay out a switch statement the way gofmt does, with its cases
+    at the same level as the switch itself.
+
+    Parameters:
+      header(str): Everything up to the opening brace.
+      cases(list): (label, statements) pairs.
+
+    Returns:
+      Doc: -
+    """
+    docs = [text(header + " {")]
+    for label, statements in cases:
+        docs.append(line(label))
+        docs.append(nest(concat(*(line(statement) for statement in statements))))
+
+    docs.append(line("}"))
+    return concat(*docs)
+
+
+def _shape(tipe):
+    if isinstance(tipe, ast.List):
+        return "List" + _shape(tipe.type)
+
+    elif isinstance(tipe, ast.Dict):
+        return "Map" + _shape(tipe.values_type)
+
+    elif isinstance(tipe, ast.Nullable):
+        return "Nullable" + _shape(tipe.type)
+
+    return tipe.name
+
+
+def _shared_types(module, server_name):
+    """Name the composite types that appear more than once in a
+    module, steering clear of every other name the generated package
+    declares.
+
+    Returns:
+      dict: Maps type expressions to names.
+    """
+    model = semantics.analyze(module)
+    taken = set(model.types)
+    taken.add(server_name)
+    for decl in module.declarations:
+        if isinstance(decl, ast.Enum):
+            taken.update(decl.name + tag.name for tag in decl.tags)
+        elif isinstance(decl, ast.Function):
+            taken.add(capitalize(decl.name) + "Request")
+
+    return model.shared_names(_shape, taken=taken)
+
+
 class _Generator:
-    def __init__(self, package_name, server_name, module):
+    fragment_state = ("functions", "imports", "enum_docs", "union_docs", "record_docs", "function_docs", "shared_types")
+
+    def __init__(self, package_name, server_name, module, fragments=None, shared_types=False, json_methods=False,
+                 streaming=()):
         self.package_name = package_name
         self.server_name = server_name
+        self.prefix = server_name[0].lower() + server_name[1:]
         self.module = module
+        self.model = semantics.analyze(module)
+        self.fragments = fragments
+        self.json_methods = json_methods
+        self.streaming = self.model.streamed(streaming)
+
+        #: Maps type expressions to the names of their aliases.
+        self.shared = _shared_types(module, server_name) if shared_types else {}
+        #: The expressions whose aliases are in use.
+        self.shared_types = set()
+        self.expanding = None
 
         self.functions = OrderedDict()
         self.imports = set([
+            "bytes",
             "encoding/json",
             "errors",
             "net/http",
+            "net/url",
+            "strconv",
+            "strings",
+            "sync",
         ])
+        if json_methods:
+            self.imports.update(["math", "unicode/utf8"])
+        if self.streaming:
+            self.imports.add("time")
 
         self.enum_docs = []
         self.union_docs = []
         self.record_docs = []
         self.function_docs = []
 
+    def fragment_context(self, decl):
+        shared = kinds = streamed = None
+        if self.shared:
+            shared = tuple(self.shared.get(tipe) for tipe in semantics.expressions(decl))
+
+        if self.json_methods:
+            # How a field is encoded depends on what kind of type it has.
+            kinds = tuple(type(self.model.types.get(name)).__name__ for name in self.model.dependencies(decl.name))
+
+        if self.streaming and isinstance(decl, ast.Function):
+            streamed = decl.name in self.streaming
+
+        if shared is not None or kinds is not None or streamed is not None:
+            return shared, kinds, streamed
+
     def generate(self):
         for decl in self.module.declarations:
-            self.generate_decl(decl)
+            generate_fragment(self, decl)
 
+        # The server may need more imports than the declarations do.
+        server_docs = self.server_docs
         return concat(
             text("package {}".format(self.package_name)),
 
@@ -110,69 +452,553 @@ class _Generator:
 
             *self.enum_docs,
             *self.union_docs,
+            *self.alias_docs,
             *self.record_docs,
-            *self.server_docs,
-            *self.function_docs
+            *server_docs,
+            *self.function_docs,
+            *self.json_runtime_docs
         )
 
     @property
-    def server_docs(self):
-        ifs = [
-            text("if req.Method != http.MethodPost") + block([
-                text('err = errors.New("method not allowed")')
-            ])
-        ]
-        for fn, (tipe, _) in self.functions.items():
-            ifs.extend([
-                text(' else if fn == "{}"'.format(fn)),
-                block([
-                    text("var request {}".format(tipe)),
-                    text("err = dec.Decode(&request)"),
-                    text("if err == nil") + block([
-                        text("res, err = s.{}".format(fn)) + text("(req, &request)")
-                    ])
+    def alias_docs(self):
+        # Expanding an alias may start using more aliases, so keep
+        # going until every one that's in use has been declared.
+        docs, declared = [], set()
+        while len(declared) < len(self.shared_types):
+            for tipe in sorted(self.shared_types - declared, key=self.shared.get):
+                declared.add(tipe)
+                self.expanding = tipe
+                docs.extend([
+                    blank,
+                    line("type {} = ".format(self.shared[tipe])) + self.generate_node(tipe),
                 ])
-            ])
+                self.expanding = None
+
+        return docs
+
+    def use_shared_type(self, tipe):
+        """Get the name of the alias of a type, if it has one.
+        """
+        name = self.shared.get(tipe)
+        if name is None or tipe is self.expanding:
+            return None
+
+        self.shared_types.add(tipe)
+        return text(name)
+
+    @property
+    def server_docs(self):
+        sname, prefix = self.server_name, self.prefix
+        if self.json_methods:
+            route_type = "func(*{}, *http.Request, []byte, []byte) ([]byte, error)".format(sname)
+            buffer_type, buffer_docs = "bytes.Buffer", []
+            new_buffer = "func() interface{} { return new(bytes.Buffer) }"
+            routes, serve = self.json_routes, self.json_serve
+        else:
+            route_type = "func(*{}, *http.Request, *{}Buffer) error".format(sname, prefix)
+            buffer_type, buffer_docs = prefix + "Buffer", self.decoder_buffer_docs
+            new_buffer = "new" + capitalize(buffer_type)
+            routes, serve = self.decoder_routes, self.decoder_serve
+
+        pools = [text("{}Buffers = sync.Pool{{New: {}}}".format(prefix, new_buffer))]
+        for _, (tipe, _, _) in self.functions.items():
+            pools.append(text("{}{}Pool = sync.Pool{{New: func() interface{{}} {{ return new({}) }}}}".format(
+                prefix, tipe, tipe
+            )))
 
         return [
             blank,
-            line("type {} struct".format(self.server_name)),
-            block(text("{} ".format(n)) + t for n, (_, t) in self.functions.items()),
+            line("type {} struct".format(sname)),
+            block(chain(
+                (text("{} ".format(n)) + t for n, (_, t, _) in self.functions.items()),
+                [text("batchParallelism int")],
+            )),
+
+            blank,
+            line("// SetBatchParallelism sets how many of the calls in a batch request"),
+            line("// may run at the same time.  It defaults to 8."),
+            line("func (s *{0}) SetBatchParallelism(n int) *{0}".format(sname)),
+            block([
+                text("s.batchParallelism = n"),
+                text("return s"),
+            ]),
+
+            *buffer_docs,
+
+            blank,
+            line("// Buffers and request structs are pooled, and request structs are"),
+            line("// reset before they're reused, so handlers must not hold on to the"),
+            line("// requests they're given once they return."),
+            line("var"),
+            block(pools, tokens="()"),
+
+            blank,
+            line("// {}Release returns a buffer to its pool, unless it grew too large".format(prefix)),
+            line("// to be worth keeping around."),
+            line("func {}Release(buf *{})".format(prefix, buffer_type)),
+            block([
+                text("if buf.Cap() <= 64<<10") + block([
+                    text("buf.Reset()"),
+                    text("{}Buffers.Put(buf)".format(prefix)),
+                ])
+            ]),
+
+            blank,
+            line("var {}Routes = map[string]{}".format(prefix, route_type)),
+            block(routes),
+
+            *self.stream_docs(buffer_type),
+
+            *self.batch_docs,
+
+            blank,
+            line("// {}FunctionName finds the name of the function a request".format(prefix)),
+            line("// calls, either in its fn query parameter or in the last segment"),
+            line("// of its path, without parsing the whole query string."),
+            line("func {}FunctionName(req *http.Request) string".format(prefix)),
+            block([
+                text("query := req.URL.RawQuery"),
+                text('for query != ""') + block([
+                    text("pair := query"),
+                    text("if i := strings.IndexByte(query, '&'); i >= 0") + block([
+                        text("pair, query = query[:i], query[i+1:]")
+                    ]) + text(" else") + block([
+                        text('query = ""')
+                    ]),
+                    text('if strings.HasPrefix(pair, "fn=")') + block([
+                        text("fn := pair[3:]"),
+                        text("if strings.IndexByte(fn, '%') >= 0") + block([
+                            text("fn, _ = url.QueryUnescape(fn)")
+                        ]),
+                        text("return fn")
+                    ])
+                ]),
+                text("path := req.URL.Path"),
+                text("return path[strings.LastIndexByte(path, '/')+1:]")
+            ]),
 
             blank,
             line("func (s {sname}) ServeHTTP(rw http.ResponseWriter, req *http.Request)".format(
-                sname=self.server_name)
+                sname=sname)
             ),
+            block(serve)
+        ]
+
+    def pooled_request(self, tipe):
+        return [
+            text("request := {}{}Pool.Get().(*{})".format(self.prefix, tipe, tipe)),
+            text("defer func()") + block([
+                text("*request = {}{{}}".format(tipe)),
+                text("{}{}Pool.Put(request)".format(self.prefix, tipe)),
+            ]) + text("()"),
+        ]
+
+    @property
+    def decoder_buffer_docs(self):
+        name = "{}Buffer".format(self.prefix)
+        return [
+            blank,
+            line("// {} is a pooled buffer along with the encoder that writes to it.".format(name)),
+            line("type {} struct".format(name)),
             block([
-                text("var err error"),
-                text("var res interface{}"),
-                text("enc := json.NewEncoder(rw)"),
-                text("dec := json.NewDecoder(req.Body)"),
-                text('fn := req.URL.Query().Get("fn")'),
-
-                line(concat(
-                    *ifs,
-                    text(" else") + block([
-                        text('err = errors.New("invalid function")')
-                    ])
-                )),
+                text("bytes.Buffer"),
+                text("enc *json.Encoder"),
+            ]),
+
+            blank,
+            line("func new{}() interface{{}}".format(capitalize(name))),
+            block([
+                text("buf := new({})".format(name)),
+                text("buf.enc = json.NewEncoder(&buf.Buffer)"),
+                text("return buf"),
+            ]),
+        ]
+
+    @property
+    def decoder_routes(self):
+        routes = []
+        for fn, (tipe, _, _) in self.functions.items():
+            if fn in self.streaming:
+                continue
 
-                line("if err != nil") + block([
-                    text("rw.WriteHeader(http.StatusBadRequest)"),
-                    text("err = enc.Encode(err.Error())"),
+            routes.append(concat(
+                text('"{fn}": func(s *{sname}, req *http.Request, buf *{prefix}Buffer) error'.format(
+                    fn=fn, sname=self.server_name, prefix=self.prefix
+                )),
+                block([
+                    *self.pooled_request(tipe),
+                    text("if err := json.Unmarshal(buf.Bytes(), request); err != nil") + block([
+                        text("return err")
+                    ]),
+                    text("buf.Reset()"),
+                    text("res, err := s.{}(req, request)".format(fn)),
                     text("if err != nil") + block([
-                        text("panic(err)")
-                    ])
-                ]) + text(" else") + block([
-                    text("rw.WriteHeader(http.StatusOK)"),
-                    text("err = enc.Encode(res)"),
+                        text("return err")
+                    ]),
+                    text("return buf.enc.Encode(res)"),
+                ]),
+                text(",")
+            ))
+
+        return routes
+
+    @property
+    def decoder_serve(self):
+        return [
+            text("buf := {}Buffers.Get().(*{}Buffer)".format(self.prefix, self.prefix)),
+            text("defer {}Release(buf)".format(self.prefix)),
+
+            line(concat(
+                text("var err error"),
+                line("name := {}FunctionName(req)".format(self.prefix)),
+                line("if req.Method != http.MethodPost") + block([
+                    text('err = errors.New("method not allowed")')
+                ]),
+                text(' else if name == "__batch"') + block([
+                    text("if _, err = buf.ReadFrom(req.Body); err == nil") + block([
+                        text("var res []byte"),
+                        text("if res, err = {}Batch(&s, req, buf.Bytes()); err == nil".format(self.prefix)) + block([
+                            text("buf.Reset()"),
+                            text("buf.Write(res)"),
+                            text("buf.WriteByte('\\n')"),
+                        ]),
+                    ]),
+                ]),
+                *self.stream_branch,
+                text(" else if route, ok := {}Routes[name]; ok".format(self.prefix)) + block([
+                    text("if _, err = buf.ReadFrom(req.Body); err == nil") + block([
+                        text("err = route(&s, req, buf)")
+                    ]),
+                ]),
+                text(" else") + block([
+                    text('err = errors.New("invalid function")')
+                ])
+            )),
+
+            line(text("status := http.StatusOK")),
+            text("if err != nil") + block([
+                text("status = http.StatusBadRequest"),
+                text("buf.Reset()"),
+                text("if err = buf.enc.Encode(err.Error()); err != nil") + block([
+                    text("panic(err)")
+                ]),
+            ]),
+
+            line(text('rw.Header().Set("Content-Length", strconv.Itoa(buf.Len()))')),
+            text("rw.WriteHeader(status)"),
+            text("if _, err = rw.Write(buf.Bytes()); err != nil") + block([
+                text("panic(err)")
+            ]),
+        ]
+
+    @property
+    def json_routes(self):
+        routes = []
+        for fn, (tipe, _, return_type) in self.functions.items():
+            if fn in self.streaming:
+                continue
+
+            routes.append(concat(
+                text('"{fn}": func(s *{sname}, req *http.Request, body []byte, b []byte) ([]byte, error)'.format(
+                    fn=fn, sname=self.server_name
+                )),
+                block([
+                    *self.pooled_request(tipe),
+                    text("if err := request.UnmarshalJSON(body); err != nil") + block([
+                        text("return nil, err")
+                    ]),
+                    text("res, err := s.{}(req, request)".format(fn)),
                     text("if err != nil") + block([
-                        text("panic(err)")
-                    ])
+                        text("return nil, err")
+                    ]),
+                    *self.generate_append(return_type, "res", 0),
+                    text("return b, nil"),
                 ]),
-            ])
+                text(",")
+            ))
+
+        return routes
+
+    @property
+    def json_serve(self):
+        return [
+            text("buf := {}Buffers.Get().(*bytes.Buffer)".format(self.prefix)),
+            text("defer func()") + block([
+                text("{}Release(buf)".format(self.prefix))
+            ]) + text("()"),
+
+            line(concat(
+                text("var err error"),
+                line("var res []byte"),
+                line("name := {}FunctionName(req)".format(self.prefix)),
+                line("if req.Method != http.MethodPost") + block([
+                    text('err = errors.New("method not allowed")')
+                ]),
+                text(' else if name == "__batch"') + block([
+                    text("if _, err = buf.ReadFrom(req.Body); err == nil") + block([
+                        text("res, err = {}Batch(&s, req, buf.Bytes())".format(self.prefix)),
+                    ]),
+                ]),
+                *self.stream_branch,
+                text(" else if route, ok := {}Routes[name]; ok".format(self.prefix)) + block([
+                    text("if _, err = buf.ReadFrom(req.Body); err == nil") + block([
+                        text("// Requests are decoded in full before anything is appended"),
+                        text("// to the response, so it can reuse the request's memory."),
+                        text("res, err = route(&s, req, buf.Bytes(), buf.Bytes()[:0])"),
+                    ]),
+                ]),
+                text(" else") + block([
+                    text('err = errors.New("invalid function")')
+                ])
+            )),
+
+            line(text("status := http.StatusOK")),
+            text("if err != nil") + block([
+                text("status = http.StatusBadRequest"),
+                text("res = {}AppendString(buf.Bytes()[:0], err.Error())".format(self.prefix)),
+            ]),
+
+            # Match the newline json.Encoder writes after every value.
+            text("res = append(res, '\\n')"),
+            text("if cap(res) > buf.Cap()") + block([
+                text("buf = bytes.NewBuffer(res[:0])")
+            ]),
+
+            line(text('rw.Header().Set("Content-Length", strconv.Itoa(len(res)))')),
+            text("rw.WriteHeader(status)"),
+            text("if _, err = rw.Write(res); err != nil") + block([
+                text("panic(err)")
+            ]),
         ]
 
+    def stream_docs(self, buffer_type):
+        sname, prefix = self.server_name, self.prefix
+        streams = []
+        for fn, (tipe, _, return_type) in self.functions.items():
+            if fn not in self.streaming:
+                continue
+
+            if self.json_methods:
+                decode = "request.UnmarshalJSON(buf.Bytes())"
+                stream = text("st := &{}Stream{{rw: rw, buf: buf}}".format(prefix))
+                emit = [
+                    text("b = b[:0]"),
+                    *self.generate_append(return_type.type, "item", 0),
+                    text("b = append(b, '\\n')"),
+                    text("buf.Write(b)"),
+                ]
+                stream += line("var b []byte")
+            else:
+                decode = "json.Unmarshal(buf.Bytes(), request)"
+                stream = text("st := &{}Stream{{rw: rw, buf: &buf.Buffer}}".format(prefix))
+                emit = [
+                    text("if err := buf.enc.Encode(item); err != nil") + block([
+                        text("return err")
+                    ]),
+                ]
+
+            streams.append(concat(
+                text('"{fn}": func(s *{sname}, rw http.ResponseWriter, req *http.Request, buf *{buffer}) error'.format(
+                    fn=fn, sname=sname, buffer=buffer_type
+                )),
+                block([
+                    *self.pooled_request(tipe),
+                    text("if err := {}; err != nil".format(decode)) + block([
+                        text("return err")
+                    ]),
+                    text("buf.Reset()"),
+                    stream,
+                    concat(
+                        text("return st.end(s.{}(req, request, func(item ".format(fn)),
+                        self.generate_node(return_type.type),
+                        text(") error"),
+                    ) + block([
+                        *emit,
+                        text("return st.emit()"),
+                    ]) + text("))"),
+                ]),
+                text(",")
+            ))
+
+        if not streams:
+            return []
+
+        return [
+            blank,
+            line("// {}Stream sends the items a streaming handler emits to the client".format(prefix)),
+            line("// as newline-delimited JSON.  Items are buffered and flushed once"),
+            line("// 32KiB of them have piled up or 100ms have passed since the last"),
+            line("// flush."),
+            line("type {}Stream struct".format(prefix)),
+            block([
+                text("rw http.ResponseWriter"),
+                text("buf *bytes.Buffer"),
+                text("started bool"),
+                text("flushed time.Time"),
+            ]),
+
+            blank,
+            line("// emit is called after every item is written to the buffer."),
+            line("func (st *{}Stream) emit() error".format(prefix)),
+            block([
+                text("if st.buf.Len() < 32<<10 && time.Since(st.flushed) < 100*time.Millisecond") + block([
+                    text("return nil")
+                ]),
+                text("return st.flush()"),
+            ]),
+
+            blank,
+            line("func (st *{}Stream) flush() error".format(prefix)),
+            block([
+                text("if !st.started") + block([
+                    text("st.started = true"),
+                    text('st.rw.Header().Set("Content-Type", "application/x-ndjson")'),
+                    text("st.rw.WriteHeader(http.StatusOK)"),
+                ]),
+                text("if _, err := st.rw.Write(st.buf.Bytes()); err != nil") + block([
+                    text("return err")
+                ]),
+                text("st.buf.Reset()"),
+                text("if f, ok := st.rw.(http.Flusher); ok") + block([
+                    text("f.Flush()")
+                ]),
+                text("st.flushed = time.Now()"),
+                text("return nil"),
+            ]),
+
+            blank,
+            line("// end sends whatever is left in the buffer once the handler returns."),
+            line("// Errors that happen after part of the response has been sent can't"),
+            line("// be reported to the client, so the connection is aborted instead."),
+            line("func (st *{}Stream) end(err error) error".format(prefix)),
+            block([
+                text("if err == nil") + block([
+                    text("err = st.flush()")
+                ]),
+                text("if err != nil && st.started") + block([
+                    text("panic(http.ErrAbortHandler)")
+                ]),
+                text("return err"),
+            ]),
+
+            blank,
+            line("var {}Streams = map[string]func(*{}, http.ResponseWriter, *http.Request, *{}) error".format(
+                prefix, sname, buffer_type
+            )),
+            block(streams),
+        ]
+
+    @property
+    def stream_branch(self):
+        if not any(fn in self.streaming for fn in self.functions):
+            return []
+
+        return [
+            text(" else if stream, ok := {}Streams[name]; ok".format(self.prefix)) + block([
+                text("if _, err = buf.ReadFrom(req.Body); err == nil") + block([
+                    text("// Streams write their own responses."),
+                    text("if err = stream(&s, rw, req, buf); err == nil") + block([
+                        text("return")
+                    ]),
+                ]),
+            ]),
+        ]
+
+    @property
+    def batch_docs(self):
+        sname, prefix = self.server_name, self.prefix
+        if self.json_methods:
+            call = [
+                text("res, err := route(s, req, args, nil)"),
+                text("if err != nil") + block([
+                    text("result.Error = err.Error()"),
+                    text("return"),
+                ]),
+                text("result.Result = res"),
+            ]
+        else:
+            call = [
+                text("buf := {}Buffers.Get().(*{}Buffer)".format(prefix, prefix)),
+                text("defer {}Release(buf)".format(prefix)),
+                text("buf.Write(args)"),
+                text("if err := route(s, req, buf); err != nil") + block([
+                    text("result.Error = err.Error()"),
+                    text("return"),
+                ]),
+                text("result.Result = append(json.RawMessage(nil), buf.Bytes()...)"),
+            ]
+
+        return [
+            blank,
+            line("// {}BatchCall is one of the calls in a batch request.".format(prefix)),
+            line("type {}BatchCall struct".format(prefix)),
+            block([
+                text('Fn string `json:"fn"`'),
+                text('Args json.RawMessage `json:"args"`'),
+            ]),
+
+            blank,
+            line("// {}BatchResult is the outcome of one of the calls in a batch".format(prefix)),
+            line("// request: either the function's result or the error it failed with."),
+            line("type {}BatchResult struct".format(prefix)),
+            block([
+                text('Result json.RawMessage `json:"result,omitempty"`'),
+                text('Error string `json:"error,omitempty"`'),
+            ]),
+
+            blank,
+            line("// {}Batch runs the calls in a batch request concurrently, at most".format(prefix)),
+            line("// batchParallelism at a time, and encodes their results in order."),
+            line("func {}Batch(s *{}, req *http.Request, body []byte) ([]byte, error)".format(prefix, sname)),
+            block([
+                text("var calls []{}BatchCall".format(prefix)),
+                text("if err := json.Unmarshal(body, &calls); err != nil") + block([
+                    text("return nil, err")
+                ]),
+                text("parallelism := s.batchParallelism"),
+                text("if parallelism <= 0") + block([
+                    text("parallelism = 8")
+                ]),
+                text("results := make([]{}BatchResult, len(calls))".format(prefix)),
+                text("slots := make(chan struct{}, parallelism)"),
+                text("var wg sync.WaitGroup"),
+                text("for i, call := range calls") + block([
+                    text("route, ok := {}Routes[call.Fn]".format(prefix)),
+                    text("if !ok") + block([
+                        text('results[i].Error = "invalid function"'),
+                        text("continue"),
+                    ]),
+                    text("result, args := &results[i], call.Args"),
+                    text("if len(args) == 0") + block([
+                        text('args = json.RawMessage("{}")')
+                    ]),
+                    text("wg.Add(1)"),
+                    text("slots <- struct{}{}"),
+                    text("go func()") + block([
+                        text("defer func()") + block([
+                            text("// A panic would otherwise take the whole server down."),
+                            text("if recover() != nil") + block([
+                                text('result.Error = "internal error"')
+                            ]),
+                            text("<-slots"),
+                            text("wg.Done()"),
+                        ]) + text("()"),
+                        *call,
+                    ]) + text("()"),
+                ]),
+                text("wg.Wait()"),
+                text("return json.Marshal(results)"),
+            ]),
+        ]
+
+    @property
+    def json_runtime_docs(self):
+        if not self.json_methods:
+            return []
+
+        runtime = _load_json_runtime().substitute(p=self.prefix)
+        return [blank] + [line(source) if source else blank for source in runtime.split("\n")]
+
     @dispatch(ast.Enum)
     def generate_decl(self, enum):
         def tag(tag):
@@ -188,6 +1014,8 @@ class _Generator:
             line("var"),
             block((tag(node) for node in enum.tags), tokens="()"),
         ))
+        if self.json_methods:
+            self.enum_docs.extend(self.enum_json_docs(enum.name))
 
     @dispatch(ast.Union)
     def generate_decl(self, union):
@@ -203,6 +1031,8 @@ class _Generator:
             line("type {} struct".format(record.name)),
             block(self.generate_node(node) for node in record.attributes),
         ))
+        if self.json_methods:
+            self.record_docs.extend(self.struct_json_docs(record.name, record.attributes))
 
     @dispatch(ast.Function)
     def generate_decl(self, function):
@@ -214,12 +1044,20 @@ class _Generator:
             block(self.generate_node(node) for node in function.parameters),
         )
 
-        function_type = concat(
-            text("func(*http.Request, *{}) ".format(request_type)),
-            text("("),
-            self.generate_node(function.return_type),
-            text(", error)")
-        )
+        if function.name in self.streaming:
+            # Handlers of streaming functions emit items one at a time.
+            function_type = concat(
+                text("func(*http.Request, *{}, func(".format(request_type)),
+                self.generate_node(function.return_type.type),
+                text(") error) error")
+            )
+        else:
+            function_type = concat(
+                text("func(*http.Request, *{}) ".format(request_type)),
+                text("("),
+                self.generate_node(function.return_type),
+                text(", error)")
+            )
 
         header = concat(
             blank,
@@ -242,46 +1080,296 @@ class _Generator:
             ]),
         )
 
-        self.functions[function.name] = (request_type, function_type)
+        self.functions[function.name] = (request_type, function_type, function.return_type)
         self.record_docs.append(request)
+        if self.json_methods:
+            self.record_docs.extend(self.struct_json_docs(request_type, function.parameters))
+
         self.function_docs.append(declaration)
 
-    @dispatch((ast.Attribute, ast.Parameter))
-    def generate_node(self, node):
-        if node.name.lower() == "id":
-            name = "ID"
+    def enum_json_docs(self, name):
+        return [
+            blank,
+            line("// AppendJSON appends the JSON encoding of e to b."),
+            line("func (e {}) AppendJSON(b []byte) []byte".format(name)),
+            block([text("return {}AppendString(b, string(e))".format(self.prefix))]),
+
+            blank,
+            line("// MarshalJSON implements json.Marshaler."),
+            line("func (e {}) MarshalJSON() ([]byte, error)".format(name)),
+            block([text("return e.AppendJSON(nil), nil")]),
+
+            blank,
+            line("// UnmarshalJSON implements json.Unmarshaler."),
+            line("func (e *{}) UnmarshalJSON(data []byte) error".format(name)),
+            block([
+                text("d := {}JSONDecoder{{data: data}}".format(self.prefix)),
+                text("if !d.null()") + block([
+                    text("*e = {}(d.string())".format(name))
+                ]),
+                text("return d.end()")
+            ]),
+        ]
+
+    def struct_json_docs(self, name, fields):
+        """Generate JSON methods specialized to a struct's fields.  The
+        struct is encoded with its fields in order and decoded by
+        switching on its known keys, which are matched the same way
+        encoding/json matches them.
+
+        Parameters:
+          name(str): The name of the struct type.
+          fields(list): Its Attributes or Parameters.
+
+        Returns:
+          Doc list: -
+        """
+        appends = []
+        for i, field in enumerate(fields):
+            appends.append(text('b = append(b, `{}"{}":`...)'.format("," if i else "{", field.name)))
+            appends.extend(self.generate_append(field.type, "r." + _field_name(field), 0))
+
+        if fields:
+            appends.append(text("return append(b, '}')"))
+        else:
+            appends.append(text('return append(b, "{}"...)'))
+
+        cases = [
+            ("case {}:".format(i), self.generate_decode(field.type, "r." + _field_name(field), 0))
+            for i, field in enumerate(fields)
+        ]
+        cases.append(("default:", [text("d.skip()")]))
+        keys = ", ".join('"{}"'.format(field.name) for field in fields)
+
+        return [
+            blank,
+            line("// AppendJSON appends the JSON encoding of r to b."),
+            line("func (r {}) AppendJSON(b []byte) []byte".format(name)),
+            block(appends),
+
+            blank,
+            line("// MarshalJSON implements json.Marshaler."),
+            line("func (r {}) MarshalJSON() ([]byte, error)".format(name)),
+            block([text("return r.AppendJSON(nil), nil")]),
+
+            blank,
+            line("// UnmarshalJSON implements json.Unmarshaler."),
+            line("func (r *{}) UnmarshalJSON(data []byte) error".format(name)),
+            block([
+                text("d := {}JSONDecoder{{data: data}}".format(self.prefix)),
+                text("if !d.null()") + block([
+                    text("r.decodeJSON(&d)")
+                ]),
+                text("return d.end()")
+            ]),
+
+            blank,
+            line("func (r *{}) decodeJSON(d *{}JSONDecoder)".format(name, self.prefix)),
+            block([
+                text("if !d.open('{')") + block([
+                    text("return")
+                ]),
+                text("for i := 0; d.more('}', i); i++") + block([
+                    _switch("switch d.field({})".format(keys), cases)
+                ]),
+            ]),
+        ]
+
+    @dispatch(ast.Type)
+    def generate_append(self, tipe, value, depth):
+        """Generate the statements that append the JSON encoding of a
+        value to a byte slice called b.
+
+        Parameters:
+          tipe(ast.Expression): The type of the value.
+          value(str): A Go expression that evaluates to the value.
+          depth(int): How many lists and dicts the value is nested in.
+            Loop variables are suffixed with it.
+
+        Returns:
+          Doc list: -
+        """
+        if tipe.name == "Bool":
+            statement = "b = strconv.AppendBool(b, {})"
+        elif tipe.name == "Int":
+            statement = "b = strconv.AppendInt(b, int64({}), 10)"
+        elif tipe.name in ("Float", "Timestamp"):
+            statement = "b = " + self.prefix + "AppendFloat(b, {})"
+        elif tipe.name == "String":
+            statement = "b = " + self.prefix + "AppendString(b, {})"
+        elif isinstance(self.model.types.get(tipe.name), (ast.Enum, ast.Record)):
+            statement = "b = {}.AppendJSON(b)"
+        else:
+            statement = "b = " + self.prefix + "AppendAny(b, {})"
+
+        return [text(statement.format(value))]
+
+    @dispatch(ast.Nullable)
+    def generate_append(self, tipe, value, depth):
+        return [
+            text("if {} == nil".format(value)) + block([
+                text('b = append(b, "null"...)')
+            ]) + text(" else") + block(self.generate_append(tipe.type, "(*{})".format(value), depth))
+        ]
+
+    @dispatch(ast.List)
+    def generate_append(self, tipe, value, depth):
+        index, item = "i{}".format(depth), "x{}".format(depth)
+        return [
+            text("if {} == nil".format(value)) + block([
+                text('b = append(b, "null"...)')
+            ]) + text(" else") + block([
+                text("b = append(b, '[')"),
+                text("for {}, {} := range {}".format(index, item, value)) + block([
+                    text("if {} > 0".format(index)) + block([
+                        text("b = append(b, ',')")
+                    ]),
+                    *self.generate_append(tipe.type, item, depth + 1)
+                ]),
+                text("b = append(b, ']')"),
+            ])
+        ]
+
+    @dispatch(ast.Dict)
+    def generate_append(self, tipe, value, depth):
+        # encoding/json sorts map keys, and so do we.
+        self.imports.add("sort")
+        index, key, keys = "i{}".format(depth), "k{}".format(depth), "keys{}".format(depth)
+        return [
+            text("if {} == nil".format(value)) + block([
+                text('b = append(b, "null"...)')
+            ]) + text(" else") + block([
+                text("{} := make([]string, 0, len({}))".format(keys, value)),
+                text("for {} := range {}".format(key, value)) + block([
+                    text("{0} = append({0}, {1})".format(keys, key))
+                ]),
+                text("sort.Strings({})".format(keys)),
+                text("b = append(b, '{')"),
+                text("for {}, {} := range {}".format(index, key, keys)) + block([
+                    text("if {} > 0".format(index)) + block([
+                        text("b = append(b, ',')")
+                    ]),
+                    text("b = {}AppendString(b, {})".format(self.prefix, key)),
+                    text("b = append(b, ':')"),
+                    *self.generate_append(tipe.values_type, "{}[{}]".format(value, key), depth + 1)
+                ]),
+                text("b = append(b, '}')"),
+            ])
+        ]
+
+    @dispatch(ast.Type)
+    def generate_decode(self, tipe, target, depth):
+        """Generate the statements that decode a value from a
+        JSONDecoder called d.  Like with encoding/json, null leaves
+        values that can't be nil untouched.
+
+        Parameters:
+          tipe(ast.Expression): The type of the value.
+          target(str): A Go expression the value can be assigned to.
+          depth(int): How many lists and dicts the value is nested in.
+            Loop variables are suffixed with it.
+
+        Returns:
+          Doc list: -
+        """
+        decl = self.model.types.get(tipe.name)
+        if tipe.name in _decoders:
+            statement = "{} = d.{}()".format(target, _decoders[tipe.name])
+        elif isinstance(decl, ast.Enum):
+            statement = "{} = {}(d.string())".format(target, decl.name)
+        elif isinstance(decl, ast.Record):
+            statement = "{}.decodeJSON(d)".format(target)
         else:
-            name = capitalize(node.name)
+            return [text("{} = d.any()".format(target))]
+
+        return [text("if !d.null()") + block([text(statement)])]
 
+    @dispatch(ast.Nullable)
+    def generate_decode(self, tipe, target, depth):
+        return [
+            text("if d.null()") + block([
+                text("{} = nil".format(target))
+            ]) + text(" else") + block([
+                text("if {} == nil".format(target)) + block([
+                    text("{} = new({})".format(target, _type_name(tipe.type)))
+                ]),
+                *self.generate_decode(tipe.type, "(*{})".format(target), depth)
+            ])
+        ]
+
+    @dispatch(ast.List)
+    def generate_decode(self, tipe, target, depth):
+        items, index, item = "s{}".format(depth), "i{}".format(depth), "x{}".format(depth)
+        return [
+            text("if d.null()") + block([
+                text("{} = nil".format(target))
+            ]) + text(" else if d.open('[')") + block([
+                text("{} := {}[:0]".format(items, target)),
+                text("if {} == nil".format(items)) + block([
+                    text("{} = {}{{}}".format(items, _type_name(tipe)))
+                ]),
+                text("for {0} := 0; d.more(']', {0}); {0}++".format(index)) + block([
+                    text("var {} {}".format(item, _type_name(tipe.type))),
+                    *self.generate_decode(tipe.type, item, depth + 1),
+                    text("{0} = append({0}, {1})".format(items, item)),
+                ]),
+                text("{} = {}".format(target, items)),
+            ])
+        ]
+
+    @dispatch(ast.Dict)
+    def generate_decode(self, tipe, target, depth):
+        index, key, item = "i{}".format(depth), "k{}".format(depth), "x{}".format(depth)
+        return [
+            text("if d.null()") + block([
+                text("{} = nil".format(target))
+            ]) + text(" else if d.open('{')") + block([
+                text("if {} == nil".format(target)) + block([
+                    text("{} = make({})".format(target, _type_name(tipe)))
+                ]),
+                text("for {0} := 0; d.more('}}', {0}); {0}++".format(index)) + block([
+                    text("{} := d.key()".format(key)),
+                    text("var {} {}".format(item, _type_name(tipe.values_type))),
+                    *self.generate_decode(tipe.values_type, item, depth + 1),
+                    text("{}[{}] = {}".format(target, key, item)),
+                ]),
+            ])
+        ]
+
+    @dispatch((ast.Attribute, ast.Parameter))
+    def generate_node(self, node):
         return concat(
-            text("{name} ".format(name=name)),
+            text("{name} ".format(name=_field_name(node))),
             self.generate_node(node.type),
             text(' `json:"{}"`'.format(node.name))
         )
 
     @dispatch(ast.Type)
     def generate_node(self, tipe):
-        try:
-            return text({
-                "Bool": "bool",
-                "Float": "float64",
-                "Int": "int",
-                "String": "string",
-                "Timestamp": "float64",
-            }[tipe.name])
-        except KeyError:
-            return text(tipe.name)
+        return text(_builtin_types.get(tipe.name, tipe.name))
 
     @dispatch(ast.Nullable)
     def generate_node(self, tipe):
+        shared = self.use_shared_type(tipe)
+        if shared is not None:
+            return shared
+
         return text("*") + self.generate_node(tipe.type)
 
     @dispatch(ast.List)
     def generate_node(self, tipe):
+        shared = self.use_shared_type(tipe)
+        if shared is not None:
+            return shared
+
         return text("[]") + self.generate_node(tipe.type)
 
     @dispatch(ast.Dict)
     def generate_node(self, tipe):
+        shared = self.use_shared_type(tipe)
+        if shared is not None:
+            return shared
+
         return concat(
             text("map[string]"),
             self.generate_node(tipe.values_type)
@@ -290,3 +1378,46 @@ class _Generator:
     @dispatch(ast.Union)
     def generate_node(self, tipe):
         return text("interface{}")
+
+
+_builtin_types = {
+    "Bool": "bool",
+    "Float": "float64",
+    "Int": "int",
+    "String": "string",
+    "Timestamp": "float64",
+}
+
+#: The JSONDecoder methods that read each builtin type.
+_decoders = {
+    "Bool": "bool",
+    "Float": "float",
+    "Int": "int",
+    "String": "string",
+    "Timestamp": "float",
+}
+
+_samples = {
+    "Bool": "true",
+    "Float": "1.25e-7",
+    "Int": "-42",
+    "String": r'"caf\u00e9 <&> \"quoted\" \\ \n\t\u2028"',
+    "Timestamp": "1500000000.25",
+}
+_sample_depth = 3
+
+#: The helpers the generated JSON methods are built on.  Their names
+#: are prefixed with the server's so that servers generated from
+#: different modules can share a package.  The template is read from
+#: go_json_runtime.go the first time it's needed.
+_json_runtime = None
+
+
+def _load_json_runtime():
+    global _json_runtime
+    if _json_runtime is None:
+        filename = os.path.join(os.path.dirname(__file__), "go_json_runtime.go")
+        with open(filename, encoding="utf-8") as f:
+            _json_runtime = Template(f.read().rstrip("\n"))
+
+    return _json_runtime
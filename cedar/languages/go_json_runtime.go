@@ -0,0 +1,433 @@
+// ${p}AppendString appends s to b as a JSON string, escaped the way
+// encoding/json escapes it.
+func ${p}AppendString(b []byte, s string) []byte {
+	const hex = "0123456789abcdef"
+	b = append(b, '"')
+	start := 0
+	for i := 0; i < len(s); {
+		if c := s[i]; c < utf8.RuneSelf {
+			if c >= 0x20 && c != '"' && c != '\\' && c != '<' && c != '>' && c != '&' {
+				i++
+				continue
+			}
+			b = append(b, s[start:i]...)
+			switch c {
+			case '"', '\\':
+				b = append(b, '\\', c)
+			case '\n':
+				b = append(b, '\\', 'n')
+			case '\r':
+				b = append(b, '\\', 'r')
+			case '\t':
+				b = append(b, '\\', 't')
+			default:
+				b = append(b, '\\', 'u', '0', '0', hex[c>>4], hex[c&0xf])
+			}
+			i++
+			start = i
+			continue
+		}
+		r, size := utf8.DecodeRuneInString(s[i:])
+		if r == utf8.RuneError && size == 1 {
+			b = append(b, s[start:i]...)
+			b = append(b, `\ufffd`...)
+		} else if r == '\u2028' || r == '\u2029' {
+			b = append(b, s[start:i]...)
+			b = append(b, '\\', 'u', '2', '0', '2', hex[r&0xf])
+		} else {
+			i += size
+			continue
+		}
+		i += size
+		start = i
+	}
+	b = append(b, s[start:]...)
+	return append(b, '"')
+}
+
+// ${p}AppendFloat appends f to b formatted the way encoding/json
+// formats float64 values.  JSON can't represent NaN or the
+// infinities so they are encoded as null.
+func ${p}AppendFloat(b []byte, f float64) []byte {
+	if math.IsNaN(f) || math.IsInf(f, 0) {
+		return append(b, "null"...)
+	}
+	format := byte('f')
+	if abs := math.Abs(f); abs != 0 && (abs < 1e-6 || abs >= 1e21) {
+		format = 'e'
+	}
+	b = strconv.AppendFloat(b, f, format, -1, 64)
+	if format == 'e' {
+		// Turn e-09 into e-9.
+		if n := len(b); n >= 4 && b[n-4] == 'e' && b[n-3] == '-' && b[n-2] == '0' {
+			b[n-2] = b[n-1]
+			b = b[:n-1]
+		}
+	}
+	return b
+}
+
+// ${p}AppendAny appends the JSON encoding of a union's value to b.
+// Unions can hold values of any of their member types so encoding
+// them is left to encoding/json.
+func ${p}AppendAny(b []byte, v interface{}) []byte {
+	data, err := json.Marshal(v)
+	if err != nil {
+		return append(b, "null"...)
+	}
+	return append(b, data...)
+}
+
+// ${p}JSONDecoder reads JSON values straight out of a byte slice for
+// the generated UnmarshalJSON methods.  It keeps the first error it
+// runs into, after which every read returns a zero value.
+type ${p}JSONDecoder struct {
+	data []byte
+	pos  int
+	err  error
+}
+
+func (d *${p}JSONDecoder) fail(message string) {
+	if d.err == nil {
+		d.err = errors.New("json: " + message + " at offset " + strconv.Itoa(d.pos))
+	}
+	d.pos = len(d.data)
+}
+
+// end returns the first error, if any, or complains about anything
+// but whitespace after the value that was read.
+func (d *${p}JSONDecoder) end() error {
+	if d.peek(); d.pos < len(d.data) {
+		d.fail("unexpected data after top-level value")
+	}
+	return d.err
+}
+
+// peek skips whitespace and returns the next byte or 0 at the end.
+func (d *${p}JSONDecoder) peek() byte {
+	for ; d.pos < len(d.data); d.pos++ {
+		switch c := d.data[d.pos]; c {
+		case ' ', '\t', '\n', '\r':
+		default:
+			return c
+		}
+	}
+	return 0
+}
+
+func (d *${p}JSONDecoder) literal(word string) bool {
+	if len(d.data)-d.pos >= len(word) && string(d.data[d.pos:d.pos+len(word)]) == word {
+		d.pos += len(word)
+		return true
+	}
+	return false
+}
+
+// null reads a null if that's what comes next.
+func (d *${p}JSONDecoder) null() bool {
+	return d.peek() == 'n' && d.literal("null")
+}
+
+// open reads the given delimiter.
+func (d *${p}JSONDecoder) open(c byte) bool {
+	if d.peek() != c {
+		d.fail("expected " + string(c))
+		return false
+	}
+	d.pos++
+	return true
+}
+
+// more reports whether the array or object being read has an i-th
+// element, reading the comma before it or the closing delimiter c.
+func (d *${p}JSONDecoder) more(c byte, i int) bool {
+	next := d.peek()
+	if next == c {
+		d.pos++
+		return false
+	}
+	if i > 0 {
+		if next != ',' {
+			d.fail("expected , or " + string(c))
+			return false
+		}
+		d.pos++
+	}
+	return d.err == nil
+}
+
+// field reads an object key and returns the index of the name it
+// matches or -1.  Like encoding/json, exact matches are preferred
+// but keys otherwise match names case-insensitively.
+func (d *${p}JSONDecoder) field(names ...string) int {
+	key := d.bytes()
+	d.open(':')
+	for i, name := range names {
+		if string(key) == name {
+			return i
+		}
+	}
+	for i, name := range names {
+		if strings.EqualFold(string(key), name) {
+			return i
+		}
+	}
+	return -1
+}
+
+func (d *${p}JSONDecoder) key() string {
+	key := d.string()
+	d.open(':')
+	return key
+}
+
+// bytes reads a string.  Unless the string has escapes or invalid
+// UTF-8 in it, the result points into the data being decoded.
+func (d *${p}JSONDecoder) bytes() []byte {
+	if d.peek() != '"' {
+		d.fail("expected string")
+		return nil
+	}
+	d.pos++
+	start := d.pos
+	for d.pos < len(d.data) {
+		c := d.data[d.pos]
+		if c == '"' {
+			d.pos++
+			return d.data[start : d.pos-1]
+		}
+		if c == '\\' || c < 0x20 {
+			return d.unquote(start)
+		}
+		if c < utf8.RuneSelf {
+			d.pos++
+			continue
+		}
+		r, size := utf8.DecodeRune(d.data[d.pos:])
+		if r == utf8.RuneError && size == 1 {
+			return d.unquote(start)
+		}
+		d.pos += size
+	}
+	d.fail("unterminated string")
+	return nil
+}
+
+func (d *${p}JSONDecoder) unquote(start int) []byte {
+	b := make([]byte, d.pos-start, d.pos-start+64)
+	copy(b, d.data[start:d.pos])
+	for d.pos < len(d.data) {
+		c := d.data[d.pos]
+		switch {
+		case c == '"':
+			d.pos++
+			return b
+		case c == '\\' && d.pos+1 < len(d.data):
+			d.pos += 2
+			switch e := d.data[d.pos-1]; e {
+			case '"', '\\', '/':
+				b = append(b, e)
+			case 'b':
+				b = append(b, '\b')
+			case 'f':
+				b = append(b, '\f')
+			case 'n':
+				b = append(b, '\n')
+			case 'r':
+				b = append(b, '\r')
+			case 't':
+				b = append(b, '\t')
+			case 'u':
+				r := d.hex()
+				if r < 0 {
+					d.fail("invalid escape in string")
+					return nil
+				}
+				if r >= 0xd800 && r < 0xe000 {
+					// Combine surrogate pairs and replace lone surrogates.
+					next := d.pos
+					if r < 0xdc00 && d.pos+1 < len(d.data) && d.data[d.pos] == '\\' && d.data[d.pos+1] == 'u' {
+						d.pos += 2
+						if low := d.hex(); low >= 0xdc00 && low < 0xe000 {
+							r = (r-0xd800)<<10 | (low - 0xdc00) + 0x10000
+							next = d.pos
+						}
+					}
+					if d.pos = next; r < 0x10000 {
+						r = utf8.RuneError
+					}
+				}
+				var buf [utf8.UTFMax]byte
+				b = append(b, buf[:utf8.EncodeRune(buf[:], r)]...)
+			default:
+				d.fail("invalid escape in string")
+				return nil
+			}
+		case c < 0x20 || c == '\\':
+			d.fail("invalid character in string")
+			return nil
+		case c < utf8.RuneSelf:
+			b = append(b, c)
+			d.pos++
+		default:
+			r, size := utf8.DecodeRune(d.data[d.pos:])
+			if r == utf8.RuneError && size == 1 {
+				b = append(b, "\ufffd"...)
+			} else {
+				b = append(b, d.data[d.pos:d.pos+size]...)
+			}
+			d.pos += size
+		}
+	}
+	d.fail("unterminated string")
+	return nil
+}
+
+// hex reads the four hex digits of a \u escape, or returns -1.
+func (d *${p}JSONDecoder) hex() rune {
+	if len(d.data)-d.pos < 4 {
+		return -1
+	}
+	var r rune
+	for _, c := range d.data[d.pos : d.pos+4] {
+		switch {
+		case '0' <= c && c <= '9':
+			c -= '0'
+		case 'a' <= c && c <= 'f':
+			c -= 'a' - 10
+		case 'A' <= c && c <= 'F':
+			c -= 'A' - 10
+		default:
+			return -1
+		}
+		r = r<<4 | rune(c)
+	}
+	d.pos += 4
+	return r
+}
+
+func (d *${p}JSONDecoder) string() string {
+	return string(d.bytes())
+}
+
+func (d *${p}JSONDecoder) bool() bool {
+	switch d.peek() {
+	case 't':
+		if d.literal("true") {
+			return true
+		}
+	case 'f':
+		if d.literal("false") {
+			return false
+		}
+	}
+	d.fail("expected boolean")
+	return false
+}
+
+// number reads a number, following JSON's grammar to the letter.
+func (d *${p}JSONDecoder) number() []byte {
+	d.peek()
+	start := d.pos
+	if d.pos < len(d.data) && d.data[d.pos] == '-' {
+		d.pos++
+	}
+	first := d.pos
+	if n := d.digits(); n == 0 || n > 1 && d.data[first] == '0' {
+		d.fail("invalid number")
+		return nil
+	}
+	if d.pos < len(d.data) && d.data[d.pos] == '.' {
+		d.pos++
+		if d.digits() == 0 {
+			d.fail("invalid number")
+			return nil
+		}
+	}
+	if d.pos < len(d.data) && (d.data[d.pos] == 'e' || d.data[d.pos] == 'E') {
+		d.pos++
+		if d.pos < len(d.data) && (d.data[d.pos] == '+' || d.data[d.pos] == '-') {
+			d.pos++
+		}
+		if d.digits() == 0 {
+			d.fail("invalid number")
+			return nil
+		}
+	}
+	return d.data[start:d.pos]
+}
+
+func (d *${p}JSONDecoder) digits() int {
+	start := d.pos
+	for d.pos < len(d.data) && d.data[d.pos] >= '0' && d.data[d.pos] <= '9' {
+		d.pos++
+	}
+	return d.pos - start
+}
+
+func (d *${p}JSONDecoder) int() int {
+	number := d.number()
+	if d.err != nil {
+		return 0
+	}
+	n, err := strconv.ParseInt(string(number), 10, 0)
+	if err != nil {
+		d.fail("invalid integer " + strconv.Quote(string(number)))
+	}
+	return int(n)
+}
+
+func (d *${p}JSONDecoder) float() float64 {
+	number := d.number()
+	if d.err != nil {
+		return 0
+	}
+	f, err := strconv.ParseFloat(string(number), 64)
+	if err != nil {
+		d.fail("invalid number " + strconv.Quote(string(number)))
+	}
+	return f
+}
+
+// skip reads a value of any type and throws it away.
+func (d *${p}JSONDecoder) skip() {
+	switch d.peek() {
+	case '"':
+		d.bytes()
+	case '{':
+		d.pos++
+		for i := 0; d.more('}', i); i++ {
+			d.bytes()
+			d.open(':')
+			d.skip()
+		}
+	case '[':
+		d.pos++
+		for i := 0; d.more(']', i); i++ {
+			d.skip()
+		}
+	case 't', 'f':
+		d.bool()
+	case 'n':
+		if !d.null() {
+			d.fail("expected null")
+		}
+	default:
+		d.number()
+	}
+}
+
+// any reads a union's value, which can be of any of the union's
+// member types, with encoding/json.
+func (d *${p}JSONDecoder) any() interface{} {
+	d.peek()
+	start := d.pos
+	if d.skip(); d.err != nil {
+		return nil
+	}
+	var v interface{}
+	if err := json.Unmarshal(d.data[start:d.pos], &v); err != nil {
+		d.fail(err.Error())
+	}
+	return v
+}
@@ -1,6 +1,8 @@
-from . import ast
-from .errors import ParseError, TypeErrors
-from .tokenizer import TokenKind, tokenize
+from sys import intern
+
+from . import ast, semantics, timings
+from .errors import LineIndex, ParseError, ParseErrors, TypeErrors
+from .tokenizer import TokenKind, tokenize_bulk
 from .typechecker import Typechecker
 
 
@@ -13,8 +15,10 @@ def parse(source, *, filename="[STRING]", typecheck=True):
       typecheck(bool): Type errors are ignored if this is falsy.
 
     Raises:
-      ParseError: If a syntax error has been encountered.
-      TypeError: If one or more type errors have been encountered.
+      ParseErrors: If one or more syntax errors have been encountered.
+        The parser recovers from syntax errors at the start of the
+        next declaration so that every one of them can be reported.
+      TypeErrors: If one or more type errors have been encountered.
 
     Returns:
       Module: an AST representing the parsed source.
@@ -22,211 +26,331 @@ def parse(source, *, filename="[STRING]", typecheck=True):
     return _Parser(filename, source, typecheck).parse()
 
 
+_enum = TokenKind.enum.value
+_union = TokenKind.union.value
+_record = TokenKind.record.value
+_function = TokenKind.function.value
+_name = TokenKind.name.value
+_cap_name = TokenKind.cap_name.value
+_qmark = TokenKind.qmark.value
+_comma = TokenKind.comma.value
+_colon = TokenKind.colon.value
+_lparen = TokenKind.lparen.value
+_rparen = TokenKind.rparen.value
+_lbrace = TokenKind.lbrace.value
+_rbrace = TokenKind.rbrace.value
+_lbracket = TokenKind.lbracket.value
+_rbracket = TokenKind.rbracket.value
+_newline = TokenKind.newline.value
+_invalid = TokenKind.invalid.value
+_eof = TokenKind.eof.value
+
+#: The kinds of tokens each declaration can start with.
+_first_declaration = frozenset([_enum, _union, _record, _function])
+
+# Checks are recorded as plain functions rather than bound methods so
+# that parsers don't end up in reference cycles with themselves.
+_declare_type = Typechecker.declare_type
+_declare_fn = Typechecker.declare_fn
+_check_node = Typechecker.check_node
+
+
 class _Parser(Typechecker):
     def __init__(self, file_name, file_contents, check_types):
         super().__init__()
 
         self.file_name = file_name
         self.file_contents = file_contents
+        self.line_index = LineIndex(file_contents)
         self.check_types = check_types
-        self.tokens = tokenize(file_name, file_contents)
-        self.token = next(self.tokens)
+        with timings.phase("tokenize"):
+            self.tokens = tokenize_bulk(file_name, file_contents)
+
+        self.kinds = self.tokens.kinds
+        self.starts = self.tokens.starts
+        self.ends = self.tokens.ends
+        self.last = len(self.kinds) - 1
+        self.invalid = self.kinds.index(_invalid) if _invalid in self.kinds else -1
+        self.index = 0
+        self.offset = 0
+        self.previous_end = 0
+        self.parse_errors = []
 
     def parse(self):
-        module = self.parse_module()
-        if self.check_types and self.type_errors:
-            raise TypeErrors(self.type_errors)
+        with timings.phase("parse"):
+            module = self.parse_module()
+
+        if self.check_types:
+            with timings.phase("typecheck"):
+                self.run_checks(semantics.analyze(module))
+
+            if self.type_errors:
+                raise TypeErrors(self.type_errors)
+
         return module
 
     def parse_module(self):
-        dispatch = {
-            TokenKind.enum: self.parse_enum,
-            TokenKind.union: self.parse_union,
-            TokenKind.record: self.parse_record,
-            TokenKind.function: self.parse_function
-        }
-
+        kinds = self.kinds
+        declaration_parsers = self.declaration_parsers
         declarations = []
-        while not self.peek(TokenKind.eof):
-            self.skip_newlines()
-            token = self.peek(*dispatch.keys())
-            if not token:
-                token = self.next()
-                raise self.signal_parse_error(
-                    "expected function, record or enum, got {.name}".format(token.kind),
-                    token
-                )
-
-            declarations.append(dispatch[token.kind]())
+        while kinds[self.index] != _eof:
+            start = self.index
+            try:
+                if start == self.invalid:
+                    self.signal_invalid()
+
+                self.skip_newlines()
+                kind = kinds[self.index]
+                if kind == _eof:
+                    break
+
+                if kind not in _first_declaration:
+                    index = self.next()
+                    raise self.signal_parse_error(
+                        "expected function, record or enum, got {.name}".format(self.tokens.kind(index)),
+                        index
+                    )
+
+                declaration = declaration_parsers[kind](self)
+                declarations.append(declaration)
+                self.previous_end = self.offset + declaration.length
+            except ParseError as e:
+                self.parse_errors.append(e)
+                self.synchronize(max(self.index, start + 1))
+
+        if self.parse_errors:
+            raise ParseErrors(self.parse_errors)
 
         return ast.Module(self.file_name, declarations)
 
+    def synchronize(self, index):
+        """Skip ahead to the next declaration that starts on a new line
+        at or after index.
+        """
+        kinds = self.kinds
+        while kinds[index] != _eof and (kinds[index] not in _first_declaration or kinds[index - 1] != _newline):
+            index += 1
+
+        self.index = index
+        if 0 <= self.invalid < index:
+            self.invalid = next((i for i in range(index, self.last) if kinds[i] == _invalid), -1)
+
     def parse_enum(self):
-        self.consume(TokenKind.enum)
-        name = token = self.consume(TokenKind.cap_name)
-        self.declare_type(token.value, token)
-        self.consume(TokenKind.lbrace)
+        first = self.consume(_enum)
+        self.offset = self.starts[first]
+        name = self.consume(_cap_name)
+        self.checks.append((_declare_type, self.value(name), name))
+        self.consume(_lbrace)
 
         tags = self.separated_by(
-            kind=TokenKind.comma,
+            kind=_comma,
             parser=self.parse_tag,
-            until=TokenKind.rbrace
+            until=_rbrace
         )
         self.skip_newlines()
-        self.consume(TokenKind.rbrace)
+        last = self.consume(_rbrace)
         self.skip_newlines()
 
-        return ast.Enum(name.value, tags)
+        return ast.Enum(
+            self.value(name), tags,
+            start=self.offset - self.previous_end, length=self.ends[last] - self.offset
+        )
 
     def parse_tag(self):
-        return ast.Tag(self.consume(TokenKind.cap_name).value)
+        index = self.consume(_cap_name)
+        start = self.starts[index]
+        return ast.Tag(self.value(index), start=start - self.offset, length=self.ends[index] - start)
 
     def parse_union(self):
-        self.consume(TokenKind.union)
-        name = token = self.consume(TokenKind.cap_name)
-        self.declare_type(token.value, token)
-        self.consume(TokenKind.lbrace)
+        first = self.consume(_union)
+        self.offset = self.starts[first]
+        name = self.consume(_cap_name)
+        self.checks.append((_declare_type, self.value(name), name))
+        self.consume(_lbrace)
 
         self.skip_newlines()
         types = [self.parse_type_tag()]
-        self.skip_one(TokenKind.comma)
+        self.skip_one(_comma)
 
         types += self.separated_by(
-            kind=TokenKind.comma,
+            kind=_comma,
             parser=self.parse_type_tag,
-            until=TokenKind.rbrace
+            until=_rbrace
         )
         self.skip_newlines()
-        self.consume(TokenKind.rbrace)
+        last = self.consume(_rbrace)
         self.skip_newlines()
 
-        return ast.Union(name.value, types)
+        return ast.Union(
+            self.value(name), types,
+            start=self.offset - self.previous_end, length=self.ends[last] - self.offset
+        )
 
     def parse_type_tag(self):
-        token = self.consume(TokenKind.cap_name)
-        return self.typecheck(ast.Type(token.value), token)
+        index = self.consume(_cap_name)
+        tipe = ast.Type(self.value(index))
+        self.checks.append((_check_node, tipe, index))
+        return tipe
 
     def parse_record(self):
-        self.consume(TokenKind.record)
-        name = token = self.consume(TokenKind.cap_name)
-        self.declare_type(token.value, token)
-        self.consume(TokenKind.lbrace)
+        first = self.consume(_record)
+        self.offset = self.starts[first]
+        name = self.consume(_cap_name)
+        self.checks.append((_declare_type, self.value(name), name))
+        self.consume(_lbrace)
 
         attributes = []
         self.skip_newlines()
-        while not self.peek(TokenKind.rbrace):
+        while not self.peek(_rbrace):
             self.skip_newlines()
             attributes.append(self.parse_attribute())
-            if not self.peek(TokenKind.rbrace):
-                self.consume(TokenKind.newline)
+            if not self.peek(_rbrace):
+                self.consume(_newline)
 
         self.skip_newlines()
-        self.consume(TokenKind.rbrace)
-        if not self.peek(TokenKind.eof):
-            self.consume(TokenKind.newline)
+        last = self.consume(_rbrace)
+        if not self.peek(_eof):
+            self.consume(_newline)
 
-        return ast.Record(name.value, attributes)
+        return ast.Record(
+            self.value(name), attributes,
+            start=self.offset - self.previous_end, length=self.ends[last] - self.offset
+        )
 
     def parse_attribute(self):
-        token = self.consume(TokenKind.name, message="the name of an attribute")
-        return ast.Attribute(token.value, self.parse_type())
+        index = self.consume(_name, message="the name of an attribute")
+        tipe = self.parse_type()
+        start = self.starts[index]
+        return ast.Attribute(
+            self.value(index), tipe,
+            start=start - self.offset, length=self.ends[self.index - 1] - start
+        )
 
     def parse_function(self):
-        self.consume(TokenKind.function)
-        name = token = self.consume(TokenKind.name)
-        self.declare_fn(token.value, token)
-        self.consume(TokenKind.lparen)
+        first = self.consume(_function)
+        self.offset = self.starts[first]
+        name = self.consume(_name)
+        self.checks.append((_declare_fn, self.value(name), name))
+        self.consume(_lparen)
 
         parameters = self.separated_by(
-            kind=TokenKind.comma,
+            kind=_comma,
             parser=self.parse_parameter,
-            until=TokenKind.rparen
+            until=_rparen
         )
         self.skip_newlines()
-        self.consume(TokenKind.rparen)
+        self.consume(_rparen)
         self.skip_newlines()
 
         return_type = self.parse_type()
-        if not self.peek(TokenKind.eof):
-            self.consume(TokenKind.newline)
+        end = self.ends[self.index - 1]
+        if not self.peek(_eof):
+            self.consume(_newline)
 
-        return ast.Function(name.value, parameters, return_type)
+        return ast.Function(
+            self.value(name), parameters, return_type,
+            start=self.offset - self.previous_end, length=end - self.offset
+        )
 
     def parse_parameter(self):
-        token = self.consume(TokenKind.name, message="a name for the parameter")
-        return ast.Parameter(token.value, self.parse_type())
+        index = self.consume(_name, message="a name for the parameter")
+        tipe = self.parse_type()
+        start = self.starts[index]
+        return ast.Parameter(
+            self.value(index), tipe,
+            start=start - self.offset, length=self.ends[self.index - 1] - start
+        )
 
     def parse_type(self):
-        if self.peek(TokenKind.lbracket):
+        kind = self.kinds[self.index]
+        if kind == _lbracket:
             tipe = self.parse_list()
 
-        elif self.peek(TokenKind.lbrace):
+        elif kind == _lbrace:
             tipe = self.parse_dict()
 
         else:
-            token = self.consume(TokenKind.cap_name, message="the name of a type")
-            tipe = self.typecheck(ast.Type(token.value), token)
+            index = self.consume(_cap_name, message="the name of a type")
+            tipe = ast.Type(self.value(index))
+            self.checks.append((_check_node, tipe, index))
 
-        if self.skip_one(TokenKind.qmark):
+        if self.skip_one(_qmark) is not None:
             return ast.Nullable(tipe)
 
         return tipe
 
     def parse_list(self):
-        self.consume(TokenKind.lbracket)
+        self.consume(_lbracket)
         tipe = self.parse_type()
-        self.consume(TokenKind.rbracket)
+        self.consume(_rbracket)
         return ast.List(tipe)
 
     def parse_dict(self):
-        self.consume(TokenKind.lbrace)
-        keys_type = token = self.consume(TokenKind.cap_name)
-        self.consume(TokenKind.colon)
+        self.consume(_lbrace)
+        keys_type = self.consume(_cap_name)
+        self.consume(_colon)
         values_type = self.parse_type()
-        self.consume(TokenKind.rbrace)
-        return self.typecheck(ast.Dict(ast.Type(keys_type.value), values_type), token)
+        self.consume(_rbrace)
+        tipe = ast.Dict(ast.Type(self.value(keys_type)), values_type)
+        self.checks.append((_check_node, tipe, keys_type))
+        return tipe
 
-    def signal_parse_error(self, message, token):
-        raise ParseError(message, self.file_name, self.file_contents, token.line, token.column)
+    def signal_parse_error(self, message, index):
+        raise ParseError(
+            message, self.file_name, self.line_index,
+            self.tokens.lines[index], self.tokens.columns[index]
+        )
+
+    def value(self, index):
+        # Names are interned so that every occurrence of a name in a
+        # Module shares the same string.
+        return intern(self.file_contents[self.starts[index]:self.ends[index]])
+
+    def signal_invalid(self):
+        index = self.index
+        raise self.signal_parse_error("unexpected {!r}".format(self.value(index)), index)
 
-    def consume(self, *kinds, message=None):
-        token = self.token
-        if token.kind not in kinds:
+    def consume(self, kind, *, message=None):
+        index = self.index
+        if self.kinds[index] != kind:
             message = "expected {}, found {.name}".format(
-                message or " or ".join(k.name for k in kinds),
-                token.kind
+                message or TokenKind(kind).name,
+                self.tokens.kind(index)
             )
-            raise self.signal_parse_error(message, token)
+            raise self.signal_parse_error(message, index)
 
-        self.next()
-        return token
+        if index < self.last:
+            self.index = index + 1
+            if index + 1 == self.invalid:
+                self.signal_invalid()
 
-    def peek(self, *kinds):
-        if self.token.kind in kinds:
-            return self.token
+        return index
 
-        return None
+    def peek(self, kind):
+        return self.kinds[self.index] == kind
 
     def next(self):
-        try:
-            self.token = token = next(self.tokens)
-            return token
-        except StopIteration:
-            return self.token
-
-    def skip_one(self, *kinds):
-        if self.peek(*kinds):
+        index = self.index
+        if index < self.last:
+            self.index = index = index + 1
+            if index == self.invalid:
+                self.signal_invalid()
+
+        return index
+
+    def skip_one(self, kind):
+        if self.kinds[self.index] == kind:
             return self.next()
 
-    def skip_many(self, *kinds):
+    def skip_many(self, kind):
         last = None
-        while self.peek(*kinds):
+        while self.kinds[self.index] == kind:
             last = self.next()
 
         return last
 
     def skip_newlines(self):
-        return self.skip_many(TokenKind.newline)
+        return self.skip_many(_newline)
 
     def separated_by(self, *, kind, parser, until):
         elems = []
@@ -243,3 +367,11 @@ class _Parser(Typechecker):
             self.skip_newlines()
 
         return elems
+
+    #: Maps the kind of the token every declaration starts with to the
+    #: method that parses that declaration.
+    declaration_parsers = [None] * (_eof + 1)
+    declaration_parsers[_enum] = parse_enum
+    declaration_parsers[_union] = parse_union
+    declaration_parsers[_record] = parse_record
+    declaration_parsers[_function] = parse_function
@@ -1,8 +1,6 @@
-import operator
-
-from collections import namedtuple
-from functools import reduce
-from multipledispatch import dispatch
+from collections import deque, namedtuple
+from io import StringIO
+from itertools import islice
 
 
 class IndentConfig(namedtuple("IndentConfig", "offset indent_by indent_char")):
@@ -18,7 +16,11 @@ class IndentConfig(namedtuple("IndentConfig", "offset indent_by indent_char")):
 
 
 class Doc:
-    pass
+    def __add__(self, other):
+        if isinstance(other, Nil):
+            return self
+
+        return concat(self, other)
 
 
 class Nil(Doc, namedtuple("Nil", "")):
@@ -27,57 +29,83 @@ class Nil(Doc, namedtuple("Nil", "")):
 
 
 class Text(Doc, namedtuple("Text", "value doc")):
-    @dispatch(Nil)
-    def __add__(self, _):
-        return self
-
-    @dispatch(Doc)
-    def __add__(self, other):
-        return Text(self.value, self.doc + other)
+    pass
 
 
 class Line(Doc, namedtuple("Line", "doc")):
-    @dispatch(Nil)
-    def __add__(self, _):
-        return self
-
-    @dispatch(Doc)
-    def __add__(self, other):
-        return Line(self.doc + other)
+    pass
 
 
 class Block(Doc, namedtuple("Block", "docs")):
-    @dispatch(Nil)
-    def __add__(self, _):
-        return self
+    pass
 
-    @dispatch(Doc)
-    def __add__(self, other):
-        return Layout([self, other])
 
+class Group(Doc, namedtuple("Group", "doc")):
+    pass
 
-class Layout(Doc, namedtuple("Layout", "children")):
-    @dispatch(Nil)
-    def __add__(self, _):
-        return self
 
-    @dispatch((Text, Line, Block))
-    def __add__(self, other):
-        return Layout(self.children + [other])
+class SoftLine(Doc, namedtuple("SoftLine", "flat")):
+    pass
+
+
+class Layout(Doc):
+    """A sequence of Docs.
+
+    Layouts are views over a shared, append-only buffer.  Adding to
+    the Layout that was last built on top of a buffer extends that
+    buffer in place whereas adding to any older Layout copies the part
+    of the buffer that it can see.  Every Layout is therefore
+    immutable, but chains like ``a + b + c + ...`` are built in linear
+    time.
+    """
+
+    __slots__ = ["buffer", "size"]
+
+    def __init__(self, children=()):
+        self.buffer = list(children)
+        self.size = len(self.buffer)
+
+    @classmethod
+    def from_buffer(cls, buffer):
+        layout = cls.__new__(cls)
+        layout.buffer = buffer
+        layout.size = len(buffer)
+        return layout
+
+    @property
+    def children(self):
+        return self.buffer[:self.size]
+
+    def __iter__(self):
+        return islice(self.buffer, self.size)
+
+    def __len__(self):
+        return self.size
+
+    def __repr__(self):
+        return "Layout({!r})".format(self.children)
 
-    @dispatch(Doc)
     def __add__(self, other):
-        return Layout(self.children + other.children)
+        if isinstance(other, Nil):
+            return self
 
+        buffer = self.buffer
+        if len(buffer) != self.size:
+            buffer = buffer[:self.size]
 
-@dispatch(Doc)
-def line(doc):
-    return Line(doc)
+        if isinstance(other, Layout):
+            buffer.extend(list(other))
+        else:
+            buffer.append(other)
 
+        return Layout.from_buffer(buffer)
 
-@dispatch(str)
-def line(string):
-    return Line(text(string))
+
+def line(doc):
+    if isinstance(doc, str):
+        doc = text(doc)
+
+    return Line(doc)
 
 
 def text(value, doc=Nil()):
@@ -87,7 +115,33 @@ blank = line(text(""))
 
 
 def concat(*children):
-    return reduce(operator.add, children, Layout([]))
+    buffer = []
+    for child in children:
+        if isinstance(child, Layout):
+            buffer.extend(child)
+        elif not isinstance(child, Nil):
+            buffer.append(child)
+
+    return Layout.from_buffer(buffer)
+
+
+def group(doc):
+    """Lay doc out on a single line if it fits in the remaining width,
+    breaking every SoftLine that belongs directly to it otherwise.
+    """
+    return Group(doc)
+
+
+def nest(doc):
+    """Indent every line break inside doc by one level.
+    """
+    return Block([doc])
+
+
+def softline(flat=""):
+    """A line break that renders as flat when its group fits.
+    """
+    return SoftLine(flat)
 
 
 def block(children, tokens="{}"):
@@ -103,26 +157,220 @@ def block(children, tokens="{}"):
     )
 
 
-@dispatch(Layout, IndentConfig)
-def pretty_print(layout, config):
-    return "".join(pretty_print(child, config) for child in layout.children)
-
-
-@dispatch(Text, IndentConfig)
-def pretty_print(text, config):
-    return text.value + pretty_print(text.doc, config)
-
-
-@dispatch(Line, IndentConfig)
-def pretty_print(line, config):
-    return "\n" + config.render() + pretty_print(line.doc, config)
-
-
-@dispatch(Block, IndentConfig)
-def pretty_print(block, config):
-    return "".join(pretty_print(doc, config.indent()) for doc in block.docs)
+def pretty_print(doc, config, *, width=80):
+    """Render a Doc to a string.
 
+    Parameters:
+      doc(Doc): The document to render.
+      config(IndentConfig): The indentation settings to render with.
+      width(int): The preferred maximum line width.
 
-@dispatch(Nil, IndentConfig)
-def pretty_print(_, config):
-    return ""
+    Returns:
+      str: The rendered document.
+    """
+    stream = StringIO()
+    pretty_print_to(doc, config, stream, width=width)
+    return stream.getvalue()
+
+
+def pretty_print_to(doc, config, stream, *, width=80, chunk_size=4096):
+    """Render a Doc to a file-like object.
+
+    The document is walked iteratively so arbitrarily deep Docs can be
+    rendered and output is written out in batches of chunk_size
+    strings so that the rendered document is never held in memory in
+    its entirety.
+
+    Groups are laid out using Oppen's algorithm: the renderer never
+    looks further ahead than the remaining width of the current line
+    so rendering takes linear time regardless of how groups are
+    nested.
+
+    Parameters:
+      doc(Doc): The document to render.
+      config(IndentConfig): The indentation settings to render with.
+      stream(file): Any object with a write method.
+      width(int): The preferred maximum line width.
+      chunk_size(int): The number of strings to buffer between writes.
+    """
+    printer = _Printer(config, stream, width, chunk_size)
+    stack = [(iter((doc,)), 0)]
+    while stack:
+        docs, depth = stack[-1]
+        for doc in docs:
+            if isinstance(doc, Text):
+                printer.text(doc.value)
+                nested = doc.doc
+
+            elif isinstance(doc, Line):
+                printer.line(depth)
+                nested = doc.doc
+
+            elif isinstance(doc, Layout):
+                stack.append((iter(doc), depth))
+                break
+
+            elif isinstance(doc, Block):
+                stack.append((iter(doc.docs), depth + 1))
+                break
+
+            elif isinstance(doc, SoftLine):
+                printer.softline(doc.flat, depth)
+                continue
+
+            elif isinstance(doc, Group):
+                printer.begin()
+                stack.append((iter((_end,)), depth))
+                stack.append((iter((doc.doc,)), depth))
+                break
+
+            elif doc is _end:
+                printer.end()
+                continue
+
+            else:
+                continue
+
+            if not isinstance(nested, Nil):
+                stack.append((iter((nested,)), depth))
+                break
+
+        else:
+            stack.pop()
+
+    printer.flush()
+
+
+_end = object()
+
+_TEXT, _LINE, _SOFTLINE, _BEGIN, _END = range(5)
+
+
+class _Printer:
+    """Oppen-style line breaking printer.
+
+    Tokens that belong to groups whose layout is still undecided are
+    buffered along with the total width they'd take up if they were
+    laid out flat.  As soon as the outermost pending group can no
+    longer fit on the current line it is broken and the buffer is
+    flushed up to the next pending group.  Groups that close while
+    pending have their size recorded so that they can be decided when
+    they are flushed.  Hard lines never fit, so they break every
+    pending group.
+    """
+
+    def __init__(self, config, stream, width, chunk_size):
+        self.config = config
+        self.stream = stream
+        self.width = width
+        self.chunk_size = chunk_size
+
+        self.chunks = []
+        self.column = 0
+        self.newlines = []
+        self.flat = [False]
+
+        self.position = 0
+        self.pending = deque()
+        self.buffer = deque()
+
+    def text(self, value):
+        if self.pending:
+            self.buffer.append((_TEXT, value))
+            self.position += len(value)
+            self.check()
+        else:
+            self.print_text(value)
+
+    def line(self, depth):
+        if self.pending:
+            self.buffer.append((_LINE, depth))
+            self.position += self.width + 1
+            self.check()
+        else:
+            self.print_line(depth)
+
+    def softline(self, flat, depth):
+        if self.pending:
+            self.buffer.append((_SOFTLINE, flat, depth))
+            self.position += len(flat)
+            self.check()
+        elif self.flat[-1]:
+            self.print_text(flat)
+        else:
+            self.print_line(depth)
+
+    def begin(self):
+        if self.pending or not self.flat[-1]:
+            size = [None]
+            self.pending.append((self.position, size))
+            self.buffer.append((_BEGIN, size))
+        else:
+            self.flat.append(True)
+
+    def end(self):
+        if self.pending:
+            start, size = self.pending.pop()
+            size[0] = self.position - start
+            self.buffer.append((_END,))
+            if not self.pending:
+                self.print_buffer(None)
+        else:
+            self.flat.pop()
+
+    def check(self):
+        pending = self.pending
+        while pending and self.position - pending[0][0] > self.width - self.column:
+            pending.popleft()
+            self.print_buffer(pending[0][1] if pending else None)
+
+    def print_buffer(self, until):
+        buffer = self.buffer
+        while buffer:
+            token = buffer[0]
+            kind = token[0]
+            if kind == _BEGIN:
+                if token[1] is until:
+                    break
+
+                size = token[1][0]
+                self.flat.append(self.flat[-1] or (size is not None and size <= self.width - self.column))
+
+            elif kind == _END:
+                self.flat.pop()
+
+            elif kind == _TEXT:
+                self.print_text(token[1])
+
+            elif kind == _LINE:
+                self.print_line(token[1])
+
+            elif self.flat[-1]:
+                self.print_text(token[1])
+
+            else:
+                self.print_line(token[2])
+
+            buffer.popleft()
+
+    def print_text(self, value):
+        self.chunks.append(value)
+        self.column += len(value)
+        if len(self.chunks) >= self.chunk_size:
+            self.flush()
+
+    def print_line(self, depth):
+        newlines = self.newlines
+        while len(newlines) <= depth:
+            config = self.config
+            offset = config.offset + len(newlines) * config.indent_by
+            newlines.append("\n" + config.indent_char * offset)
+
+        self.chunks.append(newlines[depth])
+        self.column = len(newlines[depth]) - 1
+        if len(self.chunks) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        self.stream.write("".join(self.chunks))
+        self.chunks = []
@@ -0,0 +1,282 @@
+from collections import Counter
+
+from . import ast
+
+
+def analyze(module):
+    """Build the semantic model of a Module.  The model of the last
+    Module analyzed is kept around so that the typechecker and the
+    backend working on the same Module share a single model.
+
+    Parameters:
+      module(ast.Module): -
+
+    Returns:
+      Model: -
+    """
+    global _last
+    if _last is None or _last.module is not module:
+        _last = Model(module)
+
+    return _last
+
+
+class Model:
+    """A symbol table and reference graph for a Module.  Lookups are
+    O(1) so backends and tools never have to re-walk the Module's
+    declarations to find out what refers to what.
+
+    Parameters:
+      module(ast.Module): -
+
+    Attributes:
+      module(ast.Module): -
+      types(dict): Maps the name of every enum, record and union to
+        its (first) declaration.
+      functions(dict): Maps the name of every function to its (first)
+        declaration.
+      references(dict): Maps the name of every declaration to the
+        names of the types it refers to, in order of appearance.
+        Builtin types are left out.
+      referrers(dict): Maps the name of every referenced type to the
+        names of the declarations that refer to it.
+    """
+
+    def __init__(self, module):
+        self.module = module
+        self.types = {}
+        self.functions = {}
+        self.references = {}
+        self.referrers = {}
+        self._order = None
+        self._expressions = None
+
+        names = {}
+        for declaration in module.declarations:
+            symbols = self.functions if isinstance(declaration, ast.Function) else self.types
+            symbols.setdefault(declaration.name, declaration)
+
+            references = self.references.setdefault(declaration.name, [])
+            for tipe in _types(declaration):
+                for name in _names(tipe, names):
+                    if name not in references:
+                        references.append(name)
+                        self.referrers.setdefault(name, []).append(declaration.name)
+
+    def lookup(self, name):
+        """Find the declaration of a type or function.
+
+        Returns:
+          Node: The declaration or None if name isn't declared.
+        """
+        declaration = self.types.get(name)
+        if declaration is None:
+            declaration = self.functions.get(name)
+
+        return declaration
+
+    def dependencies(self, name):
+        """The names of the types a declaration refers to directly.
+
+        Returns:
+          str list: -
+        """
+        return self.references.get(name, [])
+
+    def dependents(self, name):
+        """The names of the declarations that refer to a type directly.
+
+        Returns:
+          str list: -
+        """
+        return self.referrers.get(name, [])
+
+    def reachable(self, names):
+        """Find every declared type reachable from a set of
+        declarations by following their references.
+
+        Parameters:
+          names(iterable): The names of the declarations to start from.
+
+        Returns:
+          set: The names of the declared types they refer to, directly
+          or indirectly.
+        """
+        reached, pending = set(), list(names)
+        while pending:
+            for name in self.references.get(pending.pop(), ()):
+                if name not in reached and name in self.types:
+                    reached.add(name)
+                    pending.append(name)
+
+        return reached
+
+    @property
+    def expressions(self):
+        """Counts how many times every composite type expression (every
+        list, dict and nullable type) appears in the module, including
+        those nested inside other expressions.
+
+        Returns:
+          Counter: -
+        """
+        if self._expressions is None:
+            self._expressions = Counter()
+            for declaration in self.module.declarations:
+                self._expressions.update(expressions(declaration))
+
+        return self._expressions
+
+    def shared_names(self, name, *, taken=()):
+        """Name every composite type expression that appears more than
+        once in the module so that backends can generate a single
+        definition for it.
+
+        Parameters:
+          name(function): Derives a name from an expression.  Distinct
+            expressions that end up with the same name, or with one of
+            the taken names, are told apart by a numeric suffix.
+          taken(iterable): Names that are already in use.
+
+        Returns:
+          dict: Maps expressions to their names.
+        """
+        taken = set(taken)
+        names = {}
+        shared = [expression for expression, count in self.expressions.items() if count > 1]
+        for expression in sorted(shared, key=repr):
+            base = candidate = name(expression)
+            suffix = 1
+            while candidate in taken:
+                suffix += 1
+                candidate = "{}{}".format(base, suffix)
+
+            taken.add(candidate)
+            names[expression] = candidate
+
+        return names
+
+    def streamed(self, names):
+        """Check the names of the functions whose results are to be
+        streamed to clients one item at a time.
+
+        Parameters:
+          names(iterable): -
+
+        Raises:
+          ValueError: If a name isn't that of a function or if the
+            function doesn't return a list.
+
+        Returns:
+          set: The names.
+        """
+        names = set(names)
+        for name in sorted(names):
+            function = self.functions.get(name)
+            if function is None:
+                raise ValueError("cannot stream {!r}: no such function".format(name))
+
+            if not isinstance(function.return_type, ast.List):
+                raise ValueError("cannot stream {!r}: it does not return a list".format(name))
+
+        return names
+
+    @property
+    def order(self):
+        """The type declarations sorted so that every type comes after
+        the types it refers to.  Mutually recursive types are left in
+        the order in which they were declared.
+
+        Returns:
+          Node list: -
+        """
+        if self._order is None:
+            order, visited = [], set()
+            for name in self.types:
+                if name in visited:
+                    continue
+
+                stack = [(name, iter(self.references[name]))]
+                visited.add(name)
+                while stack:
+                    current, dependencies = stack[-1]
+                    for dependency in dependencies:
+                        if dependency in self.types and dependency not in visited:
+                            visited.add(dependency)
+                            stack.append((dependency, iter(self.references[dependency])))
+                            break
+                    else:
+                        stack.pop()
+                        order.append(self.types[current])
+
+            self._order = order
+
+        return self._order
+
+
+def expressions(declaration):
+    """Find the composite type expressions in a declaration.
+
+    Parameters:
+      declaration(Node): -
+
+    Returns:
+      list: Every list, dict and nullable type in the declaration, in
+      order of appearance, with nested expressions following the ones
+      they're nested in.
+    """
+    found = []
+    for tipe in _types(declaration):
+        while not isinstance(tipe, ast.Type):
+            found.append(tipe)
+            tipe = tipe.values_type if isinstance(tipe, ast.Dict) else tipe.type
+
+    return found
+
+
+def type_names(tipe):
+    """Find the names of the types a type expression refers to.
+
+    Parameters:
+      tipe(ast.Expression): -
+
+    Returns:
+      tuple: The names of every non-builtin type in the expression.
+    """
+    return _names(tipe, {})
+
+
+def _types(declaration):
+    if isinstance(declaration, ast.Record):
+        return [attribute.type for attribute in declaration.attributes]
+
+    elif isinstance(declaration, ast.Union):
+        return declaration.types
+
+    elif isinstance(declaration, ast.Function):
+        return [parameter.type for parameter in declaration.parameters] + [declaration.return_type]
+
+    return []
+
+
+def _names(tipe, cache):
+    # Type expressions are shared between declarations so the names
+    # each one refers to are only computed once per model.
+    names = cache.get(tipe)
+    if names is None:
+        if isinstance(tipe, ast.Type):
+            names = () if tipe.name in _builtins else (tipe.name,)
+
+        elif isinstance(tipe, ast.Dict):
+            names = _names(tipe.keys_type, cache) + _names(tipe.values_type, cache)
+
+        else:
+            names = _names(tipe.type, cache)
+
+        cache[tipe] = names
+
+    return names
+
+
+_builtins = frozenset(tipe.name for tipe in ast.builtins)
+_last = None
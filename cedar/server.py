@@ -0,0 +1,258 @@
+import io
+import json
+import sys
+
+from contextlib import redirect_stdout
+
+from . import CedarError, ParseErrors, TypeErrors, parse
+from .batch import BatchError, Target, parse_options
+from .fragments import Fragments
+from .languages.cedar import format_module
+
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+COMPILE_ERROR = -32000
+
+
+class RPCError(Exception):
+    """Raised by method handlers to signal a JSON-RPC error.
+    """
+
+    def __init__(self, code, message, data=None):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+        self.data = data
+
+
+class Server:
+    """A long-running compile server that speaks line-delimited
+    JSON-RPC 2.0.  The last parsed version of every file and the
+    generated code for every (file, language, options) triple are
+    kept in memory between requests.
+
+    Every method takes a "filename" and an optional "source" param.
+    When "source" is missing, the file is read from disk.  The
+    following methods are supported:
+
+      parse(filename, source?) -> {"declarations", "diagnostics"}
+      check(filename, source?) -> {"diagnostics"}
+      generate(filename, source?, language, options?) -> {"output"}
+      format(filename, source?) -> {"output"}
+      shutdown() -> null
+    """
+
+    def __init__(self):
+        self.modules = {}
+        self.options = {}
+        self.fragments = {}
+        self.running = True
+        self.methods = {
+            "parse": self.handle_parse,
+            "check": self.handle_check,
+            "generate": self.handle_generate,
+            "format": self.handle_format,
+            "shutdown": self.handle_shutdown,
+        }
+
+    def serve(self, stdin, stdout):
+        """Read requests from stdin and write responses to stdout,
+        one per line, until stdin is closed or the server is shut
+        down.
+
+        Returns:
+          int: The exit code.
+        """
+        for line in stdin:
+            if not line.strip():
+                continue
+
+            response = self.handle_line(line)
+            if response is not None:
+                stdout.write(json.dumps(response) + "\n")
+                stdout.flush()
+
+            if not self.running:
+                break
+
+        return 0
+
+    def handle_line(self, line):
+        """Handle a single line-encoded request.
+
+        Returns:
+          dict: The response or None if the request was a notification.
+        """
+        try:
+            request = json.loads(line)
+        except ValueError as e:
+            return _error(None, RPCError(PARSE_ERROR, "invalid JSON: {}".format(e)))
+
+        return self.handle(request)
+
+    def handle(self, request):
+        """Handle a decoded request.
+
+        Returns:
+          dict: The response or None if the request was a notification.
+        """
+        if not isinstance(request, dict) or not isinstance(request.get("method"), str):
+            return _error(None, RPCError(INVALID_REQUEST, "invalid request"))
+
+        request_id = request.get("id")
+        try:
+            handler = self.methods.get(request["method"])
+            if handler is None:
+                raise RPCError(METHOD_NOT_FOUND, "method {!r} not found".format(request["method"]))
+
+            params = request.get("params", {})
+            if not isinstance(params, dict):
+                raise RPCError(INVALID_PARAMS, "params must be an object")
+
+            result = handler(params)
+        except RPCError as e:
+            result, error = None, e
+        except Exception as e:
+            result, error = None, RPCError(INTERNAL_ERROR, "{}: {}".format(type(e).__name__, e))
+        else:
+            error = None
+
+        if "id" not in request:
+            return None
+
+        if error is not None:
+            return _error(request_id, error)
+
+        return {"jsonrpc": "2.0", "id": request_id, "result": result}
+
+    def handle_parse(self, params):
+        module, errors = self.load(params)
+        declarations = []
+        if module is not None:
+            declarations = [{
+                "kind": type(decl).__name__.lower(),
+                "name": decl.name,
+            } for decl in module.declarations]
+
+        return {"declarations": declarations, "diagnostics": errors}
+
+    def handle_check(self, params):
+        _, errors = self.load(params)
+        return {"diagnostics": errors}
+
+    def handle_generate(self, params):
+        filename = _param(params, "filename", str)
+        language = _param(params, "language", str)
+        options = _param(params, "options", list, [])
+        if not all(isinstance(option, str) for option in options):
+            raise RPCError(INVALID_PARAMS, "options must be a list of strings")
+
+        key = (language, tuple(options))
+        if key not in self.options:
+            try:
+                self.options[key] = parse_options(Target(filename, language, None, key[1]))
+            except BatchError as e:
+                raise RPCError(INVALID_PARAMS, str(e))
+
+        arguments, handler = self.options[key]
+        module = self.load_or_raise(params)
+        fragments = self.fragments.setdefault((filename,) + key, Fragments())
+        output = io.StringIO()
+        try:
+            with redirect_stdout(output):
+                handler(arguments, module, fragments=fragments)
+        except ValueError as e:
+            raise RPCError(INVALID_PARAMS, str(e))
+
+        fragments.retain(module.declarations)
+        return {"output": output.getvalue()}
+
+    def handle_format(self, params):
+        filename = _param(params, "filename", str)
+        module = self.load_or_raise(params)
+        fragments = self.fragments.setdefault((filename, "cedar", ()), Fragments())
+        output = format_module(module, fragments=fragments)
+        fragments.retain(module.declarations)
+        return {"output": output.strip() + "\n"}
+
+    def handle_shutdown(self, params):
+        self.running = False
+        return None
+
+    def load(self, params):
+        """Parse a file, reusing the previous result if its source
+        hasn't changed.
+
+        Returns:
+          tuple: The Module (or None if the file is invalid) and a
+          list of diagnostics.
+        """
+        filename = _param(params, "filename", str)
+        source = _param(params, "source", str, None)
+        if source is None:
+            try:
+                with open(filename) as f:
+                    source = f.read()
+            except OSError as e:
+                raise RPCError(INVALID_PARAMS, "failed to read {!r}: {}".format(filename, e))
+
+        previous = self.modules.get(filename)
+        if previous is not None and previous[0] == source:
+            return previous[1], previous[2]
+
+        try:
+            module, errors = parse(source, filename=filename), []
+        except CedarError as e:
+            module, errors = None, diagnostics(e)
+
+        self.modules[filename] = (source, module, errors)
+        return module, errors
+
+    def load_or_raise(self, params):
+        module, errors = self.load(params)
+        if module is None:
+            raise RPCError(COMPILE_ERROR, errors[0]["message"], {"diagnostics": errors})
+
+        return module
+
+
+def diagnostics(error):
+    """Convert a CedarError into a list of JSON-serializable
+    diagnostics.
+    """
+    if isinstance(error, (ParseErrors, TypeErrors)):
+        return [diagnostic for e in error.errors for diagnostic in diagnostics(e)]
+
+    return [{
+        "type": type(error).__name__,
+        "message": error.message,
+        "filename": error.file_name,
+        "line": error.line,
+        "column": error.column,
+    }]
+
+
+def serve_stdio():
+    return Server().serve(sys.stdin, sys.stdout)
+
+
+def _param(params, name, tipe, *default):
+    if default and params.get(name) is None:
+        return default[0]
+
+    value = params.get(name)
+    if not isinstance(value, tipe):
+        raise RPCError(INVALID_PARAMS, "param {!r} must be a {}".format(name, tipe.__name__))
+
+    return value
+
+
+def _error(request_id, error):
+    payload = {"code": error.code, "message": error.message}
+    if error.data is not None:
+        payload["data"] = error.data
+
+    return {"jsonrpc": "2.0", "id": request_id, "error": payload}
@@ -0,0 +1,150 @@
+"""Lightweight instrumentation for the phases of a Cedar run.
+
+Library code wraps each phase in a timings.phase block.  Those blocks
+do nothing unless a collector is active, so they cost a function call
+and an attribute lookup when instrumentation is off:
+
+    with timings.collect() as collected:
+        module = parse(source)
+
+    collected.report(sys.stderr)
+"""
+import sys
+import time
+
+from collections import OrderedDict, namedtuple
+from contextlib import contextmanager
+
+#: The wall time, in seconds, and the peak traced memory, in bytes, of
+#: every run of a phase combined.
+Phase = namedtuple("Phase", "name seconds peak_memory count")
+
+#: The collector phases are currently being recorded into.
+_collector = None
+
+
+class Timings:
+    """Records the phases that run while it is active.  Phases that
+    run multiple times are combined.
+
+    Parameters:
+      memory(bool): Whether or not to trace peak memory use.  Tracing
+        memory slows every phase down considerably.
+    """
+
+    def __init__(self, *, memory=True):
+        self.memory = memory
+        self.phases = OrderedDict()
+
+    def phase(self, name):
+        return _Phase(self, name)
+
+    def record(self, name, seconds, peak_memory):
+        previous = self.phases.get(name)
+        if previous is None:
+            self.phases[name] = Phase(name, seconds, peak_memory, 1)
+        else:
+            self.phases[name] = Phase(
+                name,
+                previous.seconds + seconds,
+                max(previous.peak_memory, peak_memory),
+                previous.count + 1,
+            )
+
+    def report(self, stream=None):
+        """Write a table of every recorded phase to stream, which
+        defaults to stderr.
+        """
+        stream = stream or sys.stderr
+        stream.write("{:<16} {:>12} {:>14}\n".format("phase", "time", "peak memory"))
+        for phase in self.phases.values():
+            stream.write("{:<16} {:>10.1f}ms {:>14}\n".format(
+                phase.name if phase.count == 1 else "{} (x{})".format(phase.name, phase.count),
+                phase.seconds * 1000,
+                "{:.1f}KiB".format(phase.peak_memory / 1024) if self.memory else "-",
+            ))
+
+        stream.write("{:<16} {:>10.1f}ms\n".format(
+            "total", sum(phase.seconds for phase in self.phases.values()) * 1000
+        ))
+
+
+@contextmanager
+def collect(*, memory=True):
+    """Record every phase that runs inside this block.  Phases should
+    not be nested inside one another when memory is traced since each
+    one resets the peak.
+
+    Yields:
+      Timings: The collector.
+    """
+    global _collector
+
+    import tracemalloc
+
+    previous, _collector = _collector, Timings(memory=memory)
+    started_tracing = memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+
+    try:
+        yield _collector
+    finally:
+        if started_tracing:
+            tracemalloc.stop()
+
+        _collector = previous
+
+
+def phase(name):
+    """Time the block this wraps as the named phase if a collector is
+    active.
+
+    Returns:
+      A context manager.
+    """
+    if _collector is None:
+        return _noop
+
+    return _collector.phase(name)
+
+
+class _Noop:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_noop = _Noop()
+
+
+class _Phase:
+    def __init__(self, collector, name):
+        self.collector = collector
+        self.name = name
+
+    def __enter__(self):
+        self.memory = 0
+        if self.collector.memory:
+            import tracemalloc
+
+            if hasattr(tracemalloc, "reset_peak"):
+                tracemalloc.reset_peak()
+
+            self.memory = tracemalloc.get_traced_memory()[0]
+
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        seconds = time.perf_counter() - self.start
+        peak_memory = 0
+        if self.collector.memory:
+            import tracemalloc
+
+            peak_memory = max(0, tracemalloc.get_traced_memory()[1] - self.memory)
+
+        self.collector.record(self.name, seconds, peak_memory)
+        return False
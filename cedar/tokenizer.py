@@ -1,5 +1,6 @@
 import re
 
+from array import array
 from collections import namedtuple
 from enum import Enum
 
@@ -9,7 +10,31 @@ TokenKind = Enum("TokenKind", (
     "enum union record function name cap_name qmark comma colon lparen rparen "
     "lbrace rbrace lbracket rbracket newline whitespace invalid eof"))
 Token = namedtuple("Token", "kind value line column")
-Spec = namedtuple("Spec", "kind re")
+
+
+class TokenBuffer(namedtuple("TokenBuffer", "file_name file_contents kinds starts ends lines columns")):
+    """A column-oriented sequence of tokens.
+
+    Attributes:
+      file_name(str): Used when reporting errors.
+      file_contents(str): The tokenized string.
+      kinds(array): The value of each token's TokenKind.
+      starts(array): The offset at which each token starts.
+      ends(array): The offset at which each token ends.
+      lines(array): The line on which each token was found.
+      columns(array): The column at which each token starts.
+    """
+
+    def kind(self, index):
+        return _kinds[self.kinds[index]]
+
+    def value(self, index):
+        if self.kinds[index] == _eof:
+            return None
+        return self.file_contents[self.starts[index]:self.ends[index]]
+
+    def token(self, index):
+        return Token(self.kind(index), self.value(index), self.lines[index], self.columns[index])
 
 
 def tokenize(file_name, file_contents):
@@ -25,47 +50,123 @@ def tokenize(file_name, file_contents):
     Returns:
       Token generator: -
     """
-    line, index, column, column_end = 1, 0, 0, 0
+    tokens = tokenize_bulk(file_name, file_contents)
+    for kind, start, end, line, column in zip(
+            tokens.kinds, tokens.starts, tokens.ends, tokens.lines, tokens.columns):
+        kind = _kinds[kind]
+        if kind == TokenKind.invalid:
+            message = "unexpected {!r}".format(file_contents[start:end])
+            raise ParseError(message, file_name, file_contents, line, column)
+
+        elif kind == TokenKind.eof:
+            yield Token(kind, None, line, column)
+
+        else:
+            yield Token(kind, file_contents[start:end], line, column)
+
+
+def tokenize_bulk(file_name, file_contents):
+    """Convert an input string into a TokenBuffer.  Whitespace and
+    comments are dropped and the buffer always ends in an eof token.
+
+    Unlike tokenize, this function never raises.  Unexpected input is
+    represented by invalid tokens, which consumers are expected to
+    report when they reach them.
+
+    Parameters:
+      file_name(str): Used when reporting errors.
+      file_contents(str): -
+
+    Returns:
+      TokenBuffer: -
+    """
+    kinds, starts, ends, lines, columns = (array("i") for _ in range(5))
+    add_kind, add_start, add_end, add_line, add_column = (
+        kinds.append, starts.append, ends.append, lines.append, columns.append
+    )
+
+    line, index, previous_index = 1, 0, 0
     for match in _spec.finditer(file_contents):
-        kind = match.lastgroup
-        value = match.group(kind)
-        column = match.start() - index
-        column_end = match.end() - index
-
-        kind = getattr(TokenKind, kind)
-        if kind == TokenKind.newline:
-            index = match.end()
+        group = match.lastindex
+        if group is None:
+            continue
+
+        end = match.end()
+        if group == _identifier:
+            value = match.group(group)
+            start = end - len(value)
+            kind = _keywords.get(value)
+            if kind is None:
+                kind = _cap_name if "A" <= value[0] <= "Z" else _name
+
+            column = start - index
+
+        elif group == _punctuation:
+            start = end - 1
+            kind = _punctuations[file_contents[start]]
+            column = start - index
+
+        elif group == _newline:
+            start = end - 1
+            kind = _newline_kind
+            column = start - index
+            previous_index, index = index, end
             line += 1
 
-        elif kind == TokenKind.whitespace:
-            continue
+        else:
+            start = end - 1
+            kind = _invalid
+            column = start - index
 
-        elif kind == TokenKind.invalid:
-            message = "unexpected {!r}".format(value)
-            raise ParseError(message, file_name, file_contents, line, column)
+        add_kind(kind)
+        add_start(start)
+        add_end(end)
+        add_line(line)
+        add_column(column)
+
+    if file_contents.endswith("\n"):
+        index = previous_index
+
+    kinds.append(_eof)
+    starts.append(len(file_contents))
+    ends.append(len(file_contents))
+    lines.append(line)
+    columns.append(len(file_contents) - index)
+    return TokenBuffer(file_name, file_contents, kinds, starts, ends, lines, columns)
+
+
+_kinds = [None] + list(TokenKind)
+_keywords = {
+    "enum": TokenKind.enum.value,
+    "union": TokenKind.union.value,
+    "record": TokenKind.record.value,
+    "fn": TokenKind.function.value,
+}
+_punctuations = {
+    "?": TokenKind.qmark.value,
+    ",": TokenKind.comma.value,
+    ":": TokenKind.colon.value,
+    "(": TokenKind.lparen.value,
+    ")": TokenKind.rparen.value,
+    "{": TokenKind.lbrace.value,
+    "}": TokenKind.rbrace.value,
+    "[": TokenKind.lbracket.value,
+    "]": TokenKind.rbracket.value,
+}
+_name = TokenKind.name.value
+_cap_name = TokenKind.cap_name.value
+_newline_kind = TokenKind.newline.value
+_invalid = TokenKind.invalid.value
+_eof = TokenKind.eof.value
 
-        yield Token(kind, value, line, column)
-
-    yield Token(TokenKind.eof, None, line, column_end)
-
-
-_spec = re.compile("|".join(r"(?P<{s.kind.name}>{s.re})".format(s=s) for s in (
-    Spec(TokenKind.enum, r"enum"),
-    Spec(TokenKind.union, r"union"),
-    Spec(TokenKind.record, r"record"),
-    Spec(TokenKind.function, r"fn"),
-    Spec(TokenKind.name, r"[a-z_][a-zA-Z0-9_]*"),
-    Spec(TokenKind.cap_name, r"[A-Z][a-zA-Z0-9_]*"),
-    Spec(TokenKind.qmark, r"\?"),
-    Spec(TokenKind.comma, r","),
-    Spec(TokenKind.colon, r":"),
-    Spec(TokenKind.lparen, r"\("),
-    Spec(TokenKind.rparen, r"\)"),
-    Spec(TokenKind.lbrace, r"\{"),
-    Spec(TokenKind.rbrace, r"\}"),
-    Spec(TokenKind.lbracket, r"\["),
-    Spec(TokenKind.rbracket, r"\]"),
-    Spec(TokenKind.whitespace, r"( +|//.*)"),
-    Spec(TokenKind.newline, r"\n"),
-    Spec(TokenKind.invalid, r"."),
-)))
+_identifier, _punctuation, _newline = 1, 2, 3
+_spec = re.compile(r"""
+    (?:\ +|//.*)*                  # whitespace and comments are skipped
+    (?:
+        ([A-Za-z_][A-Za-z0-9_]*)
+      | ([?,:(){}\[\]])
+      | (\n)
+      | (.)
+      | \Z
+    )
+""", re.VERBOSE)
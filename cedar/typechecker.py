@@ -1,6 +1,5 @@
-from multipledispatch import dispatch
-
 from . import ast
+from .dispatch import dispatch
 from .errors import TypeError
 
 
@@ -15,33 +14,57 @@ class Typechecker:
         self.known_fns = set([])
         self.type_errors = []
 
-    def signal_type_error(self, message, token):
+        #: The names of every type declared in the module, including
+        #: those declared after the point being checked.
+        self.declared_types = {}
+
+        #: (check, node, index) triples recorded while parsing and run,
+        #: in order, by run_checks once parsing is done.  Checks are
+        #: unbound Typechecker methods.
+        self.checks = []
+
+    def run_checks(self, model):
+        """Run the recorded checks against the semantic model of the
+        module they were recorded for.  Since every declaration is
+        known up front, types may be used before they're declared.
+
+        Parameters:
+          model(semantics.Model): -
+        """
+        self.declared_types = model.types
+        for check, node, index in self.checks:
+            check(self, node, index)
+
+    def check_node(self, node, index):
+        return self.typecheck(node, index)
+
+    def signal_type_error(self, message, index):
         self.type_errors.append(TypeError(
             message,
-            self.file_name, self.file_contents,
-            token.line, token.column
+            self.file_name, self.line_index,
+            self.tokens.lines[index], self.tokens.columns[index]
         ))
 
-    def declare_type(self, name, token):
+    def declare_type(self, name, index):
         if name in self.known_types:
-            self.signal_type_error("cannot redeclare type {!r}".format(name), token)
+            self.signal_type_error("cannot redeclare type {!r}".format(name), index)
         else:
             self.known_types.add(name)
 
-    def declare_fn(self, name, token):
+    def declare_fn(self, name, index):
         if name in self.known_fns:
-            self.signal_type_error("cannot redeclare function {!r}".format(name), token)
+            self.signal_type_error("cannot redeclare function {!r}".format(name), index)
         else:
             self.known_fns.add(name)
 
-    @dispatch(ast.Type, object)
-    def typecheck(self, node, token):
-        if node.name not in self.known_types:
-            self.signal_type_error("unknown type {!r}".format(node.name), token)
+    @dispatch(ast.Type)
+    def typecheck(self, node, index):
+        if node.name not in self.declared_types and node.name not in self.builtin_types:
+            self.signal_type_error("unknown type {!r}".format(node.name), index)
         return node
 
-    @dispatch(ast.Dict, object)
-    def typecheck(self, node, token):
+    @dispatch(ast.Dict)
+    def typecheck(self, node, index):
         if node.keys_type.name != "String":
-            self.signal_type_error("dict keys must be Strings", token)
+            self.signal_type_error("dict keys must be Strings", index)
         return node
@@ -0,0 +1,162 @@
+import os
+import sys
+import time
+
+from collections import OrderedDict
+from contextlib import redirect_stderr
+
+from . import CedarError, parse
+from .batch import parse_options, replace_on_success
+from .fragments import Fragments
+
+
+class Watcher:
+    """Regenerates a set of targets whenever their input files change.
+    Parsed modules and the code generated for every declaration are
+    kept in memory between changes so that only the declarations
+    that actually changed have to be generated again.
+
+    Parameters:
+      targets(list): The Targets to keep up to date.
+      cache(Cache): An optional parse cache.
+      stream(file): The file-like object progress is reported to.
+
+    Raises:
+      BatchError: If any of the targets is invalid.
+    """
+
+    def __init__(self, targets, *, cache=None, stream=None):
+        self.cache = cache
+        self.stream = stream or sys.stderr
+        self.inputs = OrderedDict()
+        for target in targets:
+            arguments, handler = parse_options(target)
+            self.inputs.setdefault(target.filename, []).append(
+                (target, arguments, handler, Fragments())
+            )
+
+        self.mtimes = {}
+        self.modules = {}
+        #: Maps filenames to the module their targets last failed to
+        #: be generated from and the errors, keyed by output, that
+        #: those targets failed with.  Failed targets are retried on
+        #: every poll until they succeed.
+        self.failed = {}
+
+    def poll(self):
+        """Regenerate the targets of every input file that changed
+        since the last poll.
+
+        Returns:
+          int: The number of targets that were regenerated.
+        """
+        regenerated = 0
+        for filename, targets in self.inputs.items():
+            try:
+                mtime = os.stat(filename).st_mtime_ns
+            except OSError as e:
+                if self.mtimes.pop(filename, None) is not None:
+                    self.report("Failed to read {}: {}".format(filename, e))
+                continue
+
+            if self.mtimes.get(filename) == mtime and filename not in self.failed:
+                continue
+
+            self.mtimes[filename] = mtime
+            regenerated += self.regenerate(filename, targets)
+
+        return regenerated
+
+    def regenerate(self, filename, targets):
+        start = time.perf_counter()
+        module = self.parse(filename)
+        if module is None:
+            # Failed targets are retried once the file has been fixed.
+            self.failed.pop(filename, None)
+            return 0
+
+        # The module is only recorded once every target has been
+        # generated from it.  Until then, only the targets that failed
+        # are retried.
+        previous = self.modules.get(filename)
+        attempted, failed = self.failed.pop(filename, (None, {}))
+        if attempted is not None and attempted.declarations == module.declarations:
+            targets = [target for target in targets if target[0].output in failed]
+        elif previous is not None and previous.declarations == module.declarations:
+            return 0
+
+        previous_declarations = {}
+        if previous is not None:
+            previous_declarations = {(type(decl), decl.name): decl for decl in previous.declarations}
+
+        changed = sum(
+            1 for decl in module.declarations
+            if previous_declarations.get((type(decl), decl.name)) != decl
+        )
+
+        generated, errors = [], {}
+        for target, arguments, handler, fragments in targets:
+            try:
+                with replace_on_success(target.output):
+                    handler(arguments, module, fragments=fragments)
+
+                fragments.retain(module.declarations)
+                generated.append(target.output)
+            except Exception as e:
+                errors[target.output] = message = "Failed to generate {} ({}) from {}: {}".format(
+                    target.output, target.language, filename, e
+                )
+                if failed.get(target.output) != message:
+                    self.report(message)
+
+        if errors:
+            self.failed[filename] = (module, errors)
+        else:
+            self.modules[filename] = module
+
+        if generated:
+            self.report("Regenerated {} from {} in {:.1f}ms ({} of {} declarations changed).".format(
+                ", ".join(generated), filename,
+                (time.perf_counter() - start) * 1000,
+                changed, len(module.declarations),
+            ))
+
+        return len(generated)
+
+    def parse(self, filename):
+        """Parse an input file, reporting any errors.
+
+        Returns:
+          Module: The parsed module or None.
+        """
+        try:
+            with open(filename) as f:
+                source = f.read()
+
+            if self.cache is not None:
+                return self.cache.parse(source, filename=filename)
+
+            return parse(source, filename=filename)
+
+        except (CedarError, OSError) as e:
+            self.report("Failed to parse {}:".format(filename))
+            if isinstance(e, CedarError):
+                with redirect_stderr(self.stream):
+                    e.print_error()
+            else:
+                self.report(str(e))
+            return None
+
+    def run(self, *, interval=0.5):
+        """Poll for changes every interval seconds until interrupted.
+        """
+        try:
+            while True:
+                self.poll()
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            return 0
+
+    def report(self, message):
+        self.stream.write(message + "\n")
+        self.stream.flush()
@@ -41,6 +41,7 @@ setup(
         }
     },
     packages=find_packages(),
+    package_data={"cedar.languages": ["*.go"]},
     install_requires=install_requires,
     tests_require=tests_require,
     description="A web service definition format and source code generator.",
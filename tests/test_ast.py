@@ -0,0 +1,55 @@
+import pickle
+import pytest
+
+from cedar import parse
+from cedar.ast import Attribute, Dict, List, Module, Record, Tag, Type, offsets
+
+
+def test_nodes_compare_equal_regardless_of_spans():
+    a = Record("A", [Attribute("b", Type("Int"))], start=10, length=5)
+    b = Record(name="A", attributes=(Attribute("b", Type("Int")),))
+    assert a == b
+    assert hash(a) == hash(b)
+    assert a != Record("A", [])
+    assert Tag("A") != Type("A")
+
+
+def test_type_expressions_are_interned():
+    assert Type("Int") is Type("Int")
+    assert List(Dict(Type("String"), Type("Int"))) is List(Dict(Type("String"), Type("Int")))
+
+
+def test_nodes_are_immutable():
+    record = Record("A", [])
+    with pytest.raises(AttributeError):
+        record.name = "B"
+
+    assert record._replace(name="B") == Record("B", [])
+
+
+def test_nodes_can_be_pickled():
+    module = parse("record A {\n  b {String: [Int?]}\n}")
+    restored = pickle.loads(pickle.dumps(module))
+    assert restored == module
+    assert restored.declarations[0].span == module.declarations[0].span
+    assert restored.declarations[0].attributes[0].type is module.declarations[0].attributes[0].type
+
+
+def test_nodes_have_spans():
+    source = "enum A { B }\n\nrecord C {\n  d Int\n  e [A]?\n}\n\nfn f(g Int) C\n"
+    module = parse(source)
+    enum, record, function = module.declarations
+    starts = dict(zip(module.declarations, offsets(module.declarations)))
+
+    def text(node, parent=None):
+        start = starts[parent] + node.start if parent else starts[node]
+        return source[start:start + node.length]
+
+    assert text(enum) == "enum A { B }"
+    assert text(enum.tags[0], enum) == "B"
+    assert text(record) == "record C {\n  d Int\n  e [A]?\n}"
+    assert [text(attribute, record) for attribute in record.attributes] == ["d Int", "e [A]?"]
+    assert text(function) == "fn f(g Int) C"
+    assert text(function.parameters[0], function) == "g Int"
+    assert isinstance(module, Module)
+    assert [declaration.start for declaration in module.declarations] == [0, 2, 2]
@@ -0,0 +1,110 @@
+import pytest
+
+from cedar.batch import BatchError, Target, load_manifest, parse_target, run
+from cedar.cli import main
+
+from .common import arguments, rel
+
+filename = rel("..", "examples", "todos", "todos.cedar")
+invalid_filename = rel("fixtures", "invalid.cedar")
+
+
+def test_targets_can_be_parsed():
+    assert parse_target("a.cedar:go:a.go") == Target("a.cedar", "go", "a.go", ())
+    assert parse_target("a.cedar:go:a.go:--package-name 'a b'") == \
+        Target("a.cedar", "go", "a.go", ("--package-name", "a b"))
+
+    with pytest.raises(BatchError):
+        parse_target("a.cedar:go")
+
+
+def test_manifests_can_be_loaded(tmpdir):
+    pytest.importorskip("tomllib")
+
+    manifest = tmpdir.join("targets.toml")
+    manifest.write("""
+[[targets]]
+input = "todos.cedar"
+language = "go"
+output = "out/todos.go"
+options = { package-name = "todos", stream = ["getTodos", "listTodos"] }
+""")
+
+    assert load_manifest(str(manifest)) == [Target(
+        str(tmpdir.join("todos.cedar")), "go", str(tmpdir.join("out", "todos.go")),
+        ("--package-name", "todos", "--stream", "getTodos", "--stream", "listTodos")
+    )]
+
+
+def test_manifest_flags_take_booleans(tmpdir):
+    manifest = tmpdir.join("targets.json")
+    manifest.write("""{"targets": [{
+  "input": "todos.cedar",
+  "language": "go",
+  "output": "todos.go",
+  "options": {"package-name": "todos", "json-methods": true, "shared-types": false}
+}]}""")
+
+    target, = load_manifest(str(manifest))
+    assert target.options == ("--package-name", "todos", "--json-methods")
+
+    target = target._replace(filename=filename, output=str(tmpdir.join("todos.go")))
+    assert run([target]) == 0
+    assert "func (r Todo) MarshalJSON() ([]byte, error) {" in tmpdir.join("todos.go").read()
+
+
+def test_invalid_manifests_are_rejected(tmpdir):
+    manifest = tmpdir.join("targets.json")
+    manifest.write('{"targets": [{"input": "todos.cedar"}]}')
+
+    with pytest.raises(BatchError):
+        load_manifest(str(manifest))
+
+
+def test_many_targets_can_be_generated_in_parallel(tmpdir):
+    targets = [
+        Target(filename, "go", str(tmpdir.join("todos.go")), ("--package-name", "todos")),
+        Target(filename, "elm", str(tmpdir.join("Todos.elm")), ()),
+    ]
+
+    assert run(targets, jobs=2) == 0
+    assert tmpdir.join("todos.go").read().startswith("package todos\n")
+    assert tmpdir.join("Todos.elm").read().startswith("module Api.Client exposing")
+
+
+def test_failures_are_summarized(tmpdir, capsys):
+    targets = [
+        Target(filename, "go", str(tmpdir.join("a.go")), ()),
+        Target(invalid_filename, "go", str(tmpdir.join("b.go")), ()),
+        Target(filename, "rust", str(tmpdir.join("c.rs")), ()),
+    ]
+
+    assert run(targets) == 1
+    assert tmpdir.join("a.go").check()
+
+    _, error = capsys.readouterr()
+    assert "unknown type 'Bar'" in error
+    assert "unknown language 'rust'" in error
+    assert "1 of 3 targets generated successfully." in error
+
+
+def test_failed_targets_keep_their_previous_output(tmpdir):
+    output = tmpdir.join("Todos.elm")
+    output.write("previous")
+
+    assert run([Target(filename, "elm", str(output), ("--stream", "getTodo"))]) == 1
+    assert output.read() == "previous"
+    assert tmpdir.listdir() == [output]
+
+
+def test_failed_targets_do_not_create_outputs(tmpdir):
+    assert run([Target(filename, "elm", str(tmpdir.join("Todos.elm")), ("--stream", "getTodo"))]) == 1
+    assert tmpdir.listdir() == []
+
+
+def test_cli_can_generate_many_targets(tmpdir):
+    target = "{}:go:{}".format(filename, tmpdir.join("todos.go"))
+    with arguments("cedar", "generate", "--target", target, "--jobs", "1"):
+        assert main() == 0
+
+    assert tmpdir.join("todos.go").check()
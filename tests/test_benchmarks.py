@@ -0,0 +1,38 @@
+import io
+import json
+
+from benchmarks import suite
+from benchmarks.specgen import generate_spec
+from cedar import parse
+from cedar.languages.cedar import format_module
+
+
+def test_generated_specs_are_valid():
+    for options in (
+            {"declarations": 40},
+            {"declarations": 40, "width": 10, "depth": 3},
+            {"records": 3, "functions": 2, "enums": 0, "unions": 0},
+    ):
+        module = parse(generate_spec(**options))
+        assert parse(format_module(module)) == module
+
+
+def test_generated_specs_have_the_requested_shape():
+    module = parse(generate_spec(enums=1, unions=2, records=3, functions=4))
+    kinds = [type(decl).__name__ for decl in module.declarations]
+    assert kinds == ["Enum"] + ["Record"] * 3 + ["Union"] * 2 + ["Function"] * 4
+
+
+def test_suite_detects_scaling_regressions():
+    results = suite.run([8, 16], repeat=1, min_time=0, stream=io.StringIO())
+    assert set(results) == {
+        "tokenize", "parse", "typecheck",
+        "go.generate", "elm.generate", "cedar.format_module",
+    }
+
+    ratios = suite.scaling(results)
+    assert suite.compare(ratios, json.loads(json.dumps(ratios)), stream=io.StringIO()) == []
+
+    baseline = {"parse": {"time": ratios["parse"]["time"] / 10}}
+    ratios["parse"]["time"] = 10
+    assert len(suite.compare(ratios, baseline, stream=io.StringIO())) == 1
@@ -0,0 +1,75 @@
+import marshal
+import os
+import zlib
+
+from cedar import parse
+from cedar.cache import Cache
+from cedar.cli import main
+
+from .common import arguments, rel
+
+filename = rel("..", "examples", "todos", "todos.cedar")
+
+
+def read(filename):
+    with open(filename) as f:
+        return f.read()
+
+
+def test_modules_can_be_cached(tmpdir):
+    source = read(filename)
+    cache = Cache(str(tmpdir))
+    key = cache.key(source)
+
+    assert cache.load(key) is None
+    assert cache.parse(source, filename="a.cedar") == parse(source, filename="a.cedar")
+    assert cache.load(key).declarations == parse(source).declarations
+    assert cache.parse(source, filename="b.cedar").file_name == "b.cedar"
+
+
+def test_keys_depend_on_the_source(tmpdir):
+    cache = Cache(str(tmpdir))
+
+    assert cache.key("enum A {}") != cache.key("enum B {}")
+
+
+def test_invalid_entries_are_ignored(tmpdir):
+    cache = Cache(str(tmpdir))
+    key = cache.key("enum A {}")
+    tmpdir.join(key + ".cedarc").write_binary(b"garbage")
+
+    assert cache.load(key) is None
+    assert cache.parse("enum A {}") == parse("enum A {}")
+
+    header = tmpdir.join(key + ".cedarc").read_binary()[:6]
+    tmpdir.join(key + ".cedarc").write_binary(header + zlib.compress(marshal.dumps([1, 2, 3])))
+    assert cache.load(key) is None
+
+
+def test_eviction_tolerates_a_missing_directory(tmpdir):
+    cache = Cache(str(tmpdir.join("missing")))
+    cache.evict()
+
+
+def test_least_recently_used_entries_are_evicted(tmpdir):
+    cache = Cache(str(tmpdir))
+    sources = ["enum A {}", "enum B {}", "enum C {}"]
+    for i, source in enumerate(sources):
+        cache.parse(source)
+        os.utime(cache.path(cache.key(source)), (i, i))
+
+    cache.load(cache.key("enum A {}"))
+    cache.max_size = os.path.getsize(cache.path(cache.key("enum A {}"))) * 2
+    cache.evict()
+
+    assert [cache.load(cache.key(source)) is not None for source in sources] == [True, False, True]
+
+
+def test_cli_can_use_a_cache(tmpdir, capsys):
+    for _ in range(2):
+        with arguments("cedar", "generate", "go", "--cache-dir", str(tmpdir), filename):
+            assert main() == 0
+
+    output, _ = capsys.readouterr()
+    assert len(tmpdir.listdir()) == 1
+    assert output.count("package server") == 2
@@ -1,4 +1,8 @@
+import os
 import pytest
+import re
+import subprocess
+import sys
 
 from cedar.cli import main
 
@@ -6,6 +10,11 @@ from .common import rel, arguments
 
 filename = rel("..", "examples", "todos", "todos.cedar")
 
+#: The maximum amount of time, in microseconds, that "cedar --version"
+#: may spend importing modules other than those imported by the
+#: interpreter on startup.
+import_budget = 50000
+
 
 def test_commands_are_routed_correctly():
     for cmd in ("elm", "go"):
@@ -19,6 +28,17 @@ def test_generation_errors_exit():
         main()
 
 
+def test_cache_options_can_come_before_or_after_the_language(tmpdir):
+    for i, argv in enumerate([
+        ("cedar", "generate", "--cache-dir", str(tmpdir.join("0")), "go", filename),
+        ("cedar", "generate", "go", "--cache-dir", str(tmpdir.join("1")), filename),
+    ]):
+        with arguments(*argv):
+            assert main() == 0
+
+        assert tmpdir.join(str(i)).listdir()
+
+
 def test_no_args_prints_usage():
     with arguments("cedar"):
         assert main() == 0
@@ -32,3 +52,28 @@ def test_missing_lang_exits():
 def test_unknown_commands_exit():
     with pytest.raises(SystemExit), arguments("cedar", "generate", "foo", filename):
         main()
+
+
+@pytest.mark.skipif(sys.version_info < (3, 7), reason="-X importtime requires Python 3.7")
+def test_cli_startup_stays_within_import_budget():
+    env = dict(os.environ, PYTHONPATH=rel(".."))
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-m", "cedar.cli", "--version"],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        env=env, universal_newlines=True,
+    )
+    assert process.returncode == 0
+
+    imports, total = [], 0
+    for match in re.finditer(r"^import time:\s+\d+ \|\s+(\d+) \| ( *)(\S+)$", process.stderr, re.M):
+        cumulative, indent, module = match.groups()
+        if module == "site":
+            imports, total = [], 0
+            continue
+
+        imports.append(module)
+        if not indent:
+            total += int(cumulative)
+
+    assert not set(imports) & {"multipledispatch", "cedar.parser", "cedar.languages.go", "cedar.languages.elm"}
+    assert total < import_budget
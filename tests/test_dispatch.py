@@ -0,0 +1,42 @@
+import pytest
+
+from cedar import ast
+from cedar.dispatch import dispatch
+
+
+@dispatch(ast.Type)
+def describe(node, suffix=""):
+    return "type " + node.name + suffix
+
+
+@dispatch((ast.List, ast.Nullable))
+def describe(node, suffix=""):
+    return "wrapper of " + describe(node.type, suffix)
+
+
+class Visitor:
+    def __init__(self, prefix):
+        self.prefix = prefix
+
+    @dispatch(ast.Node)
+    def visit(self, node):
+        return self.prefix + "node"
+
+    @dispatch(ast.Type)
+    def visit(self, node):
+        return self.prefix + node.name
+
+
+def test_functions_dispatch_on_their_first_argument():
+    assert describe(ast.Type("Int")) == "type Int"
+    assert describe(ast.Nullable(ast.List(ast.Type("Int"))), "!") == "wrapper of wrapper of type Int!"
+
+    with pytest.raises(NotImplementedError):
+        describe(ast.Dict(ast.Type("String"), ast.Type("Int")))
+
+
+def test_methods_dispatch_on_the_argument_after_self():
+    visitor = Visitor("> ")
+    assert visitor.visit(ast.Type("Int")) == "> Int"
+    assert visitor.visit(ast.List(ast.Type("Int"))) == "> node"
+    assert Visitor.visit.__name__ == "visit"
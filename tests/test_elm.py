@@ -0,0 +1,96 @@
+from cedar import parse
+from cedar.fragments import Fragments
+from cedar.languages import elm
+
+source = """
+enum Status { Active, Done }
+
+record Todo {
+  id Int
+  status Status
+  tags {String: String}
+}
+
+record Unused {
+  at Timestamp
+}
+
+fn getTodo(id Int) Todo
+"""
+
+
+def test_unused_codecs_are_pruned():
+    output = elm.generate(parse(source))
+    assert "decodeTodo__ :" in output
+    assert "decodeStatus__ :" in output
+    assert "encodeTodo__ :" not in output
+    assert "encodeStatus__ :" not in output
+    assert "Unused__ :" not in output
+    assert "type alias Unused =" in output
+    assert "encodeDict___" not in output
+    assert "decodeDate___" not in output
+    assert "import Dict exposing (Dict)" in output
+
+
+def test_pruning_can_be_turned_off():
+    output = elm.generate(parse(source), prune=False)
+    for name in ("encodeTodo__", "encodeStatus__", "encodeUnused__", "decodeUnused__", "encodeDict___"):
+        assert name + " :" in output
+
+    assert "decodeDate___ :" in output
+
+
+def test_fragments_are_regenerated_when_reachability_changes():
+    module = parse(source)
+    changed = parse(source + "fn addTodo(todo Todo) Unused\n")
+
+    fragments = Fragments()
+    assert elm.generate(module, fragments=fragments) == elm.generate(module)
+    output = elm.generate(changed, fragments=fragments)
+    assert output == elm.generate(changed)
+    assert "encodeTodo__ :" in output
+    assert "decodeDate___ :" in output
+
+
+def test_repeated_composite_types_share_codecs():
+    module = parse("""
+record A {
+  tags [String]
+}
+
+fn f(tags [String]) [String]
+""")
+    output = elm.generate(module)
+    assert output.count("JE.list << List.map JE.string") == 1
+    assert output.count("JD.list JD.string") == 1
+    assert '("tags", encodeListString___ tags)' in output
+    assert "res__ = \n            decodeListString___" in output
+    assert "JD.list JD.string" in elm.generate(module, share=False).replace("decodeListString___", "")
+
+
+def test_functions_can_be_batched():
+    output = elm.generate(parse(source))
+    assert "getTodoCall___ : Int -> BatchCall___ Todo" in output
+    assert 'BatchCall___ "getTodo" req__ res__' in output
+    assert 'HB.url config__.endpoint [("fn", "__batch")]' in output
+    assert "    , batch___\n" in output
+    assert "    , mapCall___\n" in output
+
+
+def test_batch_helpers_do_not_clash_with_functions():
+    output = elm.generate(parse("""
+fn batch(calls [Int]) Int
+fn mapCall() Int
+fn get() Int
+fn getCall() Int
+"""))
+    for name in ("batch", "mapCall", "get", "getCall", "batch___", "mapCall___", "getCall___", "getCallCall___"):
+        assert output.count("\n{} :".format(name)) == 1
+
+
+def test_streamed_functions_are_read_line_by_line():
+    output = elm.generate(parse(source + "fn getTodos() [Todo]\n"), streaming=["getTodos"])
+    assert "|> HB.send (ndjsonReader___ res__) HB.stringReader" in output
+    assert "ndjsonReader___ : Decoder a -> HB.BodyReader (List a)" in output
+    assert "getTodosCall___" not in output
+    assert "getTodoCall___" in output
@@ -0,0 +1,32 @@
+import pickle
+import pytest
+
+from cedar import TypeErrors, parse
+from cedar.errors import LineIndex
+
+
+def test_line_indexes_slice_lines_like_split():
+    for source in ("", "a", "a\n", "a\nb", "\n\nab\n\ncd\n", "a\n" * 10):
+        index = LineIndex(source)
+        for start in range(0, 12):
+            for end in range(start, 14):
+                assert index.lines(start, end) == source.split("\n")[start:end]
+
+
+def test_errors_share_their_source_index(capsys):
+    with pytest.raises(TypeErrors) as e:
+        parse("record A {\n  b B\n  c C\n}")
+
+    first, second = e.value.errors
+    assert first.line_index is second.line_index
+    assert first.file_contents == "record A {\n  b B\n  c C\n}"
+
+    e.value.print_error()
+    _, err = capsys.readouterr()
+    assert "3|   c C" in err
+
+
+def test_line_indexes_can_be_pickled():
+    index = LineIndex("a\nb")
+    index.lines(0, 2)
+    assert pickle.loads(pickle.dumps(index)).lines(0, 2) == ["a", "b"]
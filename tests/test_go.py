@@ -0,0 +1,89 @@
+import pytest
+
+from cedar import parse
+from cedar.languages import go
+
+source = """
+record A {
+  tags [String]
+  scores {String: Float}?
+}
+
+fn listTags(tags [String], scores {String: Float}?) [String]
+"""
+
+
+def test_repeated_composite_types_can_share_aliases():
+    output = go.generate(parse(source), shared_types=True)
+    assert "type ListString = []string" in output
+    assert "type NullableMapFloat = *MapFloat" in output
+    assert "type MapFloat = map[string]float64" in output
+    assert "Tags ListString `json:\"tags\"`" in output
+    assert "[]string" not in output.replace("type ListString = []string", "")
+
+
+def test_types_are_expanded_by_default():
+    output = go.generate(parse(source))
+    assert "ListString" not in output
+    assert "Scores *map[string]float64 `json:\"scores\"`" in output
+
+
+def test_servers_route_through_a_map_of_functions():
+    output = go.generate(parse(source), server_name="Tags")
+    assert "var tagsRoutes = map[string]func(*Tags, *http.Request, *tagsBuffer) error" in output
+    assert '"listTags": func(s *Tags, req *http.Request, buf *tagsBuffer) error' in output
+    assert "name := tagsFunctionName(req)" in output
+    assert "tagsRoutes[name]" in output
+    assert "Query()" not in output
+
+
+def test_servers_pool_buffers_and_requests():
+    output = go.generate(parse(source), server_name="Tags")
+    assert "tagsListTagsRequestPool = sync.Pool{New: func() interface{} { return new(ListTagsRequest) }}" in output
+    assert "*request = ListTagsRequest{}" in output
+    assert 'rw.Header().Set("Content-Length", strconv.Itoa(buf.Len()))' in output
+    assert "json.NewEncoder(rw)" not in output
+
+
+def test_servers_serve_batches_of_calls():
+    output = go.generate(parse(source), server_name="Tags")
+    assert "func (s *Tags) SetBatchParallelism(n int) *Tags" in output
+    assert 'name == "__batch"' in output
+    assert "tagsBatch(&s, req, buf.Bytes())" in output
+
+
+def test_list_returning_functions_can_be_streamed():
+    output = go.generate(parse(source), server_name="Tags", streaming=["listTags"])
+    assert "listTags func(*http.Request, *ListTagsRequest, func(string) error) error" in output
+    assert '"listTags": func(s *Tags, rw http.ResponseWriter, req *http.Request, buf *tagsBuffer) error' in output
+    assert "stream, ok := tagsStreams[name]" in output
+    assert '"time"' in output
+    assert '"listTags": func(s *Tags, req *http.Request' not in output
+
+    with pytest.raises(ValueError):
+        go.generate(parse(source), streaming=["nope"])
+
+
+def test_json_methods_are_opt_in():
+    output = go.generate(parse(source))
+    assert "AppendJSON" not in output
+    assert "unicode/utf8" not in output
+
+
+def test_json_methods_are_specialized_to_each_type():
+    output = go.generate(parse(source), json_methods=True)
+    assert "func (r A) AppendJSON(b []byte) []byte" in output
+    assert "func (r *ListTagsRequest) UnmarshalJSON(data []byte) error" in output
+    assert 'b = append(b, `{"tags":`...)' in output
+    assert 'switch d.field("tags", "scores") {' in output
+    assert '"sort"' in output
+    assert "request.UnmarshalJSON(body)" in output
+    assert "json.NewDecoder" not in output
+
+
+def test_json_benchmarks_cover_every_struct():
+    output = go.generate_json_benchmarks(parse(source))
+    assert "type jsonPlainA A" in output
+    assert "func BenchmarkAAppendJSON(b *testing.B)" in output
+    assert "func BenchmarkListTagsRequestEncodingJSONUnmarshal(b *testing.B)" in output
+    assert 'Scores: func() *map[string]float64 { var v map[string]float64 = map[string]float64{"b": 1.25e-7' in output
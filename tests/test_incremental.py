@@ -0,0 +1,71 @@
+import pytest
+
+from cedar import ParseErrors, TypeErrors, parse
+from cedar.incremental import IncrementalParser
+
+source = """\
+enum Status { Active, Inactive }
+
+record User {
+  id Int
+  status Status
+}
+
+fn getUser(id Int) User
+"""
+
+
+def errors(e):
+    return [(error.message, error.line, error.column) for error in e.errors]
+
+
+def test_edits_match_full_reparses():
+    parser = IncrementalParser()
+    parser.parse(source)
+
+    offset = source.index("status Status") + len("status Status")
+    module = parser.edit(offset, 0, "\n  name String")
+    assert module == parse(parser.source)
+    assert [d.span for d in module.declarations] == [d.span for d in parse(parser.source).declarations]
+
+    # Declarations that aren't next to the edit are reused as-is.
+    previous = module
+    module = parser.edit(0, 0, "// Users\n")
+    assert module == parse(parser.source)
+    assert module.declarations[0] is not previous.declarations[0]
+    assert module.declarations[2] is previous.declarations[2]
+
+
+def test_edits_recheck_declarations_that_refer_to_changed_names():
+    parser = IncrementalParser()
+    parser.parse(source)
+
+    offset = source.index("Status {")
+    with pytest.raises(TypeErrors) as e:
+        parser.edit(offset, len("Status"), "State")
+
+    with pytest.raises(TypeErrors) as expected:
+        parse(parser.source)
+
+    assert errors(e.value) == errors(expected.value) == [("unknown type 'Status'", 5, 9)]
+    assert parser.module.declarations[0].name == "State"
+
+    parser.edit(offset, len("State"), "Status")
+    assert parser.module == parse(source)
+
+
+def test_syntax_errors_fall_back_to_full_reparses():
+    parser = IncrementalParser()
+    parser.parse(source)
+
+    offset = source.index("fn")
+    with pytest.raises(ParseErrors) as e:
+        parser.edit(offset, 2, "fun")
+
+    with pytest.raises(ParseErrors) as expected:
+        parse(parser.source)
+
+    assert errors(e.value) == errors(expected.value)
+    assert parser.module is None
+
+    assert parser.edit(offset, 3, "fn") == parse(source)
@@ -1,6 +1,6 @@
 import pytest
 
-from cedar import ParseError, parse
+from cedar import ParseError, ParseErrors, parse
 from cedar.ast import (
     Enum, Tag,
     Record, Attribute,
@@ -54,6 +54,40 @@ def test_unions_cannot_be_empty():
         parse("union A {}")
 
 
+def test_parsing_recovers_from_errors_at_the_next_declaration():
+    with pytest.raises(ParseErrors) as e:
+        parse("""
+record A {
+  a Int!
+}
+
+enum B { C }
+
+record D {
+  d Int
+  e {Int String}
+}
+
+union E {
+""")
+
+    assert [(error.line, error.column) for error in e.value.errors] == [(3, 7), (10, 9), (14, 10)]
+    assert e.value.message == "unexpected '!'"
+    assert (e.value.line, e.value.column) == (3, 7)
+
+
+def test_type_errors_are_not_reported_alongside_parse_errors():
+    with pytest.raises(ParseErrors) as e:
+        parse("record A {\n  b B\n}\n\nrecord")
+
+    assert len(e.value.errors) == 1
+
+
+def test_trailing_newlines_are_allowed():
+    assert parse("record A {\n  a Int\n}\n\n\n") == Module([Record("A", [Attribute("a", Type("Int"))])])
+    assert parse("\n\n") == Module([])
+
+
 def test_comments_are_ignored():
     table([
         (
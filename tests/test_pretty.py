@@ -0,0 +1,99 @@
+from cedar.pretty import (
+    IndentConfig, Layout, Nil, Text,
+    blank, block, concat, group, line, nest, pretty_print, pretty_print_to, softline, text
+)
+from io import StringIO
+
+config = IndentConfig(0, 2, " ")
+
+
+def test_docs_can_be_rendered():
+    doc = text("record A") + block([text("a Int"), text("b String")]) + blank
+
+    assert pretty_print(doc, config) == "record A {\n  a Int\n  b String\n}\n"
+
+
+def test_concatenation_flattens_layouts():
+    doc = concat(text("a"), concat(text("b"), text("c")), text("d"))
+
+    assert isinstance(doc, Layout)
+    assert len(doc) == 4
+    assert pretty_print(doc, config) == "abcd"
+
+
+def test_layouts_are_immutable():
+    base = text("a") + text("b")
+    left = base + text("c")
+    right = base + text("d")
+
+    assert pretty_print(base, config) == "ab"
+    assert pretty_print(left, config) == "abc"
+    assert pretty_print(right, config) == "abd"
+
+
+def test_long_chains_are_built_in_linear_time():
+    doc = concat()
+    for i in range(20000):
+        doc = doc + line(text(str(i)))
+
+    assert len(doc) == 20000
+    assert pretty_print(doc, config).count("\n") == 20000
+
+
+def test_docs_can_be_streamed():
+    stream = StringIO()
+    doc = concat(*(line(text(str(i))) for i in range(100)))
+    pretty_print_to(doc, config, stream, chunk_size=7)
+
+    assert stream.getvalue() == pretty_print(doc, config)
+
+
+def test_deeply_nested_docs_can_be_rendered():
+    doc = Nil()
+    for _ in range(20000):
+        doc = Text("a", doc)
+
+    assert pretty_print(doc, config) == "a" * 20000
+
+
+def signature(*types):
+    return text("f :") + group(nest(concat(*(softline(" ") + text(t) for t in types))))
+
+
+def test_groups_that_fit_are_laid_out_flat():
+    assert pretty_print(signature("Int", "->", "Int"), config, width=20) == "f : Int -> Int"
+
+
+def test_groups_that_dont_fit_are_broken():
+    doc = signature("Int", "->", "Int")
+
+    assert pretty_print(doc, config, width=10) == "f :\n  Int\n  ->\n  Int"
+
+
+def test_nested_groups_are_decided_independently():
+    doc = group(concat(
+        text("["),
+        nest(concat(softline(), group(text("a") + softline(" ") + text("b")))),
+        softline(", "),
+        text("c" * 8),
+        softline(),
+        text("]")
+    ))
+
+    assert pretty_print(doc, config, width=10) == "[\n  a b\ncccccccc\n]"
+
+
+def test_hard_lines_break_their_groups():
+    doc = group(text("a") + softline(" ") + line(text("b")))
+
+    assert pretty_print(doc, config) == "a\n\nb"
+
+
+def test_softlines_outside_of_groups_are_broken():
+    assert pretty_print(text("a") + softline(" ") + text("b"), config) == "a\nb"
+
+
+def test_many_groups_are_rendered_in_linear_time():
+    doc = concat(*(line(signature("Int", "->", "String")) for _ in range(10000)))
+
+    assert pretty_print(doc, config).count("\n") == 10000
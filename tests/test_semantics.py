@@ -0,0 +1,71 @@
+from cedar import parse
+from cedar.ast import List, Type
+from cedar.semantics import Model, analyze
+
+source = """
+fn getUser(id Int) User
+
+record User {
+  status Status
+  friends [User]
+  tags {String: Tag?}
+}
+
+enum Status { Active, Inactive }
+
+record Tag {
+  name String
+}
+
+record Unused {
+  a Int
+}
+"""
+
+
+def test_models_index_declarations():
+    module = parse(source)
+    model = Model(module)
+    assert model.lookup("User") is module.declarations[1]
+    assert model.lookup("getUser") is module.declarations[0]
+    assert model.lookup("Missing") is None
+    assert model.dependencies("User") == ["Status", "User", "Tag"]
+    assert model.dependencies("Unused") == []
+    assert model.dependents("User") == ["getUser", "User"]
+
+
+def test_models_find_reachable_types():
+    model = Model(parse(source))
+    assert model.reachable(["getUser"]) == {"User", "Status", "Tag"}
+    assert model.reachable(["Tag"]) == set()
+
+
+def test_models_order_types_by_their_dependencies():
+    model = Model(parse(source))
+    assert [declaration.name for declaration in model.order] == ["Status", "Tag", "User", "Unused"]
+
+
+def test_analyze_reuses_the_model_of_the_last_module():
+    module = parse(source)
+    assert analyze(module) is analyze(module)
+    assert analyze(parse(source)) is not analyze(module)
+
+
+def test_models_name_shared_expressions():
+    model = Model(parse("""
+record ListA {
+  a [A]
+}
+
+record A {
+  b [A]
+  c [A]?
+  d [ListA]
+}
+"""))
+    assert model.expressions[List(Type("A"))] == 3
+
+    def shape(tipe):
+        return "List" + tipe.type.name if isinstance(tipe, List) else "Other"
+
+    assert model.shared_names(shape, taken=["ListA"]) == {List(Type("A")): "ListA2"}
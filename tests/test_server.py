@@ -0,0 +1,69 @@
+import io
+import json
+
+from cedar.server import COMPILE_ERROR, INVALID_PARAMS, METHOD_NOT_FOUND, PARSE_ERROR, Server
+
+from .common import rel
+
+filename = rel("..", "examples", "todos", "todos.cedar")
+
+
+def call(server, method, **params):
+    return server.handle({"jsonrpc": "2.0", "id": 1, "method": method, "params": params})
+
+
+def test_server_can_parse_files():
+    response = call(Server(), "parse", filename=filename)
+    assert response["result"]["diagnostics"] == []
+    assert {"kind": "record", "name": "Todo"} in response["result"]["declarations"]
+
+
+def test_server_returns_structured_diagnostics():
+    server = Server()
+    response = call(server, "check", filename="a.cedar", source="record A {\n  b C\n}")
+    assert response["result"]["diagnostics"] == [{
+        "type": "TypeError",
+        "message": "unknown type 'C'",
+        "filename": "a.cedar",
+        "line": 2,
+        "column": 4,
+    }]
+
+    response = call(server, "generate", filename="a.cedar", source="record {", language="go")
+    assert response["error"]["code"] == COMPILE_ERROR
+    assert response["error"]["data"]["diagnostics"][0]["type"] == "ParseError"
+
+
+def test_server_can_generate_and_format_code():
+    server = Server()
+    source = "record A {\n  b Int\n}"
+    options = ["--package-name", "a"]
+    response = call(server, "generate", filename="a.cedar", source=source, language="go", options=options)
+    assert response["result"]["output"].startswith("package a\n")
+
+    response = call(server, "format", filename="a.cedar", source="record   A  {\n b   Int }")
+    assert response["result"]["output"] == source + "\n"
+
+
+def test_server_rejects_invalid_requests():
+    server = Server()
+    assert call(server, "nope")["error"]["code"] == METHOD_NOT_FOUND
+    assert call(server, "generate", filename="a.cedar", source="", language="cobol")["error"]["code"] == INVALID_PARAMS
+    options = ["--stream", "a"]
+    response = call(server, "generate", filename="a.cedar", source="fn a() Int", language="go", options=options)
+    assert response["error"]["code"] == INVALID_PARAMS
+    assert server.handle_line("{")["error"]["code"] == PARSE_ERROR
+
+
+def test_server_serves_requests_until_shutdown():
+    stdin = io.StringIO("\n".join([
+        json.dumps({"jsonrpc": "2.0", "id": 1, "method": "check", "params": {"filename": filename}}),
+        json.dumps({"jsonrpc": "2.0", "method": "check", "params": {"filename": filename}}),
+        json.dumps({"jsonrpc": "2.0", "id": 2, "method": "shutdown"}),
+        json.dumps({"jsonrpc": "2.0", "id": 3, "method": "check", "params": {"filename": filename}}),
+    ]))
+    stdout = io.StringIO()
+    assert Server().serve(stdin, stdout) == 0
+
+    responses = [json.loads(line) for line in stdout.getvalue().splitlines()]
+    assert [response["id"] for response in responses] == [1, 2]
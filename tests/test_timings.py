@@ -0,0 +1,41 @@
+import io
+
+from cedar import parse, timings
+from cedar.cli import main
+from cedar.languages import go
+
+from .common import arguments, rel
+
+filename = rel("..", "examples", "todos", "todos.cedar")
+
+
+def test_phases_are_noops_without_a_collector():
+    assert timings.phase("parse") is timings.phase("render")
+
+
+def test_phases_are_collected():
+    with open(filename) as f:
+        source = f.read()
+
+    with timings.collect() as collected:
+        go.generate(parse(source))
+        go.generate(parse(source))
+
+    assert list(collected.phases) == ["tokenize", "parse", "typecheck", "generate", "render"]
+    assert all(phase.count == 2 for phase in collected.phases.values())
+
+    stream = io.StringIO()
+    collected.report(stream)
+    assert "generate (x2)" in stream.getvalue()
+
+
+def test_cli_can_report_timings_and_profiles(tmpdir, capsys):
+    profile = str(tmpdir.join("out.prof"))
+    with arguments("cedar", "generate", "go", filename, "--timings", "--profile", profile):
+        assert main() == 0
+
+    _, err = capsys.readouterr()
+    for phase in ("read", "tokenize", "parse", "typecheck", "generate", "render"):
+        assert phase in err
+
+    assert tmpdir.join("out.prof").size() > 0
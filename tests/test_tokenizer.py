@@ -0,0 +1,37 @@
+import pytest
+
+from cedar import ParseError
+from cedar.tokenizer import Token, TokenKind, tokenize, tokenize_bulk
+
+
+def test_bulk_tokenization_is_column_oriented():
+    tokens = tokenize_bulk("[STRING]", "record A {\n  a [Int]  // a comment\n}")
+
+    assert [tokens.kind(i) for i in range(len(tokens.kinds))] == [
+        TokenKind.record, TokenKind.cap_name, TokenKind.lbrace, TokenKind.newline,
+        TokenKind.name, TokenKind.lbracket, TokenKind.cap_name, TokenKind.rbracket, TokenKind.newline,
+        TokenKind.rbrace, TokenKind.eof,
+    ]
+    assert list(tokens.starts[:3]) == [0, 7, 9]
+    assert list(tokens.lines) == [1, 1, 1, 2, 2, 2, 2, 2, 3, 3, 3]
+    assert tokens.value(6) == "Int"
+    assert tokens.token(10) == Token(TokenKind.eof, None, 3, 1)
+
+
+def test_keywords_must_match_whole_identifiers():
+    tokens = list(tokenize("[STRING]", "enums fnord Record"))
+
+    assert [token.kind for token in tokens] == [
+        TokenKind.name, TokenKind.name, TokenKind.cap_name, TokenKind.eof
+    ]
+
+
+def test_invalid_tokens_are_only_reported_once_reached():
+    tokens = tokenize("[STRING]", "record !")
+    assert next(tokens) == Token(TokenKind.record, "record", 1, 0)
+
+    with pytest.raises(ParseError) as e:
+        next(tokens)
+
+    assert e.value.message == "unexpected '!'"
+    assert e.value.column == 7
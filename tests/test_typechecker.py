@@ -105,6 +105,22 @@ def test_unknown_types_are_rejected():
         )
 
 
+def test_types_can_be_used_before_they_are_declared():
+    module = parse(
+        """
+          fn getUser() User
+
+          record User {
+            status Status
+          }
+
+          enum Status { Active }
+        """
+    )
+
+    assert len(module.declarations) == 3
+
+
 def test_types_cannot_be_redeclared():
     with pytest.raises(TypeErrors):
         parse(
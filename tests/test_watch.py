@@ -0,0 +1,115 @@
+import io
+import os
+
+from cedar import parse
+from cedar.batch import Target
+from cedar.fragments import Fragments
+from cedar.languages import elm, go
+from cedar.watch import Watcher
+
+source = """
+enum Status { Active, Done }
+
+record Todo {
+  id Int
+  status Status
+}
+
+fn getTodo(id Int) Todo
+"""
+
+
+def touch(path, source):
+    path.write(source)
+    # Make sure the change is visible even on filesystems with a
+    # coarse mtime resolution.
+    mtime = os.stat(str(path)).st_mtime_ns + 1000000000
+    os.utime(str(path), ns=(mtime, mtime))
+
+
+def test_fragments_produce_the_same_output_as_a_full_generation():
+    module = parse(source)
+    changed = parse(source.replace("status Status", "status Status\n  title String"))
+
+    for generate in (go.generate, elm.generate):
+        fragments = Fragments()
+        assert generate(module, fragments=fragments) == generate(module)
+        assert generate(changed, fragments=fragments) == generate(changed)
+        assert fragments.misses == 4
+        assert fragments.hits == 2
+
+
+def test_watcher_regenerates_targets_when_their_input_changes(tmpdir):
+    input_path = tmpdir.join("todos.cedar")
+    output_path = tmpdir.join("todos.go")
+    input_path.write(source)
+
+    stream = io.StringIO()
+    watcher = Watcher([
+        Target(str(input_path), "go", str(output_path), ("--package-name", "todos")),
+    ], stream=stream)
+
+    assert watcher.poll() == 1
+    assert output_path.read().startswith("package todos\n")
+    assert watcher.poll() == 0
+
+    touch(input_path, source.replace("fn getTodo", "fn deleteTodo(id Int) Todo\n\nfn getTodo"))
+    assert watcher.poll() == 1
+    assert "HandleDeleteTodo" in output_path.read()
+    assert "(1 of 4 declarations changed)" in stream.getvalue()
+
+    touch(input_path, input_path.read().replace("Done", "Done,"))
+    assert watcher.poll() == 0
+
+
+def test_watcher_reports_parse_errors_and_recovers(tmpdir):
+    input_path = tmpdir.join("todos.cedar")
+    output_path = tmpdir.join("todos.go")
+    input_path.write("record {")
+
+    stream = io.StringIO()
+    watcher = Watcher([Target(str(input_path), "go", str(output_path), ())], stream=stream)
+    assert watcher.poll() == 0
+    assert "Failed to parse" in stream.getvalue()
+    assert not output_path.exists()
+
+    touch(input_path, source)
+    assert watcher.poll() == 1
+    assert output_path.exists()
+
+
+def test_watcher_retries_failed_targets(tmpdir):
+    input_path = tmpdir.join("todos.cedar")
+    output_path = tmpdir.join("out", "todos.go")
+    input_path.write(source)
+
+    stream = io.StringIO()
+    watcher = Watcher([
+        Target(str(input_path), "go", str(output_path), ()),
+        Target(str(input_path), "elm", str(tmpdir.join("Todos.elm")), ()),
+    ], stream=stream)
+    assert watcher.poll() == 1
+    assert watcher.poll() == 0
+    assert stream.getvalue().count("Failed to generate") == 1
+
+    tmpdir.mkdir("out")
+    assert watcher.poll() == 1
+    assert output_path.read().startswith("package server\n")
+    assert watcher.poll() == 0
+
+
+def test_watcher_keeps_the_last_good_output_when_generation_fails(tmpdir):
+    input_path = tmpdir.join("todos.cedar")
+    output_path = tmpdir.join("Todos.elm")
+    input_path.write(source.replace("Todo\n", "[Todo]\n"))
+
+    stream = io.StringIO()
+    watcher = Watcher([Target(str(input_path), "elm", str(output_path), ("--stream", "getTodo"))], stream=stream)
+    assert watcher.poll() == 1
+    previous = output_path.read()
+
+    touch(input_path, source)
+    assert watcher.poll() == 0
+    assert "Failed to generate" in stream.getvalue()
+    assert output_path.read() == previous
+    assert sorted(path.basename for path in tmpdir.listdir()) == ["Todos.elm", "todos.cedar"]